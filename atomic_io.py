@@ -0,0 +1,84 @@
+import contextlib
+import json
+import os
+import tempfile
+
+# Permissions for new files: mkstemp creates them owner-only, but the outputs are read by the
+# server and other users; a file being replaced keeps its own mode instead
+NEW_FILE_MODE = 0o644
+
+
+def fsync_directory(directory):
+    """Flush a directory entry table, so renames inside it survive a crash"""
+    if not hasattr(os, 'O_DIRECTORY'):
+        return  # Not possible (or needed) on Windows
+    fd = os.open(directory or '.', os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class DirectorySyncBatch:
+    """Defers the directory fsyncs of many atomic writes to one fsync per directory.
+
+    Each file is still fsynced and renamed into place as soon as it is written, so a
+    reader never sees a partial file; only the durability of the renames waits for the
+    end of the batch.
+    """
+
+    def __init__(self):
+        self.directories = set()
+
+    def add(self, directory):
+        self.directories.add(os.path.abspath(directory or '.'))
+
+    def flush(self):
+        for directory in sorted(self.directories):
+            fsync_directory(directory)
+        self.directories.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
+
+
+@contextlib.contextmanager
+def atomic_open(path, mode='w', encoding=None, batch=None):
+    """Open a temporary file next to path; on success it is fsynced and renamed over path.
+
+    If the block raises, the temporary file is removed and path is left untouched. Pass a
+    DirectorySyncBatch to defer the directory fsync when writing many files.
+    """
+    if mode not in ('w', 'wb'):
+        raise ValueError(f"atomic_open only supports 'w' and 'wb', not {mode!r}")
+    directory = os.path.dirname(path)
+    fd, temp_path = tempfile.mkstemp(prefix=f'.{os.path.basename(path)}.', suffix='.tmp', dir=directory or '.')
+    try:
+        with os.fdopen(fd, mode, encoding=encoding) as f:
+            try:
+                os.chmod(temp_path, os.stat(path).st_mode & 0o7777)
+            except FileNotFoundError:
+                os.chmod(temp_path, NEW_FILE_MODE)
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(temp_path)
+        raise
+
+    if batch is not None:
+        batch.add(directory)
+    else:
+        fsync_directory(directory)
+
+
+def write_json(path, data, batch=None, **dump_kwargs):
+    """Atomically write data as JSON"""
+    with atomic_open(path, batch=batch) as f:
+        json.dump(data, f, **dump_kwargs)
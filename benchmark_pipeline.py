@@ -0,0 +1,231 @@
+import argparse
+import contextlib
+import glob
+import io
+import json
+import multiprocessing
+import os
+import re
+import resource
+import statistics
+import sys
+import tempfile
+import time
+
+from atomic_io import write_json
+
+# Fixed offline corpus: saved Gardenate pages and the committed JSON snapshots
+HTML_CORPUS_DIR = 'test_data'
+GARDEN_DATA_DIR = 'garden_data'
+DETAILED_DATA_DIR = 'gardenate_detailed_data'
+BASELINE_FILE = os.path.join('benchmarks', 'baseline.json')
+
+# A stage is flagged when its time per item is this much slower than the baseline
+DEFAULT_THRESHOLD = 0.20
+
+# Each stage runs once untimed to warm imports and caches, then this many timed runs; the best
+# run is compared, since slower runs measure interference from the rest of the machine
+DEFAULT_RUNS = 5
+
+
+def load_html_corpus(corpus_dir=HTML_CORPUS_DIR):
+    """Load saved pages named <plant>_<zone>_raw.html as (plant, zone, html) tuples"""
+    pages = []
+    for file_path in sorted(glob.glob(os.path.join(corpus_dir, '*_raw.html'))):
+        match = re.match(r'(.+)_(\d+)_raw\.html$', os.path.basename(file_path))
+        if not match:
+            continue
+        with open(file_path, 'r', encoding='utf-8') as f:
+            pages.append((match.group(1).capitalize(), int(match.group(2)), f.read()))
+    return pages
+
+
+def stage_extract_plant_data(pages, repeat):
+    """Parse calendar, growing info and companions from each saved page"""
+    from extract_complete import parse_plant_page
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = [parse_plant_page(html, plant, zone) for _ in range(repeat) for plant, zone, html in pages]
+    return len(results), sum(len(json.dumps(result)) for result in results[:len(pages)]) * repeat
+
+
+def stage_extract_detailed_info(pages, repeat):
+    """Parse the sowing/spacing/harvest info block from each saved page"""
+    from scrape_gardenate_details import extract_detailed_info
+
+    results = [extract_detailed_info(html) for _ in range(repeat) for _, _, html in pages]
+    return len(results), sum(len(json.dumps(result)) for result in results[:len(pages)]) * repeat
+
+
+def stage_integrate_detailed_data(pages, repeat):
+    """Merge the committed detailed snapshot into the committed garden_data snapshot"""
+    from integrate_detailed_data import integrate_detailed_data
+
+    plant_files = [f for f in os.listdir(GARDEN_DATA_DIR) if f.startswith('all_') and f.endswith('.json')]
+    bytes_out = 0
+    with tempfile.TemporaryDirectory() as output_dir:
+        for _ in range(repeat):
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                integrate_detailed_data(GARDEN_DATA_DIR, DETAILED_DATA_DIR, output_dir)
+        bytes_out = sum(os.path.getsize(os.path.join(output_dir, f)) for f in os.listdir(output_dir)) * repeat
+    return len(plant_files) * repeat, bytes_out
+
+
+# Stage name -> (function, unit, default repeat)
+STAGES = {
+    "extract_plant_data": (stage_extract_plant_data, "pages", 20),
+    "extract_detailed_info": (stage_extract_detailed_info, "pages", 50),
+    "integrate_detailed_data": (stage_integrate_detailed_data, "files", 1),
+}
+
+
+def _run_stage(stage_name, pages, repeat, results, profile_dir=None, runs=DEFAULT_RUNS):
+    """Run one stage and record its timings; executed in a fresh process for a clean peak RSS"""
+    stage, _, _ = STAGES[stage_name]
+
+    stage(pages, 1)  # warm-up: imports, regex compilation, file system cache
+
+    profiler = None
+    if profile_dir:
+        from pipeline_metrics import METRICS
+        from pipeline_profiler import PipelineProfiler
+        profiler = METRICS.profiler = PipelineProfiler(os.path.join(profile_dir, stage_name)).start()
+        runs = 1
+
+    timings = []
+    for _ in range(runs):
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profiler is None:
+            items, bytes_out = stage(pages, repeat)
+        else:
+            with profiler.stage(stage_name):
+                items, bytes_out = stage(pages, repeat)
+        timings.append((time.perf_counter() - wall_start, time.process_time() - cpu_start))
+    wall, cpu = min(timings)
+    median_wall = statistics.median(run_wall for run_wall, _ in timings)
+
+    if profiler is not None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            profiler.finish()
+
+    # ru_maxrss is reported in KiB on Linux and bytes on macOS
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+
+    results[stage_name] = {
+        "items": items,
+        "wall_seconds": wall,
+        "cpu_seconds": cpu,
+        "items_per_second": items / wall if wall else 0.0,
+        "seconds_per_item": wall / items if items else 0.0,
+        "median_seconds_per_item": median_wall / items if items else 0.0,
+        "runs": runs,
+        "bytes_out": bytes_out,
+        "peak_rss_mb": peak_rss_mb,
+    }
+
+
+def run_benchmarks(stage_names, pages, repeat_scale=1.0, profile_dir=None, runs=DEFAULT_RUNS):
+    """Run each stage in its own process and collect the best of runs timed runs"""
+    context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+    with context.Manager() as manager:
+        shared = manager.dict()
+        for stage_name in stage_names:
+            repeat = max(1, int(STAGES[stage_name][2] * repeat_scale))
+            process = context.Process(target=_run_stage, args=(stage_name, pages, repeat, shared, profile_dir, runs))
+            process.start()
+            process.join()
+            if process.exitcode != 0:
+                raise RuntimeError(f"Benchmark stage {stage_name} failed with exit code {process.exitcode}")
+        return {stage_name: dict(shared[stage_name]) for stage_name in stage_names}
+
+
+def compare_to_baseline(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """Return (stage, baseline s/item, current s/item, change) for every regressed stage"""
+    regressions = []
+    for stage_name, result in results.items():
+        previous = baseline.get("stages", {}).get(stage_name)
+        if not previous or not previous.get("seconds_per_item"):
+            continue
+        change = result["seconds_per_item"] / previous["seconds_per_item"] - 1
+        if change > threshold:
+            regressions.append((stage_name, previous["seconds_per_item"], result["seconds_per_item"], change))
+    return regressions
+
+
+def print_results(results, baseline=None):
+    """Print a summary table, with the change against the baseline when there is one"""
+    print(f"{'stage':<26}{'items':>8}{'items/s':>12}{'wall s':>10}{'cpu s':>10}{'peak MB':>10}{'vs base':>10}")
+    for stage_name, result in results.items():
+        unit = STAGES[stage_name][1]
+        change = ""
+        previous = (baseline or {}).get("stages", {}).get(stage_name)
+        if previous and previous.get("seconds_per_item"):
+            change = f"{result['seconds_per_item'] / previous['seconds_per_item'] - 1:+.0%}"
+        print(f"{stage_name:<26}{result['items']:>8}{result['items_per_second']:>12.1f}"
+              f"{result['wall_seconds']:>10.3f}{result['cpu_seconds']:>10.3f}{result['peak_rss_mb']:>10.1f}{change:>10}"
+              f"  ({unit})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the extract and integrate stages")
+    parser.add_argument('--stage', action='append', choices=sorted(STAGES), help="Stage to run (default: all)")
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiply the number of repetitions per stage")
+    parser.add_argument('--corpus', default=HTML_CORPUS_DIR, help="Directory of saved <plant>_<zone>_raw.html pages")
+    parser.add_argument('--baseline', default=BASELINE_FILE, help="Baseline file to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Store these results as the new baseline")
+    parser.add_argument('--runs', type=int, default=DEFAULT_RUNS, help="Timed runs per stage, after one warm-up run; the best is kept")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown before flagging")
+    parser.add_argument('--require-baseline', action='store_true',
+                        help="Fail when there is no baseline, instead of recording one")
+    parser.add_argument('--json', help="Also write the results to this JSON file")
+    parser.add_argument('--profile', nargs='?', const='profile/benchmark', metavar='DIR',
+                        help="Profile each stage into DIR/<stage>/ (timings are inflated; no baseline comparison)")
+    args = parser.parse_args(argv)
+
+    pages = load_html_corpus(args.corpus)
+    if not pages:
+        print(f"No saved pages found in {args.corpus}")
+        return 1
+
+    stage_names = args.stage or list(STAGES)
+    results = run_benchmarks(stage_names, pages, args.scale, args.profile, max(1, args.runs))
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+
+    print(f"Corpus: {len(pages)} saved pages from {args.corpus}")
+    print_results(results, baseline)
+
+    if args.json:
+        write_json(args.json, {"stages": results}, indent=2)
+
+    if args.profile:
+        print(f"Profiles written to {args.profile}/<stage>/")
+        return 0
+
+    # Timings only mean something against a baseline from the same machine, so none is committed;
+    # the first run on a machine records it
+    if baseline is None and args.require_baseline:
+        print(f"No baseline at {args.baseline}; record one on this machine with --save-baseline")
+        return 1
+    if args.save_baseline or baseline is None:
+        os.makedirs(os.path.dirname(args.baseline) or '.', exist_ok=True)
+        write_json(args.baseline, {"stages": results}, indent=2)
+        print(f"{'Saved' if args.save_baseline else 'No baseline yet; saved these results as'} baseline {args.baseline}")
+        return 0
+    for stage_name in results:
+        if not baseline.get("stages", {}).get(stage_name, {}).get("seconds_per_item"):
+            print(f"Not compared: {stage_name} is not in {args.baseline}")
+
+    regressions = compare_to_baseline(results, baseline, args.threshold)
+    for stage_name, previous, current, change in regressions:
+        print(f"REGRESSION: {stage_name} {previous * 1000:.2f} ms/item -> {current * 1000:.2f} ms/item ({change:+.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,394 @@
+import mmap
+import os
+import struct
+import sys
+import time
+
+from atomic_io import atomic_open
+from catalogue_io import load_plants_from_dir
+
+# Directories
+INPUT_DIR = 'garden_data_enhanced'
+OUTPUT_FILE = os.path.join(INPUT_DIR, 'catalogue.gcat')
+
+# File layout: header, string offsets, string pool, list items, plant table, zone table
+MAGIC = b'GCAT'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIIIIIIIII')
+
+# Plant record: name, scientific name, family, alternative names (start, count), first zone, zone count
+PLANT_RECORD = struct.Struct('<IIIIHIH')
+
+# Zone record: zone number, zone name, plant name, climate zone, alternative names, scientific name,
+# family, 12 calendar bytes, flags, soil temperature/spacing/harvest ranges (tenths, int16),
+# soil temperature/spacing/harvest text, then (start, count) for notes, companions, avoid and culinary lists
+ZONE_RECORD = struct.Struct('<hIIIIHII12sB6hIIIIHIHIHIH')
+CALENDAR_OFFSET = struct.calcsize('<hIIIIHII')
+
+# Calendar codes are packed into one byte per month
+MONTHS = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
+CALENDAR_BITS = {"S": 1, "T": 2, "P": 4}
+
+# Numeric ranges are stored in tenths so one decimal place survives the round trip
+MISSING = -32768
+RANGE_LIMIT = 32767
+FLAG_NUMERIC = 1
+
+NUMERIC_FIELDS = ["soil_temperature_c", "spacing_cm", "harvest_weeks"]
+
+
+class _StringPool:
+    """Deduplicated UTF-8 string pool addressed by string id"""
+
+    def __init__(self):
+        self.ids = {}
+        self.encoded = []
+
+    def add(self, text):
+        text = text or ""
+        string_id = self.ids.get(text)
+        if string_id is None:
+            string_id = len(self.encoded)
+            self.ids[text] = string_id
+            self.encoded.append(text.encode('utf-8'))
+        return string_id
+
+
+class _ListTable:
+    """Flat array of string ids holding every list field"""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.items = []
+
+    def add(self, values):
+        start = len(self.items)
+        self.items.extend(self.pool.add(value) for value in values or [])
+        return start, len(self.items) - start
+
+
+def _pack_range(value_range, label):
+    """Pack a {min, max} range into two int16 tenths; label names the field in the error"""
+    if not value_range:
+        return MISSING, MISSING
+    low, high = int(round(value_range["min"] * 10)), int(round(value_range["max"] * 10))
+    if not (-RANGE_LIMIT <= low <= RANGE_LIMIT and -RANGE_LIMIT <= high <= RANGE_LIMIT):
+        raise ValueError(f"{label} range {value_range['min']}-{value_range['max']} does not fit the catalogue "
+                         f"(at most {RANGE_LIMIT / 10} either way)")
+    return low, high
+
+
+def _unpack_range(low, high):
+    """Unpack two int16 tenths into a {min, max} range"""
+    if low == MISSING:
+        return None
+    low = low / 10
+    high = high / 10
+    return {
+        "min": int(low) if low == int(low) else low,
+        "max": int(high) if high == int(high) else high,
+    }
+
+
+def _pack_calendar(monthly_calendar):
+    """Pack a monthly calendar into 12 bitmask bytes"""
+    return bytes(
+        sum(CALENDAR_BITS.get(code, 0) for code in monthly_calendar.get(month, []))
+        for month in MONTHS
+    )
+
+
+def _unpack_calendar(calendar_bytes):
+    """Unpack 12 bitmask bytes into a monthly calendar"""
+    return {
+        month: [code for code, bit in CALENDAR_BITS.items() if calendar_bytes[i] & bit]
+        for i, month in enumerate(MONTHS)
+    }
+
+
+def export_catalogue(plants, output_file):
+    """Write a list of plants (all_*.json shape) to the binary catalogue format"""
+    pool = _StringPool()
+    lists = _ListTable(pool)
+    plant_records = []
+    zone_records = []
+
+    for plant in plants:
+        zones = plant.get('zones', [])
+        name_id = pool.add(plant.get('name', ''))
+        first_data = zones[0]['data'] if zones else {}
+        alt_start, alt_count = lists.add(first_data.get('alternative_names', []))
+        plant_records.append(PLANT_RECORD.pack(
+            name_id,
+            pool.add(first_data.get('scientific_name', '')),
+            pool.add(first_data.get('family', '')),
+            alt_start, alt_count,
+            len(zone_records), len(zones),
+        ))
+
+        for zone in zones:
+            data = zone.get('data', {})
+            growing_info = data.get('growing_info', {})
+            flags = FLAG_NUMERIC if any(field in growing_info for field in NUMERIC_FIELDS) else 0
+            ranges = []
+            for field in NUMERIC_FIELDS:
+                ranges.extend(_pack_range(growing_info.get(field), f"{plant.get('name')} / {zone.get('zone_name')}: {field}"))
+            zone_alt_start, zone_alt_count = lists.add(data.get('alternative_names', []))
+            zone_records.append(ZONE_RECORD.pack(
+                zone.get('zone_number', -1),
+                pool.add(zone.get('zone_name', '')),
+                pool.add(data.get('plant_name', '')),
+                pool.add(data.get('climate_zone', '')),
+                zone_alt_start, zone_alt_count,
+                pool.add(data.get('scientific_name', '')),
+                pool.add(data.get('family', '')),
+                _pack_calendar(data.get('monthly_calendar', {})),
+                flags,
+                *ranges,
+                pool.add(growing_info.get('soil_temperature', '')),
+                pool.add(growing_info.get('spacing', '')),
+                pool.add(growing_info.get('harvest_time', '')),
+                *lists.add(growing_info.get('additional_notes', [])),
+                *lists.add(data.get('companion_plants', [])),
+                *lists.add(data.get('avoid_plants', [])),
+                *lists.add(data.get('culinary_hints', [])),
+            ))
+
+    # String offsets has one extra entry so string i spans offsets[i]:offsets[i + 1]
+    string_offsets = [0]
+    for encoded in pool.encoded:
+        string_offsets.append(string_offsets[-1] + len(encoded))
+
+    offsets_start = HEADER.size
+    pool_start = offsets_start + 4 * len(string_offsets)
+    lists_start = pool_start + string_offsets[-1]
+    plants_start = lists_start + 4 * len(lists.items)
+    zones_start = plants_start + PLANT_RECORD.size * len(plant_records)
+
+    # Readers may have the old file memory-mapped; replace it rather than rewriting it in place
+    with atomic_open(output_file, 'wb') as f:
+        f.write(HEADER.pack(
+            MAGIC, VERSION, 0,
+            len(plant_records), len(zone_records), len(pool.encoded), len(lists.items),
+            offsets_start, pool_start, lists_start, plants_start, zones_start, 0,
+        ))
+        f.write(struct.pack(f'<{len(string_offsets)}I', *string_offsets))
+        f.write(b''.join(pool.encoded))
+        f.write(struct.pack(f'<{len(lists.items)}I', *lists.items))
+        f.write(b''.join(plant_records))
+        f.write(b''.join(zone_records))
+
+    return {
+        "plants": len(plant_records),
+        "zones": len(zone_records),
+        "strings": len(pool.encoded),
+        "bytes": os.path.getsize(output_file),
+    }
+
+
+class ZoneView:
+    """Lazy view over one zone record in a memory-mapped catalogue"""
+
+    __slots__ = ('_reader', '_offset', '_fields')
+
+    def __init__(self, reader, index):
+        self._reader = reader
+        self._offset = reader._zones_start + index * ZONE_RECORD.size
+        self._fields = ZONE_RECORD.unpack_from(reader._buffer, self._offset)
+
+    @property
+    def zone_number(self):
+        return self._fields[0]
+
+    @property
+    def zone_name(self):
+        return self._reader.string(self._fields[1])
+
+    @property
+    def calendar_bytes(self):
+        """Zero-copy view of the 12 packed calendar bytes in the memory map"""
+        start = self._offset + CALENDAR_OFFSET
+        return self._reader._buffer[start:start + len(MONTHS)]
+
+    @property
+    def monthly_calendar(self):
+        return _unpack_calendar(self._fields[8])
+
+    @property
+    def soil_temperature_c(self):
+        return _unpack_range(self._fields[10], self._fields[11])
+
+    @property
+    def spacing_cm(self):
+        return _unpack_range(self._fields[12], self._fields[13])
+
+    @property
+    def harvest_weeks(self):
+        return _unpack_range(self._fields[14], self._fields[15])
+
+    def to_dict(self):
+        """Rebuild the zone entry in the all_*.json shape"""
+        reader = self._reader
+        fields = self._fields
+        growing_info = {
+            "soil_temperature": reader.string(fields[16]),
+            "spacing": reader.string(fields[17]),
+            "harvest_time": reader.string(fields[18]),
+            "additional_notes": reader.string_list(fields[19], fields[20]),
+        }
+        if fields[9] & FLAG_NUMERIC:
+            growing_info["soil_temperature_c"] = self.soil_temperature_c
+            growing_info["spacing_cm"] = self.spacing_cm
+            growing_info["harvest_weeks"] = self.harvest_weeks
+
+        return {
+            "zone_name": reader.string(fields[1]),
+            "zone_number": fields[0],
+            "data": {
+                "plant_name": reader.string(fields[2]),
+                "alternative_names": reader.string_list(fields[4], fields[5]),
+                "scientific_name": reader.string(fields[6]),
+                "family": reader.string(fields[7]),
+                "climate_zone": reader.string(fields[3]),
+                "monthly_calendar": self.monthly_calendar,
+                "growing_info": growing_info,
+                "companion_plants": reader.string_list(fields[21], fields[22]),
+                "avoid_plants": reader.string_list(fields[23], fields[24]),
+                "culinary_hints": reader.string_list(fields[25], fields[26]),
+            },
+        }
+
+
+class PlantView:
+    """Lazy view over one plant record in a memory-mapped catalogue"""
+
+    __slots__ = ('_reader', '_fields')
+
+    def __init__(self, reader, index):
+        self._reader = reader
+        self._fields = PLANT_RECORD.unpack_from(reader._buffer, reader._plants_start + index * PLANT_RECORD.size)
+
+    @property
+    def name(self):
+        return self._reader.string(self._fields[0])
+
+    @property
+    def scientific_name(self):
+        return self._reader.string(self._fields[1])
+
+    @property
+    def family(self):
+        return self._reader.string(self._fields[2])
+
+    @property
+    def alternative_names(self):
+        return self._reader.string_list(self._fields[3], self._fields[4])
+
+    @property
+    def zones(self):
+        first_zone = self._fields[5]
+        return [ZoneView(self._reader, first_zone + i) for i in range(self._fields[6])]
+
+    def zone(self, zone_name):
+        """Return the view for a single zone, or None if the plant has no data for it"""
+        for zone in self.zones:
+            if zone.zone_name == zone_name:
+                return zone
+        return None
+
+    def to_dict(self):
+        """Rebuild the plant in the all_*.json shape"""
+        return {"name": self.name, "zones": [zone.to_dict() for zone in self.zones]}
+
+
+class CatalogueReader:
+    """Memory-mapped reader for catalogues written by export_catalogue"""
+
+    def __init__(self, file_path):
+        self._file = open(file_path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._buffer = memoryview(self._mmap)
+
+        (magic, version, _, self.plant_count, self.zone_count, self.string_count, list_count,
+         offsets_start, self._pool_start, lists_start, self._plants_start, self._zones_start, _) = HEADER.unpack_from(self._buffer)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{file_path} is not a version {VERSION} garden catalogue")
+
+        self._string_offsets = self._buffer[offsets_start:offsets_start + 4 * (self.string_count + 1)].cast('I')
+        self._list_items = self._buffer[lists_start:lists_start + 4 * list_count].cast('I')
+        self._name_index = None
+
+    def close(self):
+        """Release the memory map and the underlying file"""
+        for attr in ('_string_offsets', '_list_items', '_buffer'):
+            view = getattr(self, attr, None)
+            if view is not None:
+                view.release()
+                setattr(self, attr, None)
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.plant_count
+
+    def __iter__(self):
+        for i in range(self.plant_count):
+            yield PlantView(self, i)
+
+    def string_bytes(self, string_id):
+        """Zero-copy view of the UTF-8 bytes of a pooled string"""
+        start = self._pool_start + self._string_offsets[string_id]
+        end = self._pool_start + self._string_offsets[string_id + 1]
+        return self._buffer[start:end]
+
+    def string(self, string_id):
+        return str(self.string_bytes(string_id), 'utf-8')
+
+    def string_list(self, start, count):
+        return [self.string(string_id) for string_id in self._list_items[start:start + count]]
+
+    def plant(self, index):
+        if not 0 <= index < self.plant_count:
+            raise IndexError(index)
+        return PlantView(self, index)
+
+    def find(self, plant_name):
+        """Look up a plant by name (case-insensitive), or None if it is not in the catalogue"""
+        if self._name_index is None:
+            self._name_index = {plant.name.lower(): i for i, plant in enumerate(self)}
+        index = self._name_index.get(plant_name.lower())
+        return None if index is None else PlantView(self, index)
+
+
+def main():
+    """Export the integrated dataset to a binary catalogue and compare load times"""
+    input_dir = sys.argv[1] if len(sys.argv) > 1 else INPUT_DIR
+    output_file = sys.argv[2] if len(sys.argv) > 2 else os.path.join(input_dir, 'catalogue.gcat')
+
+    start = time.perf_counter()
+    plants = load_plants_from_dir(input_dir)
+    json_seconds = time.perf_counter() - start
+
+    stats = export_catalogue(plants, output_file)
+    print(f"Exported {stats['plants']} plants / {stats['zones']} zones ({stats['strings']} unique strings) "
+          f"to {output_file}: {stats['bytes'] / 1024:.1f} KiB")
+
+    start = time.perf_counter()
+    with CatalogueReader(output_file) as reader:
+        open_seconds = time.perf_counter() - start
+        mismatches = sum(1 for plant, view in zip(plants, reader) if view.to_dict() != plant)
+
+    print(f"JSON load: {json_seconds * 1000:.1f} ms, catalogue open: {open_seconds * 1000:.3f} ms")
+    if mismatches:
+        print(f"Warning: {mismatches} plants did not round-trip exactly")
+
+
+if __name__ == "__main__":
+    main()
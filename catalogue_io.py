@@ -0,0 +1,37 @@
+import gc
+import json
+import os
+import tracemalloc
+
+
+def plant_files(input_dir):
+    """Sorted names of the all_<plant>.json files in a directory, without the combined all_plants.json"""
+    return [
+        file_name for file_name in sorted(os.listdir(input_dir))
+        if file_name.startswith('all_') and file_name.endswith('.json') and file_name != 'all_plants.json'
+    ]
+
+
+def load_plants_from_dir(input_dir):
+    """Load every all_<plant>.json file in a directory as plain dicts, in file name order"""
+    plants = []
+    for file_name in plant_files(input_dir):
+        with open(os.path.join(input_dir, file_name), 'r') as f:
+            plants.append(json.load(f))
+    return plants
+
+
+def directory_bytes(directory, file_names):
+    """Total size on disk of the named files in a directory"""
+    return sum(os.path.getsize(os.path.join(directory, file_name)) for file_name in file_names)
+
+
+def retained_bytes(loader, *args):
+    """(result, bytes still allocated by it) for loader(*args), measured once loading has finished"""
+    gc.collect()
+    tracemalloc.start()
+    result = loader(*args)
+    gc.collect()
+    retained, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, retained
@@ -312,7 +312,7 @@ const generatePlantCalendarData = async (plant, zoneInfo) => {
   console.log("Zone info:", zoneInfo);
 
   // Try to fetch raw Gardenate data
-  const rawGardenateData = await fetchRawGardenateData(plant.name);
+  const rawGardenateData = await fetchRawGardenateData(plant.name, zoneInfo);
   console.log("Raw Gardenate data for", plant.name, ":", rawGardenateData ? "Found" : "Not found");
   
   if (rawGardenateData) {
@@ -5,14 +5,113 @@
 // Cache for Gardenate data to avoid repeated fetches
 const gardenateCache = {};
 
+// Per-zone bundles written by `python garden_pipeline.py publish` (see zone_bundles.py): one
+// file per climate zone with every plant's record for that zone, listed in index.json
+const ZONE_BUNDLE_DIR = 'zone_bundles';
+let zoneBundleIndex = null;
+const zoneBundleCache = {};
+
+/**
+ * Fetch the zone bundle index, or null if no bundles have been published
+ * @returns {Promise<Object|null>} - {zones: {zoneName: {file, ...}}}
+ */
+const fetchZoneBundleIndex = () => {
+  if (!zoneBundleIndex) {
+    const publicUrl = process.env.PUBLIC_URL || '';
+    // The index is small and changes on every publish, so it is always revalidated
+    zoneBundleIndex = fetch(`${publicUrl}/${ZONE_BUNDLE_DIR}/index.json`, { cache: 'no-cache' })
+      .then(response => (response.ok ? response.json() : null))
+      .catch(() => null);
+  }
+  return zoneBundleIndex;
+};
+
+/**
+ * Spelling-insensitive plant name key, the same as name_key() in plant_names.py:
+ * "Egg plants." -> "eggplant", "Tomatoes" -> "tomato"
+ * @param {string} name - A plant name as written anywhere
+ * @returns {string} - The key used in the index's alias table
+ */
+export const plantNameKey = (name) => name
+  .toLowerCase()
+  .split(/[^a-z0-9]+/)
+  .filter(Boolean)
+  .map(word => {
+    if (word.length > 4 && word.endsWith('ies')) return `${word.slice(0, -3)}y`;
+    if (/(oes|ches|shes|sses|xes)$/.test(word)) return word.slice(0, -2);
+    if (word.length > 3 && word.endsWith('s') && !/(ss|us|is)$/.test(word)) return word.slice(0, -1);
+    return word;
+  })
+  .join('');
+
+/**
+ * Fetch the bundle holding every plant's data for one climate zone
+ * @param {string} zoneName - Gardenate zone name, e.g. "Australia - temperate"
+ * @returns {Promise<Object|null>} - {zone_name, zone_number, plants: {plantName: {zone_number, data}}} or null
+ */
+export const fetchZoneBundle = async (zoneName) => {
+  const index = await fetchZoneBundleIndex();
+  const entry = index && index.zones && index.zones[zoneName];
+  if (!entry) return null;
+  
+  if (!zoneBundleCache[zoneName]) {
+    const publicUrl = process.env.PUBLIC_URL || '';
+    // Bundle file names contain a hash of their content, so the browser cache can keep them
+    zoneBundleCache[zoneName] = fetch(`${publicUrl}/${ZONE_BUNDLE_DIR}/${entry.file}`)
+      .then(response => (response.ok ? response.json() : null))
+      .catch(() => null);
+  }
+  const bundle = await zoneBundleCache[zoneName];
+  if (!bundle) delete zoneBundleCache[zoneName];
+  return bundle;
+};
+
+/**
+ * Look a plant up in the bundles for the user's preferred zones
+ * @param {string} plantName - The name of the plant
+ * @param {Object} zoneInfo - The user's zone information
+ * @returns {Promise<Object|null>} - Plant data in the all_<plant>.json shape, holding only the
+ *   best matching zone, or null if the bundles are unavailable or do not have the plant
+ */
+const fetchPlantFromZoneBundles = async (plantName, zoneInfo) => {
+  const index = await fetchZoneBundleIndex();
+  const alias = index && index.aliases && index.aliases[plantNameKey(plantName)];
+  const wanted = (alias || plantName).trim().toLowerCase();
+  for (const zoneName of getZonePreference(zoneInfo)) {
+    const bundle = await fetchZoneBundle(zoneName);
+    if (!bundle) continue;
+    
+    const name = Object.keys(bundle.plants).find(candidate => candidate.toLowerCase() === wanted);
+    if (name) {
+      const record = bundle.plants[name];
+      return {
+        name,
+        zones: [{ zone_name: bundle.zone_name, zone_number: record.zone_number, data: record.data }]
+      };
+    }
+  }
+  return null;
+};
+
 /**
  * Fetch raw Gardenate data for a plant
+ *
+ * With zoneInfo, the plant is looked up in the published zone bundle for the user's location
+ * first, so rendering a whole catalogue costs one download instead of one per plant with every
+ * zone in it. Otherwise, or if no bundle has the plant, the plant's own file is fetched.
+ *
  * @param {string} plantName - The name of the plant to fetch data for
+ * @param {Object} [zoneInfo] - The user's zone information
  * @returns {Promise<Object|null>} - The raw Gardenate data or null if not found
  */
-export const fetchRawGardenateData = async (plantName) => {
+export const fetchRawGardenateData = async (plantName, zoneInfo) => {
   if (!plantName) return null;
   
+  if (zoneInfo) {
+    const bundled = await fetchPlantFromZoneBundles(plantName, zoneInfo);
+    if (bundled) return bundled;
+  }
+  
   // Check cache first
   if (gardenateCache[plantName]) {
     console.log(`Using cached Gardenate data for ${plantName}`);
@@ -155,14 +254,8 @@ export const fetchRawGardenateData = async (plantName) => {
     for (const pattern of filePatterns) {
       console.log(`Trying to fetch ${pattern}`);
       try {
-        const response = await fetch(pattern, {
-          // Add cache control to prevent browser caching
-          headers: {
-            'Cache-Control': 'no-cache, no-store, must-revalidate',
-            'Pragma': 'no-cache',
-            'Expires': '0'
-          }
-        });
+        // Revalidate with the server rather than bypassing the browser cache entirely
+        const response = await fetch(pattern, { cache: 'no-cache' });
         
         if (response.ok) {
           const text = await response.text();
@@ -207,22 +300,16 @@ export const fetchRawGardenateData = async (plantName) => {
 };
 
 /**
- * Get the best matching zone data for a plant based on location
- * @param {Object} gardenateData - The raw Gardenate data
+ * Climate zones to try for a user's location, best match first
  * @param {Object} zoneInfo - The user's zone information
- * @returns {Object|null} - The best matching zone data or null if not found
+ * @returns {Array<string>} - Gardenate zone names
  */
-export const getBestMatchingZone = (gardenateData, zoneInfo) => {
-  if (!gardenateData || !gardenateData.zones || !zoneInfo) {
-    console.log("Missing data for zone matching:", { gardenateData: !!gardenateData, zones: gardenateData?.zones?.length, zoneInfo: !!zoneInfo });
-    return null;
-  }
-  
+export const getZonePreference = (zoneInfo) => {
   // Determine the best matching zone based on user's location
   let zonePreference = ['Australia - temperate', 'Australia - sub-tropical', 'Australia - cool/mountain'];
   
   // If we have location information, prioritize the appropriate region
-  if (zoneInfo.country) {
+  if (zoneInfo && zoneInfo.country) {
     const country = zoneInfo.country.toLowerCase();
     console.log("Country from zoneInfo:", country);
     
@@ -254,6 +341,23 @@ export const getBestMatchingZone = (gardenateData, zoneInfo) => {
     }
   }
   
+  return zonePreference;
+};
+
+/**
+ * Get the best matching zone data for a plant based on location
+ * @param {Object} gardenateData - The raw Gardenate data
+ * @param {Object} zoneInfo - The user's zone information
+ * @returns {Object|null} - The best matching zone data or null if not found
+ */
+export const getBestMatchingZone = (gardenateData, zoneInfo) => {
+  if (!gardenateData || !gardenateData.zones || !zoneInfo) {
+    console.log("Missing data for zone matching:", { gardenateData: !!gardenateData, zones: gardenateData?.zones?.length, zoneInfo: !!zoneInfo });
+    return null;
+  }
+  
+  const zonePreference = getZonePreference(zoneInfo);
+  
   console.log("Zone preference:", zonePreference);
   console.log("Available zones:", gardenateData.zones.map(zone => zone.zone_name));
   
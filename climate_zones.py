@@ -0,0 +1,93 @@
+import re
+
+# Gardenate's zone codes, as listed in the zone selector on every plant page.
+# An unknown code does not fail: the site silently serves its default zone instead.
+ZONES = {
+    "Australia - arid": 17,
+    "Australia - cool/mountain": 1,
+    "Australia - sub-tropical": 3,
+    "Australia - temperate": 2,
+    "Australia - tropical": 4,
+    "Canada - Zone 2a Sub-Arctic": 61,
+    "Canada - Zone 2b Sub-Arctic": 62,
+    "Canada - Zone 3a Temperate Short Summer": 60,
+    "Canada - Zone 3b Temperate Warm Summer": 59,
+    "Canada - zone 4a Temperate Warm Summer": 58,
+    "Canada - Zone 4b Temperate Warm Summer": 57,
+    "Canada - Zone 5a Temperate Warm Summer": 56,
+    "Canada - Zone 5b Temperate Warm Summer": 55,
+    "Canada - Zone 6a Temperate Warm Summer": 54,
+    "Canada - Zone 6b Temperate Warm Summer": 53,
+    "Canada - Zone 7a Mild Temperate": 52,
+    "Canada - Zone 7b Mild Temperate": 51,
+    "Canada - Zone 8a Mild Temperate": 50,
+    "New Zealand - cool/mountain": 6,
+    "New Zealand - sub-tropical": 7,
+    "New Zealand - temperate": 5,
+    "South Africa - Dry summer sub-tropical": 23,
+    "South Africa - Humid sub-tropical": 20,
+    "South Africa - Semi-arid": 21,
+    "South Africa - Summer rainfall": 22,
+    "United Kingdom - cool/temperate": 8,
+    "United Kingdom - warm/temperate": 9,
+    "USA - Zone 2a": 107,
+    "USA - Zone 2b": 108,
+    "USA - Zone 3a": 109,
+    "USA - Zone 3b": 110,
+    "USA - Zone 4a": 111,
+    "USA - Zone 4b": 112,
+    "USA - Zone 5a": 11,
+    "USA - Zone 5b": 14,
+    "USA - Zone 6a": 16,
+    "USA - Zone 6b": 113,
+    "USA - Zone 7a": 10,
+    "USA - Zone 7b": 114,
+    "USA - Zone 8a": 13,
+    "USA - Zone 8b": 12,
+    "USA - Zone 9a": 115,
+    "USA - Zone 9b": 116,
+    "USA - Zone 10a": 15,
+    "USA - Zone 10b": 100,
+    "USA - Zone 11a": 101,
+    "USA - Zone 11b": 102,
+    "USA - Zone 12a": 103,
+    "USA - Zone 12b": 104,
+    "USA - Zone 13a": 105,
+    "USA - Zone 13b": 106,
+}
+
+ZONE_NAMES = {code: name for name, code in ZONES.items()}
+
+# The Australian, New Zealand and UK zones covered by the garden_data extraction
+CORE_ZONES = {name: code for name, code in ZONES.items() if not name.startswith(("Canada", "South Africa", "USA"))}
+
+# "(Best months for growing Celery in <i>Australia - arid</i> regions)" above the calendar
+PAGE_ZONE_PATTERN = re.compile(r'Best months for growing .*? in\s+(?:<i>)?\s*(.*?)\s*(?:</i>)?\s+regions')
+SELECTED_ZONE_PATTERN = re.compile(r'<option value="(\d+)"\s*selected')
+
+
+def select_zones(names):
+    """Return {name: code} for the given zone names, failing on names the registry does not know"""
+    unknown = [name for name in names if name not in ZONES]
+    if unknown:
+        raise KeyError(f"Unknown climate zones: {', '.join(unknown)}")
+    return {name: ZONES[name] for name in names}
+
+
+def page_zone(html_content):
+    """Return the zone name a plant page was rendered for, or None if the page does not say"""
+    match = PAGE_ZONE_PATTERN.search(html_content)
+    if match:
+        return match.group(1)
+
+    # Fall back to the zone selected in the page's zone picker
+    match = SELECTED_ZONE_PATTERN.search(html_content)
+    if match:
+        return ZONE_NAMES.get(int(match.group(1)))
+    return None
+
+
+def check_page_zone(html_content, zone_code):
+    """Return (matches, page zone name) for a page fetched with ?zone=<zone_code>"""
+    found = page_zone(html_content)
+    return found is not None and found == ZONE_NAMES.get(zone_code), found
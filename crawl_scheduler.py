@@ -0,0 +1,152 @@
+import heapq
+import json
+import math
+import os
+import sys
+import time
+
+from atomic_io import write_json
+from climate_zones import CORE_ZONES, ZONES
+from crawl_state import CRAWL_STATE_DIR
+from plant_discovery import catalogue_plant_names
+
+SCHEDULE_VERSION = 1
+DAY = 86400
+
+# Prior belief about a page before it has any history: about one change a month.
+# Each observed change (or stretch without one) moves the estimate away from this.
+PRIOR_CHANGES = 1.0
+PRIOR_DAYS = 30.0
+
+# A page that has never fetched successfully (a 404, or a page rejected by zone validation) is
+# retried with exponential backoff: its priority climbs back towards 1 over RETRY_DAYS after the
+# first failure, twice that after the second, and so on up to MAX_RETRY_DAYS
+RETRY_DAYS = 1.0
+MAX_RETRY_DAYS = 60.0
+
+
+def schedule_file(consumer):
+    return os.path.join(CRAWL_STATE_DIR, f'schedule_{consumer}.json')
+
+
+class CrawlScheduler:
+    """Per-(plant, zone) fetch history and a change-probability ordering for budgeted refreshes.
+
+    Each page's changes are modelled as a Poisson process whose rate is estimated from the
+    content fingerprints seen on earlier fetches; the chance a page has changed since it was
+    last fetched is 1 - exp(-rate * age). A refresh with a budget fetches the pages with the
+    highest chance first, so the expected number of stale pages drops as fast as possible.
+    """
+
+    def __init__(self, pages=None):
+        self.pages = pages or {}
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r') as f:
+            state = json.load(f)
+        if state.get("version") != SCHEDULE_VERSION:
+            return cls()
+        return cls(state["pages"])
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        write_json(path, {"version": SCHEDULE_VERSION, "pages": self.pages}, indent=2, sort_keys=True)
+
+    def entry(self, plant, zone_name):
+        return self.pages.get(plant, {}).get(zone_name)
+
+    def record(self, plant, zone_name, fingerprint, now=None):
+        """Record a fetch; a None fingerprint is a failed fetch, which resets the page's age and
+        counts towards the retry backoff of a page that has never fetched successfully"""
+        now = int(now if now is not None else time.time())
+        entry = self.pages.setdefault(plant, {}).setdefault(zone_name, {
+            "first_fetched": now, "fetched": now, "changed": None, "fingerprint": None, "fetches": 0, "changes": 0,
+            "failures": 0,
+        })
+        entry["fetched"] = now
+        if fingerprint is None:
+            entry["failures"] = entry.get("failures", 0) + 1
+            return
+        entry["failures"] = 0
+        entry["fetches"] += 1
+        if entry["fingerprint"] is not None and entry["fingerprint"] != fingerprint:
+            entry["changes"] += 1
+            entry["changed"] = now
+        entry["fingerprint"] = fingerprint
+
+    def change_rate(self, entry):
+        """Estimated changes per day"""
+        observed_days = max(0, entry["fetched"] - entry["first_fetched"]) / DAY
+        return (entry["changes"] + PRIOR_CHANGES) / (observed_days + PRIOR_DAYS)
+
+    def retry_days(self, entry):
+        """Backoff before a page that has never fetched successfully is worth retrying again"""
+        return min(MAX_RETRY_DAYS, RETRY_DAYS * 2 ** (max(1, entry.get("failures", 1)) - 1))
+
+    def change_probability(self, plant, zone_name, now=None):
+        """Probability that the page has changed since it was last fetched (1.0 if never attempted).
+
+        A page that has only ever failed scores by its retry backoff instead, so it drops below the
+        healthy pages after each failure and comes back as the backoff runs out.
+        """
+        entry = self.entry(plant, zone_name)
+        if entry is None:
+            return 1.0
+        now = now if now is not None else time.time()
+        age_days = max(0.0, now - entry["fetched"]) / DAY
+        if entry["fingerprint"] is None:
+            return 1.0 - math.exp(-age_days / self.retry_days(entry))
+        return 1.0 - math.exp(-self.change_rate(entry) * age_days)
+
+    def plan(self, pages, budget, now=None):
+        """Return the budget pages, as (plant, zone name), most likely to have changed first"""
+        now = now if now is not None else time.time()
+        scored = (
+            (self.change_probability(plant, zone_name, now), -(self.entry(plant, zone_name) or {}).get("fetched", 0), plant, zone_name)
+            for plant, zone_name in pages
+        )
+        return [(plant, zone_name) for _, _, plant, zone_name in heapq.nlargest(budget, scored)]
+
+    def expected_stale(self, pages, now=None):
+        """Expected number of pages that have changed since they were fetched"""
+        now = now if now is not None else time.time()
+        return sum(self.change_probability(plant, zone_name, now) for plant, zone_name in pages)
+
+
+def group_by_plant(planned, zones):
+    """Turn a plan into {plant: {zone name: code}}, keeping the registry's zone order"""
+    grouped = {}
+    for plant, zone_name in planned:
+        grouped.setdefault(plant, set()).add(zone_name)
+    return {plant: {name: code for name, code in zones.items() if name in names} for plant, names in grouped.items()}
+
+
+def budget_from_argv(argv=None):
+    """Return N if --budget=N was passed, else None"""
+    for arg in (sys.argv[1:] if argv is None else argv):
+        if arg.startswith('--budget='):
+            return int(arg.split('=', 1)[1])
+    return None
+
+
+def print_plan(consumer, budget, top=10):
+    """Show how much a refresh with this budget would reduce the expected number of stale pages"""
+    scheduler = CrawlScheduler.load(schedule_file(consumer))
+    zones = CORE_ZONES if consumer == 'extract_complete' else ZONES
+    pages = [(plant, zone_name) for plant in catalogue_plant_names() for zone_name in zones]
+    planned = scheduler.plan(pages, budget)
+
+    before = scheduler.expected_stale(pages)
+    after = before - scheduler.expected_stale(planned)
+    print(f"{consumer}: {len(pages)} pages, expected stale now {before:.1f}; "
+          f"refreshing the top {len(planned)} leaves {after:.1f}")
+    for plant, zone_name in planned[:top]:
+        print(f"  {scheduler.change_probability(plant, zone_name):.3f}  {plant} / {zone_name}")
+
+
+if __name__ == "__main__":
+    consumer = next((arg for arg in sys.argv[1:] if not arg.startswith('--')), 'scrape_gardenate_details')
+    print_plan(consumer, budget_from_argv() or 500)
@@ -0,0 +1,2 @@
+# Bookkeeping the crawlers and renderers keep between runs (schedules, zone classes, caches)
+CRAWL_STATE_DIR = 'crawl_state'
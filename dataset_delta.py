@@ -0,0 +1,226 @@
+import hashlib
+import json
+import os
+import sys
+
+from atomic_io import DirectorySyncBatch, write_json
+from catalogue_io import load_plants_from_dir
+
+PATCH_VERSION = 1
+
+
+def _integral_floats_as_ints(value):
+    """20.0 -> 20, as JavaScript reads and writes it, so server/utils/gardenateDelta.js hashes alike"""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {key: _integral_floats_as_ints(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_integral_floats_as_ints(item) for item in value]
+    return value
+
+
+def plant_hash(plant):
+    """Return a content hash of a plant, independent of key order"""
+    canonical = json.dumps(_integral_floats_as_ints(plant), sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def load_snapshot(data_dir):
+    """Load every all_<plant>.json file in a dataset snapshot, keyed by plant name"""
+    return {plant['name']: plant for plant in load_plants_from_dir(data_dir)}
+
+
+def _is_branch(value):
+    return isinstance(value, dict) and bool(value)
+
+
+def _set_field(target, path, value):
+    keys = path.split('.')
+    for key in keys[:-1]:
+        if not isinstance(target.get(key), dict):
+            target[key] = {}
+        target = target[key]
+    target[keys[-1]] = value
+
+
+def _unset_field(target, path):
+    keys = path.split('.')
+    for key in keys[:-1]:
+        target = target.get(key)
+        if not isinstance(target, dict):
+            return
+    target.pop(keys[-1], None)
+
+
+def _diff_fields(old, new, prefix, set_fields, unset_fields):
+    for key, new_value in new.items():
+        path = f"{prefix}.{key}" if prefix else key
+        old_value = old.get(key, ...)
+        if _is_branch(old_value) and _is_branch(new_value):
+            _diff_fields(old_value, new_value, path, set_fields, unset_fields)
+        elif old_value != new_value:
+            # A new field, a changed leaf, or a path that switched between a leaf and a dict
+            # (e.g. None -> {"min", "max"}) is set as one whole value
+            set_fields[path] = new_value
+    for key in old:
+        if key not in new:
+            unset_fields.append(f"{prefix}.{key}" if prefix else key)
+
+
+def diff_zone(old_zone, new_zone):
+    """Return the field-level changes between two versions of a zone, or None if identical.
+
+    Changed leaves are set by their dotted path; a field that is new, or that changes between a
+    leaf and a dict, is set whole. Unsets are applied before sets.
+    """
+    set_fields = {}
+    unset_fields = []
+    _diff_fields(old_zone, new_zone, '', set_fields, unset_fields)
+
+    changes = {}
+    if set_fields:
+        changes["set"] = set_fields
+    if unset_fields:
+        changes["unset"] = unset_fields
+    return changes or None
+
+
+def diff_plant(old_plant, new_plant):
+    """Return the per-zone changes between two versions of a plant, or None if identical"""
+    old_zones = {zone['zone_name']: zone for zone in old_plant.get('zones', [])}
+    new_zones = {zone['zone_name']: zone for zone in new_plant.get('zones', [])}
+    zone_changes = {}
+
+    for zone_name, new_zone in new_zones.items():
+        old_zone = old_zones.get(zone_name)
+        if old_zone is None:
+            zone_changes[zone_name] = {"op": "add", "value": new_zone}
+        else:
+            changes = diff_zone(old_zone, new_zone)
+            if changes:
+                zone_changes[zone_name] = {"op": "update", **changes}
+
+    for zone_name in old_zones:
+        if zone_name not in new_zones:
+            zone_changes[zone_name] = {"op": "remove"}
+
+    zone_order = list(new_zones)
+    order_changed = [name for name in old_zones if name in new_zones] != [name for name in zone_order if name in old_zones]
+    if not zone_changes and not order_changed:
+        return None
+
+    plant_changes = {"op": "update", "zones": zone_changes}
+    if order_changed or any(change["op"] == "add" for change in zone_changes.values()):
+        plant_changes["zone_order"] = zone_order
+    return plant_changes
+
+
+def diff_snapshots(old_plants, new_plants):
+    """Build a patch that turns one snapshot ({name: plant}) into another"""
+    patch_plants = {}
+
+    for name, new_plant in new_plants.items():
+        old_plant = old_plants.get(name)
+        if old_plant is None:
+            patch_plants[name] = {"op": "add", "value": new_plant}
+            continue
+        changes = diff_plant(old_plant, new_plant)
+        if changes:
+            changes["base_hash"] = plant_hash(old_plant)
+            changes["target_hash"] = plant_hash(new_plant)
+            patch_plants[name] = changes
+
+    for name in old_plants:
+        if name not in new_plants:
+            patch_plants[name] = {"op": "remove"}
+
+    return {"version": PATCH_VERSION, "plants": patch_plants}
+
+
+def apply_plant_patch(plant, changes):
+    """Apply the per-zone changes for one plant in place"""
+    zones = {zone['zone_name']: zone for zone in plant.get('zones', [])}
+
+    for zone_name, change in changes.get("zones", {}).items():
+        if change["op"] == "add":
+            zones[zone_name] = change["value"]
+        elif change["op"] == "remove":
+            zones.pop(zone_name, None)
+        else:
+            zone = zones[zone_name]
+            for path in change.get("unset", []):
+                _unset_field(zone, path)
+            for path, value in change.get("set", {}).items():
+                _set_field(zone, path, value)
+
+    zone_order = changes.get("zone_order") or [zone['zone_name'] for zone in plant.get('zones', []) if zone['zone_name'] in zones]
+    plant['zones'] = [zones[zone_name] for zone_name in zone_order if zone_name in zones]
+    return plant
+
+
+def apply_patch(plants, patch, verify=True):
+    """Apply a patch to a snapshot ({name: plant}) in place and return the names that changed"""
+    if patch.get("version") != PATCH_VERSION:
+        raise ValueError(f"Unsupported patch version: {patch.get('version')}")
+
+    changed = []
+    for name, changes in patch["plants"].items():
+        if changes["op"] == "add":
+            plants[name] = changes["value"]
+        elif changes["op"] == "remove":
+            plants.pop(name, None)
+        else:
+            plant = plants.get(name)
+            if plant is None:
+                raise ValueError(f"Patch updates {name}, which is not in the snapshot")
+            if verify and plant_hash(plant) != changes["base_hash"]:
+                raise ValueError(f"Patch for {name} was made against a different version of the plant")
+            apply_plant_patch(plant, changes)
+            if verify and plant_hash(plant) != changes["target_hash"]:
+                raise ValueError(f"Applying the patch for {name} did not produce the expected result")
+        changed.append(name)
+    return changed
+
+
+def write_snapshot_files(plants, data_dir, names):
+    """Rewrite the all_<plant>.json files for the given plant names"""
+    os.makedirs(data_dir, exist_ok=True)
+    with DirectorySyncBatch() as batch:
+        for name in names:
+            file_path = os.path.join(data_dir, f"all_{name.replace('/', '-')}.json")
+            if name in plants:
+                write_json(file_path, plants[name], batch=batch, indent=2)
+            elif os.path.exists(file_path):
+                os.remove(file_path)
+                batch.add(data_dir)
+
+
+def main():
+    """Create a patch between two snapshots, or apply one to a snapshot directory"""
+    if len(sys.argv) >= 5 and sys.argv[1] == 'diff':
+        _, _, old_dir, new_dir, patch_file = sys.argv[:5]
+        old_plants = load_snapshot(old_dir)
+        new_plants = load_snapshot(new_dir)
+        patch = diff_snapshots(old_plants, new_plants)
+        write_json(patch_file, patch, separators=(',', ':'), ensure_ascii=False)
+        zone_count = sum(len(changes.get("zones", {})) for changes in patch["plants"].values())
+        print(f"{len(patch['plants'])} plants / {zone_count} zones changed; "
+              f"patch is {os.path.getsize(patch_file) / 1024:.1f} KiB")
+    elif len(sys.argv) >= 4 and sys.argv[1] == 'apply':
+        _, _, data_dir, patch_file = sys.argv[:4]
+        output_dir = sys.argv[4] if len(sys.argv) > 4 else data_dir
+        with open(patch_file, 'r') as f:
+            patch = json.load(f)
+        plants = load_snapshot(data_dir)
+        changed = apply_patch(plants, patch)
+        write_snapshot_files(plants, output_dir, changed if output_dir == data_dir else list(plants))
+        print(f"Applied patch to {len(changed)} plants in {output_dir}")
+    else:
+        print("Usage: python dataset_delta.py diff <old_dir> <new_dir> <patch.json>")
+        print("       python dataset_delta.py apply <data_dir> <patch.json> [output_dir]")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
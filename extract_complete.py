@@ -4,294 +4,329 @@ import json
 import time
 import re
 import os
-from urllib.parse import quote_plus
+import sys
+from atomic_io import atomic_open, write_json
+from climate_zones import CORE_ZONES, ZONE_NAMES, check_page_zone, page_zone
+from crawl_scheduler import CrawlScheduler, budget_from_argv, group_by_plant, schedule_file
+from crawl_state import CRAWL_STATE_DIR
+from plant_discovery import catalogue_plant_names, changed_plants, mark_crawled, plant_slug, removed_plants
+from plant_model import Plant, ZoneProfile
+from pipeline_metrics import METRICS, Progress
+from pipeline_profiler import profile_from_argv
+from zone_dedup import ZoneClasses, data_fingerprint, relabel_zone
 
-# Create directory for data
-os.makedirs('garden_data', exist_ok=True)
+# Site to scrape and delay between requests; point these at replay_server.py for local load tests
+BASE_URL = os.environ.get('GARDENATE_BASE_URL', 'https://www.gardenate.com').rstrip('/')
+REQUEST_DELAY = float(os.environ.get('GARDENATE_REQUEST_DELAY', '1'))
 
-# List of all plants from the website
-plants = [
-    "Amaranth", "Angelica", "Artichokes (Globe)", "Asparagus", "Asparagus Pea",
-    "Basil", "Beans - climbing", "Beans - dwarf", "Beetroot", "Borage", "Broad Beans",
-    "Broccoli", "Brussels sprouts", "Burdock", "Cabbage", "Cape Gooseberry", "Capsicum",
-    "Cardoon", "Carrot", "Cauliflower", "Celeriac", "Celery", "Chicory", "Chilli peppers",
-    "Chinese cabbage", "Chives", "Choko/Chayote", "Collards", "Coriander", "Corn Salad",
-    "Cowpeas", "Cucumber", "Daikon", "Dill", "Eggplant", "Endive", "Fennel", "Florence Fennel",
-    "French tarragon", "Garlic", "Ginger", "Horseradish", "Jerusalem Artichokes", "Kale",
-    "Kohlrabi", "Leeks", "Lemon Balm", "Lettuce", "Luffa", "Marrow", "Mint", "Mizuna",
-    "Mustard greens", "NZ Spinach", "Okra", "Onion", "Oregano", "Pak Choy", "Parsley",
-    "Parsnip", "Peas", "Potato", "Pumpkin", "Radish", "Rhubarb", "Rocket", "Rockmelon",
-    "Rosella", "Rosemary", "Rutabaga", "Sage", "Salsify", "Savory - summer savory",
-    "Savory - winter savory", "Shallots", "Silverbeet", "Snow Peas", "Spinach", "Spring onions",
-    "Squash", "Strawberries (from seeds)", "Strawberry Plants", "Sunflower", "Sweet corn",
-    "Sweet Marjoram", "Sweet Potato", "Taro", "Thyme", "Tomatillo", "Tomato", "Turnip",
-    "Watermelon", "Yacon", "Yam/Oca", "Zucchini"
-]
+# Climate zones with their Gardenate zone codes
+climate_zones = CORE_ZONES
 
-# Climate zones with their zone numbers
-climate_zones = {
-    "Australia - arid": 0,
-    "Australia - cool/mountain": 1,
-    "Australia - sub-tropical": 2,
-    "Australia - temperate": 3,
-    "Australia - tropical": 4,
-    "New Zealand - cool/mountain": 5,
-    "New Zealand - sub-tropical": 6,
-    "New Zealand - temperate": 7,
-    "United Kingdom - cool/temperate": 8,
-    "United Kingdom - warm/temperate": 9,
-}
+# Zones of a plant that returned identical pages on earlier runs
+ZONE_CLASSES_FILE = os.path.join(CRAWL_STATE_DIR, 'extract_zone_classes.json')
+SCHEDULE_FILE = schedule_file('extract_complete')
 
 # Function to extract data from a plant page
 def extract_plant_data(plant_name, zone_number):
     # Format plant name for URL
-    formatted_plant_name = quote_plus(plant_name)
-    url = f"https://www.gardenate.com/plant/{formatted_plant_name}?zone={zone_number}"
-    
-    print(f"Extracting data for {plant_name} in zone {zone_number}...")
+    formatted_plant_name = plant_slug(plant_name)
+    url = f"{BASE_URL}/plant/{formatted_plant_name}?zone={zone_number}"
     
     try:
-        response = requests.get(url)
+        with METRICS.time_stage('fetch'):
+            response = requests.get(url)
+        METRICS.bytes_in.inc(len(response.content), stage='fetch')
         if response.status_code != 200:
             print(f"Failed to retrieve data for {plant_name} in zone {zone_number}")
             return None
         
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Extract climate zone
-        zone_text = soup.select_one('table caption')
-        climate_zone = ""
-        if zone_text:
-            zone_text = zone_text.text.strip()
-            climate_match = re.search(r'in _(.*?)_ regions', zone_text)
-            if climate_match:
-                climate_zone = climate_match.group(1)
-            else:
-                # Try another pattern
-                climate_match = re.search(r'Best months for growing .* in (.*?) regions', zone_text)
-                if climate_match:
-                    climate_zone = climate_match.group(1)
-                else:
-                    # Try to get it from the zone_number
-                    for name, number in climate_zones.items():
-                        if number == zone_number:
-                            climate_zone = name
-                            break
-                    if not climate_zone:
-                        climate_zone = "Unknown"
-        else:
-            # Try to get it from the zone_number
-            for name, number in climate_zones.items():
-                if number == zone_number:
-                    climate_zone = name
-                    break
-            if not climate_zone:
-                climate_zone = "Unknown"
+        # Gardenate serves its default zone for unknown codes, so reject pages for any other zone
+        matches, found_zone = check_page_zone(response.text, zone_number)
+        if not matches:
+            print(f"Rejected {plant_name} in zone {zone_number}: page is for {found_zone or 'an unknown zone'}")
+            METRICS.items.inc(stage='validate', outcome='zone_mismatch')
+            return None
         
-        # Extract plant name and scientific name
-        plant_header = soup.select_one('h1')
-        if plant_header:
-            display_name = plant_header.text.strip().replace("Growing ", "")
+        with METRICS.time_stage('parse'):
+            return parse_plant_page(response.text, plant_name, zone_number)
+    
+    except Exception as e:
+        print(f"Error extracting data for {plant_name} in zone {zone_number}: {str(e)}")
+        return None
+
+# Function to extract data from the HTML of a plant page
+def parse_plant_page(html_content, plant_name, zone_number):
+    soup = BeautifulSoup(html_content, 'html.parser')
+    
+    # Extract climate zone from the note under the calendar, falling back to the requested zone
+    climate_zone = page_zone(html_content) or ZONE_NAMES.get(zone_number, "Unknown")
+    
+    # Extract plant name and scientific name
+    plant_header = soup.select_one('h1')
+    if plant_header:
+        display_name = plant_header.text.strip().replace("Growing ", "")
+    else:
+        display_name = plant_name
+    
+    # Use the original plant name if we couldn't extract it properly
+    if display_name == "Gardenate":
+        display_name = plant_name
+    
+    scientific_name_elem = soup.select_one('h4')
+    scientific_name = "Unknown"
+    family = "Unknown"
+    if scientific_name_elem:
+        scientific_info = scientific_name_elem.text.strip()
+        parts = scientific_info.split(':')
+        if len(parts) >= 2:
+            scientific_name = parts[0].strip()
+            family = parts[1].strip()
         else:
-            display_name = plant_name
-        
-        # Use the original plant name if we couldn't extract it properly
-        if display_name == "Gardenate":
-            display_name = plant_name
-        
-        scientific_name_elem = soup.select_one('h4')
-        scientific_name = "Unknown"
-        family = "Unknown"
-        if scientific_name_elem:
-            scientific_info = scientific_name_elem.text.strip()
-            parts = scientific_info.split(':')
-            if len(parts) >= 2:
-                scientific_name = parts[0].strip()
-                family = parts[1].strip()
-            else:
-                scientific_name = scientific_info
-        
-        # Extract monthly planting calendar
-        monthly_calendar = {
-            "jan": [], "feb": [], "mar": [], "apr": [], "may": [], "jun": [],
-            "jul": [], "aug": [], "sep": [], "oct": [], "nov": [], "dec": []
-        }
-        
-        # Find the table with the planting calendar
-        calendar_table = soup.select_one('table')
-        if calendar_table:
-            rows = calendar_table.select('tr')
-            if len(rows) >= 2:  # Header row + data rows
-                months = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
-                
-                for i in range(1, len(rows)):  # Skip header row
-                    cells = rows[i].select('td')
-                    planting_type = ""
-                    
-                    # Determine planting type based on the legend below the table
-                    if i == 1:
-                        planting_type = "S"  # Seed trays
-                    elif i == 2:
-                        planting_type = "T"  # Transplant
-                    elif i == 3:
-                        planting_type = "P"  # Direct sow
-                    
-                    for j, cell in enumerate(cells):
-                        if j < len(months) and cell.text.strip():
-                            monthly_calendar[months[j]].append(planting_type)
-        
-        # Extract growing information
-        growing_info = {
-            "soil_temperature": "",
-            "spacing": "",
-            "harvest_time": "",
-            "additional_notes": []
-        }
-        
-        # Look for growing information in paragraphs
-        paragraphs = soup.select('p')
-        for p in paragraphs:
-            text = p.text.strip()
-            
-            # Soil temperature
-            if "soil temperatures between" in text.lower():
-                temp_match = re.search(r'between (\d+°C and \d+°C)', text)
-                if temp_match:
-                    growing_info["soil_temperature"] = temp_match.group(1)
-            
-            # Spacing
-            if "space plants:" in text.lower():
-                spacing_match = re.search(r'Space plants: (.*?)$', text, re.IGNORECASE)
-                if spacing_match:
-                    growing_info["spacing"] = spacing_match.group(1).strip()
-            
-            # Harvest time
-            if "harvest in" in text.lower():
-                harvest_match = re.search(r'Harvest in (.*?)\.', text, re.IGNORECASE)
-                if harvest_match:
-                    growing_info["harvest_time"] = harvest_match.group(1).strip()
+            scientific_name = scientific_info
+    
+    # Extract monthly planting calendar
+    monthly_calendar = {
+        "jan": [], "feb": [], "mar": [], "apr": [], "may": [], "jun": [],
+        "jul": [], "aug": [], "sep": [], "oct": [], "nov": [], "dec": []
+    }
+    
+    # Find the table with the planting calendar
+    calendar_table = soup.select_one('table')
+    if calendar_table:
+        rows = calendar_table.select('tr')
+        if len(rows) >= 2:  # Header row + data rows
+            months = ["jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec"]
             
-            # Additional notes - collect any other useful information
-            if (text and len(text) > 10 and 
-                not text.startswith("Compatible with") and 
-                not text.startswith("Avoid growing") and
-                not "Your name" in text and
-                not "Email address" in text and
-                not "Please provide your email" in text and
-                not "Post your question" in text and
-                not "All comments are reviewed" in text and
-                not "Your donation will help" in text and
-                not "Put Gardenate in your pocket" in text and
-                not "Join 60,000+ gardeners" in text and
-                not "Home |" in text and
-                not "This planting guide is a general reference" in text):
+            for i in range(1, len(rows)):  # Skip header row
+                cells = rows[i].select('td')
+                planting_type = ""
                 
-                # Skip the legend for the planting calendar
-                if not (text.startswith("S = Plant undercover") or 
-                        text.startswith("T = Plant out") or 
-                        text.startswith("P = Sow seed")):
-                    growing_info["additional_notes"].append(text)
+                # Determine planting type based on the legend below the table
+                if i == 1:
+                    planting_type = "S"  # Seed trays
+                elif i == 2:
+                    planting_type = "T"  # Transplant
+                elif i == 3:
+                    planting_type = "P"  # Direct sow
+                
+                for j, cell in enumerate(cells):
+                    if j < len(months) and cell.text.strip():
+                        monthly_calendar[months[j]].append(planting_type)
+    
+    # Extract growing information
+    growing_info = {
+        "soil_temperature": "",
+        "spacing": "",
+        "harvest_time": "",
+        "additional_notes": []
+    }
+    
+    # Look for growing information in paragraphs
+    paragraphs = soup.select('p')
+    for p in paragraphs:
+        text = p.text.strip()
         
-        # Extract companion plants and plants to avoid
-        companion_plants = []
-        avoid_plants = []
+        # Soil temperature
+        if "soil temperatures between" in text.lower():
+            temp_match = re.search(r'between (\d+°C and \d+°C)', text)
+            if temp_match:
+                growing_info["soil_temperature"] = temp_match.group(1)
         
-        for p in paragraphs:
-            text = p.text.strip()
-            
-            if "Compatible with" in text:
-                companions = text.replace("Compatible with (can grow beside):", "").strip()
-                if companions:
-                    companion_plants = [c.strip() for c in companions.split(',') if c.strip()]
-            
-            if "Avoid growing" in text:
-                avoids = text.replace("Avoid growing close to:", "").strip()
-                if avoids:
-                    avoid_plants = [a.strip() for a in avoids.split(',') if a.strip()]
+        # Spacing
+        if "space plants:" in text.lower():
+            spacing_match = re.search(r'Space plants: (.*?)$', text, re.IGNORECASE)
+            if spacing_match:
+                growing_info["spacing"] = spacing_match.group(1).strip()
         
-        # Extract culinary hints
-        culinary_hints = []
-        culinary_section = soup.find(lambda tag: tag.name == 'h3' and 'Culinary hints' in tag.text)
-        if culinary_section:
-            next_elem = culinary_section.find_next('p')
-            while next_elem and next_elem.name == 'p':
-                hint_text = next_elem.text.strip()
-                if hint_text and len(hint_text) > 5:
-                    culinary_hints.append(hint_text)
-                next_elem = next_elem.find_next_sibling()
-                if next_elem and next_elem.name != 'p':
-                    break
+        # Harvest time
+        if "harvest in" in text.lower():
+            harvest_match = re.search(r'Harvest in (.*?)\.', text, re.IGNORECASE)
+            if harvest_match:
+                growing_info["harvest_time"] = harvest_match.group(1).strip()
         
-        # Extract alternative names
-        alternative_names = []
-        if "also" in display_name:
-            main_name, alt_names = display_name.split("also", 1)
-            display_name = main_name.strip()
-            # Clean up alternative names
-            alt_names = alt_names.strip()
-            if alt_names.startswith("("):
-                alt_names = alt_names[1:]
-            if alt_names.endswith(")"):
-                alt_names = alt_names[:-1]
-            alternative_names = [name.strip() for name in alt_names.split(',') if name.strip()]
+        # Additional notes - collect any other useful information
+        if (text and len(text) > 10 and 
+            not text.startswith("Compatible with") and 
+            not text.startswith("Avoid growing") and
+            not "Your name" in text and
+            not "Email address" in text and
+            not "Please provide your email" in text and
+            not "Post your question" in text and
+            not "All comments are reviewed" in text and
+            not "Your donation will help" in text and
+            not "Put Gardenate in your pocket" in text and
+            not "Join 60,000+ gardeners" in text and
+            not "Home |" in text and
+            not "This planting guide is a general reference" in text):
+            
+            # Skip the legend for the planting calendar
+            if not (text.startswith("S = Plant undercover") or 
+                    text.startswith("T = Plant out") or 
+                    text.startswith("P = Sow seed")):
+                growing_info["additional_notes"].append(text)
+    
+    # Extract companion plants and plants to avoid
+    companion_plants = []
+    avoid_plants = []
+    
+    for p in paragraphs:
+        text = p.text.strip()
         
-        # Compile all data
-        plant_data = {
-            "plant_name": display_name,
-            "alternative_names": alternative_names,
-            "scientific_name": scientific_name,
-            "family": family,
-            "climate_zone": climate_zone,
-            "monthly_calendar": monthly_calendar,
-            "growing_info": growing_info,
-            "companion_plants": companion_plants,
-            "avoid_plants": avoid_plants,
-            "culinary_hints": culinary_hints
-        }
+        if "Compatible with" in text:
+            companions = text.replace("Compatible with (can grow beside):", "").strip()
+            if companions:
+                companion_plants = [c.strip() for c in companions.split(',') if c.strip()]
         
-        return plant_data
+        if "Avoid growing" in text:
+            avoids = text.replace("Avoid growing close to:", "").strip()
+            if avoids:
+                avoid_plants = [a.strip() for a in avoids.split(',') if a.strip()]
     
-    except Exception as e:
-        print(f"Error extracting data for {plant_name} in zone {zone_number}: {str(e)}")
-        return None
+    # Extract culinary hints
+    culinary_hints = []
+    culinary_section = soup.find(lambda tag: tag.name == 'h3' and 'Culinary hints' in tag.text)
+    if culinary_section:
+        next_elem = culinary_section.find_next('p')
+        while next_elem and next_elem.name == 'p':
+            hint_text = next_elem.text.strip()
+            if hint_text and len(hint_text) > 5:
+                culinary_hints.append(hint_text)
+            next_elem = next_elem.find_next_sibling()
+            if next_elem and next_elem.name != 'p':
+                break
+    
+    # Extract alternative names
+    alternative_names = []
+    if "also" in display_name:
+        main_name, alt_names = display_name.split("also", 1)
+        display_name = main_name.strip()
+        # Clean up alternative names
+        alt_names = alt_names.strip()
+        if alt_names.startswith("("):
+            alt_names = alt_names[1:]
+        if alt_names.endswith(")"):
+            alt_names = alt_names[:-1]
+        alternative_names = [name.strip() for name in alt_names.split(',') if name.strip()]
+    
+    # Compile all data
+    plant_data = {
+        "plant_name": display_name,
+        "alternative_names": alternative_names,
+        "scientific_name": scientific_name,
+        "family": family,
+        "climate_zone": climate_zone,
+        "monthly_calendar": monthly_calendar,
+        "growing_info": growing_info,
+        "companion_plants": companion_plants,
+        "avoid_plants": avoid_plants,
+        "culinary_hints": culinary_hints
+    }
+    
+    return plant_data
 
 # Function to extract data for a subset of plants
-def extract_subset(plant_subset, output_prefix="complete"):
+def extract_subset(plant_subset, output_prefix="complete", merge=False, budget=None):
+    # Create directory for data
+    os.makedirs('garden_data', exist_ok=True)
+    
     all_data = []
     
-    for plant in plant_subset:
-        plant_data_across_zones = {
-            "name": plant,
-            "zones": []
-        }
-        
-        for zone_name, zone_number in climate_zones.items():
+    # With a budget, only the pages most likely to have changed are fetched
+    scheduler = CrawlScheduler.load(SCHEDULE_FILE)
+    if budget is None:
+        crawl_plan = {plant: climate_zones for plant in plant_subset}
+    else:
+        merge = True
+        pages = [(plant, zone_name) for plant in plant_subset for zone_name in climate_zones]
+        crawl_plan = group_by_plant(scheduler.plan(pages, budget), climate_zones)
+    
+    progress = Progress(sum(len(zones) for zones in crawl_plan.values()), "Extracting")
+    zone_classes = ZoneClasses.load(ZONE_CLASSES_FILE)
+    
+    for plant, plant_zones in crawl_plan.items():
+        # Representatives of each group of identical zones are fetched first; the rest of a
+        # group is copied from its representative when that page has not changed
+        zone_results = {}
+        for zone_name, zone_number, source in zone_classes.plan(plant, plant_zones):
+            if source is not None and source in zone_results and zone_classes.can_reuse(plant, source):
+                zone_results[zone_name] = relabel_zone(zone_results[source], zone_name)
+                zone_classes.observe(plant, zone_name, zone_classes.fresh[(plant, source)])
+                scheduler.record(plant, zone_name, zone_classes.fresh[(plant, source)])
+                METRICS.cache.inc(result='hit')
+                progress.update(detail=plant)
+                continue
+            
             plant_data = extract_plant_data(plant, zone_number)
+            fingerprint = None
             if plant_data:
-                plant_data_across_zones["zones"].append({
-                    "zone_name": zone_name,
-                    "zone_number": zone_number,
-                    "data": plant_data
-                })
+                zone_results[zone_name] = plant_data
+                fingerprint = data_fingerprint(plant_data)
+                zone_classes.observe(plant, zone_name, fingerprint)
+            scheduler.record(plant, zone_name, fingerprint)
+            if source is not None:
+                METRICS.cache.inc(result='miss')
+            
+            progress.update(detail=plant)
             
             # Be nice to the server - add a delay between requests
-            time.sleep(1)
+            time.sleep(REQUEST_DELAY)
+        
+        # Zones that were not refreshed on this run keep their previous data
+        plant_file = f'garden_data/{output_prefix}_{plant.replace("/", "-")}.json'
+        if merge and os.path.exists(plant_file):
+            with open(plant_file, 'r') as f:
+                previous = {zone['zone_name']: zone['data'] for zone in json.load(f).get('zones', [])}
+            zone_results = {**previous, **zone_results}
         
+        # Built through the record model, so a missing field or an unknown calendar code fails
+        # here instead of in the files
+        plant_record = Plant(plant, tuple(
+            ZoneProfile.from_dict({"zone_name": zone_name, "zone_number": zone_number, "data": zone_results[zone_name]})
+            for zone_name, zone_number in climate_zones.items() if zone_name in zone_results
+        ))
+        plant_data_across_zones = plant_record.to_dict()
         all_data.append(plant_data_across_zones)
         
         # Save data after each plant to avoid losing progress
-        with open(f'garden_data/{output_prefix}_{plant.replace("/", "-")}.json', 'w') as f:
-            json.dump(plant_data_across_zones, f, indent=2)
+        with METRICS.time_stage('write'):
+            content = json.dumps(plant_data_across_zones, indent=2)
+            with atomic_open(plant_file) as f:
+                f.write(content)
+        METRICS.bytes_out.inc(len(content.encode('utf-8')), stage='write')
     
-    # Save all data to a single file
-    with open(f'garden_data/{output_prefix}_plants.json', 'w') as f:
-        json.dump(all_data, f, indent=2)
+    # Save all data to a single file, keeping the plants that were not refreshed when merging,
+    # except those that have left the plant index
+    combined_file = f'garden_data/{output_prefix}_plants.json'
+    if merge and os.path.exists(combined_file):
+        refreshed = {plant_data['name'] for plant_data in all_data}
+        with open(combined_file, 'r') as f:
+            kept = [plant_data for plant_data in json.load(f) if plant_data['name'] not in refreshed]
+        removed = set(removed_plants(plant_data['name'] for plant_data in kept))
+        for name in sorted(removed):
+            print(f"Removed {name} from {combined_file}: no longer in the plant index")
+        all_data = [plant_data for plant_data in kept if plant_data['name'] not in removed] + all_data
+    write_json(combined_file, all_data, indent=2)
+    zone_classes.save(ZONE_CLASSES_FILE)
+    scheduler.save(SCHEDULE_FILE)
     
-    print(f"Data extraction complete for {len(plant_subset)} plants!")
+    print(f"Data extraction complete for {len(crawl_plan)} plants!")
+    METRICS.finish(f"extract_{output_prefix}")
 
 # Main function to extract data for all plants
 def extract_all_data():
-    extract_subset(plants, "all")
+    started_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+    extract_subset(catalogue_plant_names(), "all")
+    mark_crawled('extract_complete', started_at)
+
+# Refresh only the budget pages most likely to have changed since they were last fetched
+def extract_stale_data(budget):
+    extract_subset(catalogue_plant_names(), "all", budget=budget)
+
+# Extract only the plants plant_discovery.py found new or moved since the last run
+def extract_changed_data():
+    started_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+    extract_subset(changed_plants('extract_complete'), "all", merge=True)
+    mark_crawled('extract_complete', started_at)
 
 # Function to extract data for a test subset
 def extract_test_data():
@@ -299,8 +334,17 @@ def extract_test_data():
     extract_subset(test_plants, "complete")
 
 if __name__ == "__main__":
-    # Extract data for all plants
-    extract_all_data()
+    profile_from_argv()
+    
+    # Extract data for all plants, with --changed-only just the new and moved ones, or with
+    # --budget=N the N pages most likely to have changed
+    budget = budget_from_argv()
+    if budget is not None:
+        extract_stale_data(budget)
+    elif '--changed-only' in sys.argv:
+        extract_changed_data()
+    else:
+        extract_all_data()
     
     # Extract data for test plants
     # extract_test_data() 
\ No newline at end of file
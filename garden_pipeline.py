@@ -0,0 +1,401 @@
+import argparse
+import os
+import sys
+
+# Each subcommand imports what it needs when it runs, so `--help` and the query commands do
+# not pay for requests, bs4 or the scrapers' module-level setup.
+
+
+def _start_profiler(args):
+    if args.profile is not None:
+        from pipeline_profiler import profile_from_argv
+        profile_from_argv(['--profile'] if args.profile is True else [f'--profile={args.profile}'])
+
+
+def cmd_crawl(args):
+    """Scrape the detailed sowing/spacing/harvest records into gardenate_detailed_data/"""
+    if args.discover:
+        from plant_discovery import discover
+        catalogue, changes = discover()
+        print(f"{len(catalogue['plants'])} plants; added {len(changes['added'])}, "
+              f"removed {len(changes['removed'])}, moved {len(changes['moved'])}")
+
+    _start_profiler(args)
+    import scrape_gardenate_details
+    from plant_discovery import changed_plants
+
+    plant_names = changed_plants('scrape_gardenate_details') if args.changed_only else None
+    scrape_gardenate_details.main(plant_names, args.budget)
+    return 0
+
+
+def cmd_extract(args):
+    """Extract the monthly calendars and growing notes into garden_data/"""
+    _start_profiler(args)
+    import extract_complete
+
+    if args.budget is not None:
+        extract_complete.extract_stale_data(args.budget)
+    elif args.changed_only:
+        extract_complete.extract_changed_data()
+    elif args.plants:
+        extract_complete.extract_subset(args.plants, args.prefix)
+    else:
+        extract_complete.extract_all_data()
+    return 0
+
+
+def cmd_integrate(args):
+    """Merge the detailed records into the garden data and add the numeric fields"""
+    if not os.path.exists(args.detailed_dir):
+        print(f"Detailed data directory '{args.detailed_dir}' not found. Run `garden_pipeline.py crawl` first.")
+        return 1
+
+    _start_profiler(args)
+    from integrate_detailed_data import integrate_detailed_data
+    from pipeline_metrics import METRICS
+
+    integrate_detailed_data(args.garden_data_dir, args.detailed_dir, args.output_dir)
+    METRICS.finish("integrate_detailed_data")
+    return 0
+
+
+def cmd_convert(args):
+    """Read every legacy data shape in one pass and write the merged canonical catalogue"""
+    import time
+
+    from legacy_converters import CONVERTERS, convert_legacy_data, legacy_files, write_canonical_catalogue
+
+    start = time.perf_counter()
+    plants, stats = convert_legacy_data(legacy_files())
+    written = write_canonical_catalogue(plants, args.output_dir)
+    print(f"Converted {', '.join(f'{stats[shape]} {shape}' for shape in CONVERTERS)} files into "
+          f"{written['plants']} plants / {written['zones']} zones in {time.perf_counter() - start:.2f}s "
+          f"-> {args.output_dir}/")
+    for path in stats["unrecognised"]:
+        print(f"Skipped {path}: unrecognised shape")
+    return 0
+
+
+def cmd_guides(args):
+    """Render the JSON, Markdown and print-ready HTML planting guides for every zone"""
+    import guide_renderer
+    return guide_renderer.main(['--input-dir', args.input_dir, '--output-dir', args.output_dir]
+                               + (['--workers', str(args.workers)] if args.workers else [])
+                               + (['--force'] if args.force else []))
+
+
+def cmd_publish(args):
+    """Write the per-zone client bundles, planting guides and read-optimised copies of the integrated catalogue"""
+    from catalogue_binary import export_catalogue
+    from catalogue_io import load_plants_from_dir
+
+    from guide_renderer import render_guides
+    from recommendations import write_recommendations
+    from sowing_windows import write_sowing_windows
+    from zone_bundles import write_zone_bundles
+
+    stats = write_zone_bundles(args.input_dir, args.bundles_dir)
+    print(f"Zone bundles: {stats['zones']} zones, largest {stats['largest_bundle_bytes'] / 1024:.0f} KiB "
+          f"-> {args.bundles_dir}/")
+
+    output_file = os.path.join(args.input_dir, 'sowing_windows.json')
+    stats = write_sowing_windows(args.input_dir, output_file)
+    print(f"Sowing windows: {stats['plant_zones']} plant/zone pairs by week, {stats['bytes'] / 1024:.0f} KiB "
+          f"-> {output_file}")
+
+    output_file = os.path.join(args.input_dir, 'recommendations.grec')
+    stats = write_recommendations(args.input_dir, output_file)
+    print(f"Recommendations: {stats['zones']} zones by week, {stats['entries']} ranked entries, "
+          f"{stats['bytes'] / 1024:.0f} KiB -> {output_file}")
+
+    # Generated, not committed: only a sample zone's guides are in the repository
+    stats = render_guides(args.input_dir, args.guides_dir)
+    print(f"Guides: {stats['zones_rendered']} of {stats['zones']} zones rendered, "
+          f"{stats['files_written']} files written -> {args.guides_dir}/")
+
+    output_file = os.path.join(args.input_dir, 'catalogue.gcat')
+    stats = export_catalogue(load_plants_from_dir(args.input_dir), output_file)
+    print(f"Binary catalogue: {stats['plants']} plants / {stats['zones']} zones, "
+          f"{stats['bytes'] / 1024:.1f} KiB -> {output_file}")
+
+    if args.packed:
+        from zone_dedup import write_packed_catalogue
+        stats = write_packed_catalogue(args.input_dir, args.packed)
+        print(f"Packed catalogue: {stats['zones']} zones in {stats['records']} records -> {args.packed}/")
+
+    if args.dedup:
+        from text_dedup import write_deduped_catalogue
+        stats = write_deduped_catalogue(args.input_dir, args.dedup)
+        print(f"Deduplicated catalogue: {stats['unique_paragraphs']} unique paragraphs -> {args.dedup}/")
+    return 0
+
+
+def cmd_export(args, export_args):
+    """Bulk-upsert the integrated catalogue into MongoDB (mongo_export.py options are passed through)"""
+    import mongo_export
+    return mongo_export.main(export_args)
+
+
+def cmd_plan(args, plan_args):
+    """Succession-sowing plans for a zone's crops or a file of gardens (succession_planner.py options)"""
+    import succession_planner
+    return succession_planner.main(plan_args)
+
+
+def cmd_calendar(args, calendar_args):
+    """iCalendar files of sowings and harvests for a file of gardens (ics_export.py options)"""
+    import ics_export
+    return ics_export.main(calendar_args)
+
+
+def cmd_bench(args, bench_args):
+    """Run the offline benchmarks (all benchmark_pipeline.py options are passed through)"""
+    import benchmark_pipeline
+    return benchmark_pipeline.main(bench_args)
+
+
+def cmd_query_plants(args):
+    from plant_discovery import catalogue_plant_names, changed_plants
+
+    names = changed_plants(args.changed_for) if args.changed_for else catalogue_plant_names()
+    for name in names:
+        print(name)
+    return 0
+
+
+def cmd_query_zones(args):
+    from climate_zones import CORE_ZONES, ZONES
+
+    for name, code in (CORE_ZONES if args.core else ZONES).items():
+        print(f"{code:>4}  {name}")
+    return 0
+
+
+def cmd_query_plant(args):
+    import json
+
+    from catalogue_binary import CatalogueReader
+
+    if not os.path.exists(args.catalogue):
+        print(f"No catalogue at {args.catalogue}; run `garden_pipeline.py publish` first.")
+        return 1
+
+    with CatalogueReader(args.catalogue) as reader:
+        plant = reader.find(args.name)
+        if plant is None:
+            print(f"{args.name} is not in {args.catalogue}")
+            return 1
+        if args.zone:
+            zone = plant.zone(args.zone)
+            if zone is None:
+                print(f"{plant.name} has no data for {args.zone}")
+                return 1
+            print(json.dumps(zone.to_dict(), indent=2, ensure_ascii=False))
+            return 0
+
+        print(f"{plant.name} ({plant.scientific_name}, {plant.family})")
+        for zone in plant.zones:
+            calendar = ''.join(_calendar_cell(codes) for codes in zone.monthly_calendar.values())
+            print(f"  {zone.zone_name:<35} {calendar}  soil {_range(zone.soil_temperature_c, '°C')}  "
+                  f"spacing {_range(zone.spacing_cm, ' cm')}  harvest {_range(zone.harvest_weeks, ' wk')}")
+    return 0
+
+
+def cmd_query_resolve(args):
+    import time
+
+    from plant_names import PlantNameResolver, companion_references, resolve_references
+
+    resolver = PlantNameResolver.from_catalogue(args.input_dir)
+    for text in args.names:
+        closest = ', '.join(f"{name} ({similarity:.2f})" for name, similarity in resolver.candidates(text))
+        names, unresolved = resolver.resolve_all(text)
+        print(f"{text} -> {', '.join(names) or '?'}" + (f"  unresolved: {', '.join(unresolved)}" if unresolved else '')
+              + f"  closest: {closest or '-'}")
+    if args.names:
+        return 0
+
+    references = companion_references(args.input_dir)
+    start = time.perf_counter()
+    resolved, unresolved = resolve_references(resolver, references)
+    print(f"Resolved {len(references) - sum(unresolved.values())} of {len(references)} companion references "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms; {len(unresolved)} distinct unresolved:")
+    for reference, count in unresolved.most_common():
+        print(f"  {count:>5}  {reference}")
+    return 0
+
+
+def cmd_query_location(args):
+    from location_zones import LocationZoneResolver
+
+    result = LocationZoneResolver.from_files().resolve(args.lat, args.lng)
+    print(f"USDA zone {result['usda_zone']} ({result['usda_source']}), Gardenate zone {result['gardenate_zone']} "
+          f"({result['gardenate_code']}){' - approximate' if result['approximate'] else ''}")
+    print(f"Nearest reference: {result['nearest']}, {result['distance_km']:g} km")
+    return 0
+
+
+def cmd_query_now(args):
+    import datetime
+
+    from recommendations import RecommendationReader, week_of
+
+    if not os.path.exists(args.table):
+        print(f"No recommendation table at {args.table}; run `garden_pipeline.py publish` first.")
+        return 1
+
+    week = args.week - 1 if args.week else week_of(datetime.date.today())
+    with RecommendationReader(args.table) as reader:
+        if args.zone not in reader.zone_names:
+            print(f"No recommendations for {args.zone}; zones: {', '.join(reader.zone_names)}")
+            return 1
+        print(f"Week {week + 1} in {args.zone}:")
+        for plant, methods, score in reader.recommend(args.zone, week, args.top):
+            print(f"  {score:.2f}  {''.join(methods):<3}  {plant}")
+    return 0
+
+
+def cmd_query_stale(args):
+    from crawl_scheduler import print_plan
+
+    print_plan(args.consumer, args.budget, args.top)
+    return 0
+
+
+def _calendar_cell(codes):
+    """One character per month: S, T or P, '*' for several methods, '.' for none"""
+    return codes[0] if len(codes) == 1 else ('*' if codes else '.')
+
+
+def _range(value, unit):
+    if not value:
+        return '-'
+    low, high = value['min'], value['max']
+    return f"{low:g}{unit}" if low == high else f"{low:g}-{high:g}{unit}"
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='garden_pipeline.py', description="Gardenate data pipeline")
+    commands = parser.add_subparsers(dest='command', metavar='command', required=True)
+
+    def add_crawl_options(command):
+        command.add_argument('--changed-only', action='store_true',
+                             help="Only plants that are new or moved since this stage last ran")
+        command.add_argument('--budget', type=int, metavar='N',
+                             help="Fetch only the N pages most likely to have changed")
+        command.add_argument('--profile', nargs='?', const=True, metavar='DIR',
+                             help="Profile every stage (default output: profile/<timestamp>/)")
+
+    crawl = commands.add_parser('crawl', help=cmd_crawl.__doc__, description=cmd_crawl.__doc__)
+    add_crawl_options(crawl)
+    crawl.add_argument('--discover', action='store_true', help="Refresh the cached plant index first")
+    crawl.set_defaults(handler=cmd_crawl)
+
+    extract = commands.add_parser('extract', help=cmd_extract.__doc__, description=cmd_extract.__doc__)
+    add_crawl_options(extract)
+    extract.add_argument('--plants', nargs='+', metavar='NAME', help="Only these plants")
+    extract.add_argument('--prefix', default='complete',
+                         help="Output file prefix for --plants (default: complete)")
+    extract.set_defaults(handler=cmd_extract)
+
+    integrate = commands.add_parser('integrate', help=cmd_integrate.__doc__, description=cmd_integrate.__doc__)
+    integrate.add_argument('--garden-data-dir', default='garden_data')
+    integrate.add_argument('--detailed-dir', default='gardenate_detailed_data')
+    integrate.add_argument('--output-dir', default='garden_data_enhanced')
+    integrate.add_argument('--profile', nargs='?', const=True, metavar='DIR',
+                           help="Profile every stage (default output: profile/<timestamp>/)")
+    integrate.set_defaults(handler=cmd_integrate)
+
+    convert = commands.add_parser('convert', help=cmd_convert.__doc__, description=cmd_convert.__doc__)
+    convert.add_argument('--output-dir', default='garden_data_canonical')
+    convert.set_defaults(handler=cmd_convert)
+
+    publish = commands.add_parser('publish', help=cmd_publish.__doc__, description=cmd_publish.__doc__)
+    publish.add_argument('--input-dir', default='garden_data_enhanced')
+    publish.add_argument('--bundles-dir', default=os.path.join('client', 'public', 'zone_bundles'),
+                         help="Where the client loads per-zone bundles from")
+    publish.add_argument('--guides-dir', default=os.path.join('gardenate_data', 'guides'))
+    publish.add_argument('--packed', nargs='?', const='garden_data_packed', metavar='DIR',
+                         help="Also write the zone-deduplicated catalogue")
+    publish.add_argument('--dedup', nargs='?', const='garden_data_dedup', metavar='DIR',
+                         help="Also write the text-deduplicated catalogue")
+    publish.set_defaults(handler=cmd_publish)
+
+    # Options after `export`, `plan`, `calendar` and `bench` go to their scripts, including --help
+    export = commands.add_parser('export', help=cmd_export.__doc__, add_help=False)
+    export.set_defaults(handler=cmd_export)
+
+    plan = commands.add_parser('plan', help=cmd_plan.__doc__, add_help=False)
+    plan.set_defaults(handler=cmd_plan)
+
+    calendar = commands.add_parser('calendar', help=cmd_calendar.__doc__, add_help=False)
+    calendar.set_defaults(handler=cmd_calendar)
+
+    bench = commands.add_parser('bench', help=cmd_bench.__doc__, add_help=False)
+    bench.set_defaults(handler=cmd_bench)
+
+    guides = commands.add_parser('guides', help=cmd_guides.__doc__, description=cmd_guides.__doc__)
+    guides.add_argument('--input-dir', default='garden_data_enhanced')
+    guides.add_argument('--output-dir', default=os.path.join('gardenate_data', 'guides'))
+    guides.add_argument('--workers', type=int, help="Worker processes (default: one per CPU)")
+    guides.add_argument('--force', action='store_true', help="Ignore the fragment cache and render everything")
+    guides.set_defaults(handler=cmd_guides)
+
+    query = commands.add_parser('query', help="Look things up in the cached index and the published catalogue")
+    queries = query.add_subparsers(dest='query', metavar='what', required=True)
+
+    plants = queries.add_parser('plants', help="Plant names from the cached plant index")
+    plants.add_argument('--changed-for', metavar='STAGE',
+                        help="Only plants new or moved since STAGE (e.g. extract_complete) last ran")
+    plants.set_defaults(handler=cmd_query_plants)
+
+    zones = queries.add_parser('zones', help="Climate zones and their Gardenate codes")
+    zones.add_argument('--core', action='store_true', help="Only the Australian, New Zealand and UK zones")
+    zones.set_defaults(handler=cmd_query_zones)
+
+    plant = queries.add_parser('plant', help="One plant's zones from the binary catalogue")
+    plant.add_argument('name')
+    plant.add_argument('--zone', help="Print this zone's full record as JSON")
+    plant.add_argument('--catalogue', default=os.path.join('garden_data_enhanced', 'catalogue.gcat'))
+    plant.set_defaults(handler=cmd_query_plant)
+
+    resolve = queries.add_parser('resolve', help="Resolve free-text plant names to catalogue names "
+                                                 "(default: report unresolved companion references)")
+    resolve.add_argument('names', nargs='*', metavar='NAME')
+    resolve.add_argument('--input-dir', default='garden_data_enhanced')
+    resolve.set_defaults(handler=cmd_query_resolve)
+
+    location = queries.add_parser('location', help="The USDA and Gardenate zones for a latitude/longitude")
+    location.add_argument('lat', type=float)
+    location.add_argument('lng', type=float)
+    location.set_defaults(handler=cmd_query_location)
+
+    now = queries.add_parser('now', help="What to sow or transplant in a zone this week, best first")
+    now.add_argument('zone')
+    now.add_argument('--week', type=int, choices=range(1, 53), metavar='1-52', help="Another week of the year")
+    now.add_argument('--top', type=int, default=15)
+    now.add_argument('--table', default=os.path.join('garden_data_enhanced', 'recommendations.grec'))
+    now.set_defaults(handler=cmd_query_now)
+
+    stale = queries.add_parser('stale', help="Pages a budgeted refresh would fetch, most likely changed first")
+    stale.add_argument('consumer', nargs='?', default='scrape_gardenate_details',
+                       choices=['scrape_gardenate_details', 'extract_complete'])
+    stale.add_argument('--budget', type=int, default=500)
+    stale.add_argument('--top', type=int, default=10, help="How many of the planned pages to list")
+    stale.set_defaults(handler=cmd_query_stale)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(sys.argv[1:] if argv is None else argv)
+    if args.handler in (cmd_export, cmd_plan, cmd_calendar, cmd_bench):
+        return args.handler(args, extra)
+    if extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
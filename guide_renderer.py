@@ -0,0 +1,444 @@
+import argparse
+import concurrent.futures
+import datetime
+import hashlib
+import html
+import json
+import multiprocessing
+import os
+import re
+import sys
+import time
+from string import Template
+
+from atomic_io import DirectorySyncBatch, atomic_open, write_json
+from crawl_state import CRAWL_STATE_DIR
+from dataset_delta import load_snapshot
+from zone_bundles import zone_slug
+from zone_dedup import ZONE_NOTE_PATTERN
+
+# Directories
+INPUT_DIR = 'garden_data_enhanced'
+OUTPUT_DIR = os.path.join('gardenate_data', 'guides')
+FRAGMENT_CACHE_FILE = os.path.join(CRAWL_STATE_DIR, 'guide_fragments.json')
+
+# Bump when a template or fragment changes, so every cached fragment is rendered again
+TEMPLATE_VERSION = 1
+
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+FULL_MONTH_NAMES = ['January', 'February', 'March', 'April', 'May', 'June', 'July', 'August', 'September',
+                    'October', 'November', 'December']
+
+METHODS = {
+    "S": "Plant undercover in seed trays",
+    "T": "Plant out (transplant) seedlings",
+    "P": "Sow seed",
+}
+
+# Site text that is not about the plant
+SKIPPED_NOTE_PREFIXES = ("Be the first to post a question",)
+
+
+# --- Markdown templates
+
+MARKDOWN_GUIDE = Template("""# Planting Guide: $zone
+
+*Updated $date. $count plants.*
+
+## Planting Calendar
+
+| Plant | ${month_header} |
+|-------|${month_rule}|
+$rows
+
+$legend
+
+## Plants
+
+$sections""")
+
+MARKDOWN_PLANT = Template("""### $name
+
+$subtitle
+
+| ${month_header} |
+|${month_rule}|
+| $cells |
+
+$facts
+$notes""")
+
+MARKDOWN_INDEX = Template("""# Planting Guides
+
+*Updated $date.*
+
+| Zone | Plants | Guide |
+|------|--------|-------|
+$rows
+""")
+
+
+# --- HTML templates (print-ready: A4 pages, no plant split across a page break)
+
+HTML_STYLE = """@page { size: A4; margin: 15mm; }
+body { font: 10.5pt/1.45 Georgia, 'Times New Roman', serif; color: #222; }
+h1 { font-size: 20pt; margin: 0; }
+h2 { font-size: 14pt; border-bottom: 2px solid #4a7c3a; margin-top: 16pt; }
+h3 { font-size: 12pt; margin: 0 0 2pt; }
+.meta, .subtitle { color: #666; margin: 0 0 8pt; }
+table.calendar { border-collapse: collapse; width: 100%; font-size: 8.5pt; }
+table.calendar th, table.calendar td { border: 1px solid #aaa; padding: 1.5pt 2pt; text-align: center; }
+table.calendar td.plant { text-align: left; white-space: nowrap; }
+td.S { background: #fbe3bd; } td.T { background: #d5ead0; } td.P { background: #cce0f2; } td.multi { background: #e6dcef; }
+thead { display: table-header-group; }
+tr, section.plant { break-inside: avoid; page-break-inside: avoid; }
+section.calendar { break-after: page; page-break-after: always; }
+section.plant { border-top: 1px solid #ccc; padding-top: 6pt; margin-top: 10pt; }
+dl { display: grid; grid-template-columns: max-content auto; gap: 1pt 8pt; margin: 6pt 0; }
+dt { font-weight: bold; }
+dd { margin: 0; }
+@media screen { body { max-width: 60em; margin: 2em auto; padding: 0 1em; } }"""
+
+HTML_GUIDE = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Planting Guide: $zone</title>
+<style>
+$style
+</style>
+</head>
+<body>
+<h1>Planting Guide: $zone</h1>
+<p class="meta">Updated $date. $count plants.</p>
+<section class="calendar">
+<h2>Planting Calendar</h2>
+<table class="calendar">
+<thead><tr><th>Plant</th>$month_header</tr></thead>
+<tbody>
+$rows
+</tbody>
+</table>
+<p class="legend">$legend</p>
+</section>
+<h2>Plants</h2>
+$sections
+</body>
+</html>
+""")
+
+HTML_PLANT = Template("""<section class="plant" id="$anchor">
+<h3>$name</h3>
+<p class="subtitle">$subtitle</p>
+<table class="calendar">
+<thead><tr>$month_header</tr></thead>
+<tbody><tr>$cells</tr></tbody>
+</table>
+$facts
+$notes
+</section>""")
+
+HTML_INDEX = Template("""<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Planting Guides</title>
+<style>
+$style
+</style>
+</head>
+<body>
+<h1>Planting Guides</h1>
+<p class="meta">Updated $date.</p>
+<ul>
+$rows
+</ul>
+</body>
+</html>
+""")
+
+
+def zone_fingerprint(plant_name, data):
+    """Content hash of one plant's data in one zone, including the template version"""
+    canonical = json.dumps([TEMPLATE_VERSION, plant_name, data], sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def _clean_text(text):
+    return re.sub(r'\s+', ' ', text).strip()
+
+
+def _guide_notes(growing_info):
+    notes = []
+    for note in growing_info.get('additional_notes', []):
+        note = _clean_text(note)
+        if note and not ZONE_NOTE_PATTERN.match(note) and not note.startswith(SKIPPED_NOTE_PREFIXES):
+            notes.append(note)
+    return notes
+
+
+def _codes(calendar, month):
+    return ''.join(code for code in calendar.get(month, []) if code in METHODS)
+
+
+def _cell_class(codes):
+    return codes if len(codes) == 1 else ('multi' if codes else '')
+
+
+def _markdown_cell(text):
+    return text.replace('|', '\\|')
+
+
+def plant_summary(plant_name, data):
+    """The JSON guide entry for a plant in a zone"""
+    growing_info = data.get('growing_info', {})
+    return {
+        "name": plant_name,
+        "scientific_name": data.get('scientific_name', ''),
+        "family": data.get('family', ''),
+        "alternative_names": data.get('alternative_names', []),
+        "calendar": {month: _codes(data.get('monthly_calendar', {}), month) for month in MONTHS},
+        "soil_temperature": growing_info.get('soil_temperature', ''),
+        "soil_temperature_c": growing_info.get('soil_temperature_c'),
+        "spacing": growing_info.get('spacing', ''),
+        "spacing_cm": growing_info.get('spacing_cm'),
+        "harvest_time": growing_info.get('harvest_time', ''),
+        "harvest_weeks": growing_info.get('harvest_weeks'),
+        "companion_plants": data.get('companion_plants', []),
+        "avoid_plants": data.get('avoid_plants', []),
+        "notes": _guide_notes(growing_info),
+        "culinary_hints": [_clean_text(hint) for hint in data.get('culinary_hints', []) if hint.strip()],
+    }
+
+
+def _facts(summary):
+    return [(label, value) for label, value in (
+        ("Soil temperature", summary['soil_temperature']),
+        ("Spacing", summary['spacing']),
+        ("Harvest", summary['harvest_time']),
+        ("Good companions", ', '.join(summary['companion_plants'])),
+        ("Avoid planting near", ', '.join(summary['avoid_plants'])),
+    ) if value]
+
+
+def _subtitle(summary):
+    return ' · '.join(part for part in (summary['scientific_name'], summary['family']) if part)
+
+
+def render_fragment(plant_name, data):
+    """Everything a zone guide needs from one plant: its JSON entry, calendar rows and sections"""
+    summary = plant_summary(plant_name, data)
+    codes = [summary['calendar'][month] for month in MONTHS]
+    facts = _facts(summary)
+    notes = summary['notes'] + [f"In the kitchen: {hint}" for hint in summary['culinary_hints']]
+    subtitle = _subtitle(summary)
+
+    markdown = MARKDOWN_PLANT.substitute(
+        name=plant_name,
+        subtitle=f"*{subtitle}*" if subtitle else '',
+        month_header=' | '.join(MONTH_NAMES),
+        month_rule='|'.join(':-:' for _ in MONTHS),
+        cells=' | '.join(codes),
+        facts=''.join(f"- **{label}:** {value}\n" for label, value in facts),
+        notes=''.join(f"{note}\n\n" for note in notes),
+    )
+    html_section = HTML_PLANT.substitute(
+        anchor=zone_slug(plant_name),
+        name=html.escape(plant_name),
+        subtitle=html.escape(subtitle),
+        month_header=''.join(f"<th>{month}</th>" for month in MONTH_NAMES),
+        cells=''.join(f'<td class="{_cell_class(code)}">{code}</td>' for code in codes),
+        facts=('<dl>' + ''.join(f"<dt>{label}</dt><dd>{html.escape(value)}</dd>" for label, value in facts) + '</dl>'
+               if facts else ''),
+        notes='\n'.join(f"<p>{html.escape(note)}</p>" for note in notes),
+    )
+    return {
+        "json": summary,
+        "markdown_row": f"| {_markdown_cell(plant_name)} | " + ' | '.join(codes) + ' |',
+        "markdown": markdown,
+        "html_row": (f'<tr><td class="plant"><a href="#{zone_slug(plant_name)}">{html.escape(plant_name)}</a></td>'
+                     + ''.join(f'<td class="{_cell_class(code)}">{code}</td>' for code in codes) + '</tr>'),
+        "html": html_section,
+    }
+
+
+def assemble_guide(zone_name, fragments, date):
+    """{format: document text} for a zone from its plants' fragments, in plant order"""
+    monthly = {month: [] for month in FULL_MONTH_NAMES}
+    for fragment in fragments:
+        for month, full_name in zip(MONTHS, FULL_MONTH_NAMES):
+            codes = fragment["json"]["calendar"][month]
+            if codes:
+                monthly[full_name].append({"plant": fragment["json"]["name"], "methods": list(codes)})
+
+    legend = ' · '.join(f"{code} = {label}" for code, label in METHODS.items())
+    common = {"zone": zone_name, "date": date, "count": len(fragments), "legend": legend}
+    return {
+        "json": json.dumps({
+            "climate_zone": zone_name,
+            "updated": date,
+            "planting_methods": METHODS,
+            "monthly_planting": monthly,
+            "plants": [fragment["json"] for fragment in fragments],
+        }, indent=2, ensure_ascii=False) + '\n',
+        "md": MARKDOWN_GUIDE.substitute(
+            common,
+            month_header=' | '.join(MONTH_NAMES),
+            month_rule='|'.join(':-:' for _ in MONTHS),
+            rows='\n'.join(fragment["markdown_row"] for fragment in fragments),
+            sections='\n'.join(fragment["markdown"] for fragment in fragments),
+        ).rstrip('\n') + '\n',
+        "html": HTML_GUIDE.substitute(
+            common,
+            zone=html.escape(zone_name),
+            legend=html.escape(legend),
+            style=HTML_STYLE,
+            month_header=''.join(f"<th>{month}</th>" for month in MONTH_NAMES),
+            rows='\n'.join(fragment["html_row"] for fragment in fragments),
+            sections='\n'.join(fragment["html"] for fragment in fragments),
+        ),
+    }
+
+
+def _render_zone(zone_name, entries, date):
+    """Worker: render the stale fragments of one zone and assemble its guides.
+
+    entries are (plant, data, fingerprint, cached fragment or None); returns
+    (zone, {plant: {"hash", "fragment"}}, number of fragments rendered, {format: text}).
+    """
+    fragments = {}
+    rendered = 0
+    for plant_name, data, fingerprint, fragment in entries:
+        if fragment is None:
+            fragment = render_fragment(plant_name, data)
+            rendered += 1
+        fragments[plant_name] = {"hash": fingerprint, "fragment": fragment}
+    documents = assemble_guide(zone_name, [fragments[plant_name]["fragment"] for plant_name, *_ in entries], date)
+    return zone_name, fragments, rendered, documents
+
+
+def guide_paths(output_dir, zone_name):
+    """{format: path} of a zone's guides"""
+    slug = zone_slug(zone_name)
+    return {format_name: os.path.join(output_dir, f"{slug}.{format_name}") for format_name in ('json', 'md', 'html')}
+
+
+def _load_fragment_cache(cache_file):
+    if not os.path.exists(cache_file):
+        return {}
+    with open(cache_file, 'r') as f:
+        cache = json.load(f)
+    return cache.get("zones", {}) if cache.get("version") == TEMPLATE_VERSION else {}
+
+
+def _write_if_changed(path, text, batch):
+    """Write text unless the file already holds it; returns whether it was written"""
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == text:
+                return False
+    with atomic_open(path, 'w', encoding='utf-8', batch=batch) as f:
+        f.write(text)
+    return True
+
+
+def _zone_plants(plants):
+    """{zone: {plant: zone data}} for every plant with something to sow in the zone"""
+    zones = {}
+    for plant in plants.values():
+        for zone in plant.get('zones', []):
+            if any(zone['data'].get('monthly_calendar', {}).get(month) for month in MONTHS):
+                zones.setdefault(zone['zone_name'], {})[plant['name']] = zone['data']
+    return zones
+
+
+def _index_documents(zone_counts, date):
+    rows = [(zone_name, count, guide_paths('', zone_name)) for zone_name, count in sorted(zone_counts.items())]
+    return {
+        "index.json": json.dumps({
+            "updated": date,
+            "zones": [{"zone": zone_name, "plants": count, **paths} for zone_name, count, paths in rows],
+        }, indent=2, ensure_ascii=False) + '\n',
+        "index.md": MARKDOWN_INDEX.substitute(date=date, rows='\n'.join(
+            f"| {zone_name} | {count} | [Markdown]({paths['md']}) · [HTML]({paths['html']}) · [JSON]({paths['json']}) |"
+            for zone_name, count, paths in rows)),
+        "index.html": HTML_INDEX.substitute(date=date, style=HTML_STYLE, rows='\n'.join(
+            f'<li><a href="{paths["html"]}">{html.escape(zone_name)}</a> ({count} plants)</li>'
+            for zone_name, count, paths in rows)),
+    }
+
+
+def render_guides(input_dir=INPUT_DIR, output_dir=OUTPUT_DIR, cache_file=FRAGMENT_CACHE_FILE, workers=None,
+                  force=False):
+    """Render the JSON, Markdown and HTML guides for every zone.
+
+    A fragment (a plant's calendar row, section and JSON entry for one zone) is rendered again only
+    when that plant's data for the zone has changed, and a zone's guides are reassembled only when
+    one of its fragments has. Zones are rendered in parallel worker processes.
+    """
+    date = datetime.date.today().isoformat()
+    zones = _zone_plants(load_snapshot(input_dir))
+    cache = {} if force else _load_fragment_cache(cache_file)
+
+    jobs = {}
+    for zone_name, zone_plants in zones.items():
+        cached = cache.get(zone_name, {})
+        entries = []
+        for plant_name in sorted(zone_plants):
+            fingerprint = zone_fingerprint(plant_name, zone_plants[plant_name])
+            hit = cached.get(plant_name)
+            entries.append((plant_name, zone_plants[plant_name], fingerprint,
+                            hit["fragment"] if hit and hit["hash"] == fingerprint else None))
+        stale = any(fragment is None for *_, fragment in entries) or set(cached) != set(zone_plants)
+        if stale or not all(os.path.exists(path) for path in guide_paths(output_dir, zone_name).values()):
+            jobs[zone_name] = entries
+
+    stats = {"zones": len(zones), "zones_rendered": len(jobs), "fragments": sum(map(len, zones.values())),
+             "fragments_rendered": 0, "files_written": 0}
+    results = []
+    if len(jobs) > 1 and workers != 1:
+        context = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+            futures = [pool.submit(_render_zone, zone_name, entries, date) for zone_name, entries in jobs.items()]
+            results = [future.result() for future in futures]
+    else:
+        results = [_render_zone(zone_name, entries, date) for zone_name, entries in jobs.items()]
+
+    os.makedirs(output_dir, exist_ok=True)
+    new_cache = {zone_name: fragments for zone_name, fragments in cache.items() if zone_name in zones}
+    with DirectorySyncBatch() as batch:
+        for zone_name, fragments, rendered, documents in results:
+            new_cache[zone_name] = fragments
+            stats["fragments_rendered"] += rendered
+            for format_name, path in guide_paths(output_dir, zone_name).items():
+                stats["files_written"] += _write_if_changed(path, documents[format_name], batch)
+        if jobs or not os.path.exists(os.path.join(output_dir, 'index.md')):
+            for file_name, text in _index_documents({zone: len(plants) for zone, plants in zones.items()}, date).items():
+                stats["files_written"] += _write_if_changed(os.path.join(output_dir, file_name), text, batch)
+
+    if jobs:
+        os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+        write_json(cache_file, {"version": TEMPLATE_VERSION, "zones": new_cache}, separators=(',', ':'))
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render the planting guides for every zone")
+    parser.add_argument('--input-dir', default=INPUT_DIR)
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--cache-file', default=FRAGMENT_CACHE_FILE)
+    parser.add_argument('--workers', type=int, help="Worker processes (default: one per CPU; 1 renders in-process)")
+    parser.add_argument('--force', action='store_true', help="Ignore the fragment cache and render everything")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    stats = render_guides(args.input_dir, args.output_dir, args.cache_file, args.workers, args.force)
+    print(f"Guides: {stats['zones_rendered']} of {stats['zones']} zones and {stats['fragments_rendered']} of "
+          f"{stats['fragments']} plant fragments rendered, {stats['files_written']} files written to "
+          f"{args.output_dir}/ in {time.perf_counter() - start:.2f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
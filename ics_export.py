@@ -0,0 +1,216 @@
+import argparse
+import datetime
+import hashlib
+import io
+import os
+import random
+import re
+import sys
+import time
+
+from atomic_io import DirectorySyncBatch, atomic_open
+from succession_planner import SuccessionPlanner, read_gardens
+
+OUTPUT_DIR = 'garden_calendars'
+PRODID = '-//Plant Perfectly//Garden Planner//EN'
+UID_DOMAIN = 'plantperfectly'
+
+METHOD_LABELS = {
+    "S": "Sow in seed trays",
+    "T": "Transplant seedlings",
+    "P": "Sow direct",
+}
+
+# RFC 5545 limits content lines to 75 octets, continued on lines starting with a space
+MAX_LINE_OCTETS = 75
+
+
+def escape_text(text):
+    """Escape a TEXT property value (RFC 5545 section 3.3.11)"""
+    return text.replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def fold_line(line):
+    """Fold one content line into CRLF-terminated lines of at most 75 octets, between characters"""
+    encoded = line.encode('utf-8')
+    if len(encoded) <= MAX_LINE_OCTETS:
+        return line + '\r\n'
+    parts = []
+    limit = MAX_LINE_OCTETS
+    while len(encoded) > limit:
+        cut = limit
+        while encoded[cut] & 0xC0 == 0x80:  # don't split a UTF-8 sequence
+            cut -= 1
+        parts.append(encoded[:cut].decode('utf-8'))
+        encoded = encoded[cut:]
+        limit = MAX_LINE_OCTETS - 1  # continuation lines start with a space
+    parts.append(encoded.decode('utf-8'))
+    return '\r\n '.join(parts) + '\r\n'
+
+
+def _slug(text):
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-')
+
+
+def garden_key(garden_id):
+    """File name stem and UID prefix for a garden: readable, but distinct for ids that slug alike"""
+    text = str(garden_id)
+    return f"{_slug(text) or 'garden'}-{hashlib.sha1(text.encode('utf-8')).hexdigest()[:8]}"
+
+
+def _ics_date(iso_date):
+    return iso_date.replace('-', '')
+
+
+def _next_day(iso_date):
+    return (datetime.date.fromisoformat(iso_date) + datetime.timedelta(days=1)).strftime('%Y%m%d')
+
+
+class CalendarRenderer:
+    """Render garden sowing and harvest schedules as iCalendar (RFC 5545) files.
+
+    Every event for a (zone, crop, interval, year) is rendered once, as text up to its UID, and
+    shared by all gardens that grow the crop in that zone; a garden's calendar only adds its own
+    UID prefix, so UIDs stay stable between exports and calendar apps update events in place.
+    Sowings and harvests recur yearly from the planned year.
+    """
+
+    def __init__(self, planner, year, dtstamp=None):
+        self.planner = planner
+        self.year = year
+        self.dtstamp = dtstamp or datetime.datetime.now(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        self._templates = {}
+
+    def _render_template(self, zone_name, crop, interval):
+        """(UID base, [(UID suffix, event text after the UID line)]) or None if the crop has no plan"""
+        plan = self.planner.dated_plan(zone_name, crop, self.year, interval)
+        if 'error' in plan:
+            return None
+        # The same crop may be planned at several intervals in one garden
+        uid_base = f"{_slug(zone_name)}-{_slug(plan['crop'])}" + (f"-every-{interval}w" if interval else '')
+        events = []
+        for number, sowing in enumerate(plan['sowings'], 1):
+            description = (f"{plan['crop']} in {zone_name}. Harvest from {sowing['harvest_from']} "
+                           f"to {sowing['harvest_to']}.")
+            events.append((f"{uid_base}-sow-{number}", ''.join(fold_line(line) for line in [
+                f"DTSTAMP:{self.dtstamp}",
+                f"DTSTART;VALUE=DATE:{_ics_date(sowing['date'])}",
+                f"DTEND;VALUE=DATE:{_next_day(sowing['date'])}",
+                "RRULE:FREQ=YEARLY",
+                f"SUMMARY:{escape_text(METHOD_LABELS[sowing['method']] + ': ' + plan['crop'])}",
+                f"DESCRIPTION:{escape_text(description)}",
+                "CATEGORIES:Sowing",
+                "TRANSP:TRANSPARENT",
+                "END:VEVENT",
+            ])))
+            events.append((f"{uid_base}-harvest-{number}", ''.join(fold_line(line) for line in [
+                f"DTSTAMP:{self.dtstamp}",
+                f"DTSTART;VALUE=DATE:{_ics_date(sowing['harvest_from'])}",
+                f"DTEND;VALUE=DATE:{_next_day(sowing['harvest_to'])}",
+                "RRULE:FREQ=YEARLY",
+                f"SUMMARY:{escape_text('Harvest ' + plan['crop'])}",
+                f"DESCRIPTION:{escape_text(plan['crop'] + ' sown on ' + sowing['date'] + ' in ' + zone_name + '.')}",
+                "CATEGORIES:Harvest",
+                "TRANSP:TRANSPARENT",
+                "END:VEVENT",
+            ])))
+        return uid_base, events
+
+    def template(self, zone_name, crop, interval=None):
+        key = (zone_name, crop, interval)
+        if key not in self._templates:
+            self._templates[key] = self._render_template(zone_name, crop, interval)
+        return self._templates[key]
+
+    def write_garden(self, garden, f):
+        """Write one garden's calendar to a text file object; returns (events, crops without a plan)"""
+        garden_id = garden.get('id')
+        name = garden.get('name') or f"Garden {'' if garden_id is None else garden_id}".strip()
+        uid_prefix = garden_key('' if garden_id is None else garden_id)
+        f.write("BEGIN:VCALENDAR\r\nVERSION:2.0\r\n" + fold_line(f"PRODID:{PRODID}") +
+                "CALSCALE:GREGORIAN\r\nMETHOD:PUBLISH\r\n" + fold_line(f"X-WR-CALNAME:{escape_text(name)}"))
+        events = 0
+        skipped = []
+        written = set()
+        for crop in garden.get('crops', []):
+            crop_name, interval = (crop, None) if isinstance(crop, str) else (crop['name'], crop.get('interval'))
+            template = self.template(garden['zone'], crop_name, interval)
+            if template is None:
+                skipped.append(crop_name)
+                continue
+            uid_base, template_events = template
+            # "Tomato" and "tomatoes" plan the same crop; listing it twice must not repeat UIDs
+            if uid_base in written:
+                continue
+            written.add(uid_base)
+            for uid_suffix, body in template_events:
+                f.write("BEGIN:VEVENT\r\n" + fold_line(f"UID:{uid_prefix}-{uid_suffix}@{UID_DOMAIN}") + body)
+            events += len(template_events)
+        f.write("END:VCALENDAR\r\n")
+        return events, skipped
+
+    def write_gardens(self, gardens, output_dir=OUTPUT_DIR):
+        """Write <garden key>.ics for each garden, one at a time, so memory does not grow with the batch.
+
+        Gardens without an id, or with an id already written in this batch, are not written and are
+        counted as rejected.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        stats = {"gardens": 0, "events": 0, "skipped": 0, "rejected": 0}
+        seen = set()
+        with DirectorySyncBatch() as batch:
+            for garden in gardens:
+                garden_id = garden.get('id')
+                missing = garden_id is None or garden_id == ''
+                if missing or str(garden_id) in seen:
+                    print(f"Skipping garden {garden_id!r}: {'no id' if missing else 'duplicate id'}", file=sys.stderr)
+                    stats["rejected"] += 1
+                    continue
+                seen.add(str(garden_id))
+                with atomic_open(os.path.join(output_dir, f"{garden_key(garden_id)}.ics"), 'w', encoding='utf-8',
+                                 batch=batch) as f:
+                    events, skipped = self.write_garden(garden, f)
+                stats["gardens"] += 1
+                stats["events"] += events
+                stats["skipped"] += len(skipped)
+        return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write iCalendar files of each garden's sowings and harvests")
+    parser.add_argument('--gardens', metavar='FILE',
+                        help='JSON or JSON-lines file of {"id", "zone", "crops": [...]} gardens')
+    parser.add_argument('--output-dir', default=OUTPUT_DIR)
+    parser.add_argument('--year', type=int, default=datetime.date.today().year)
+    parser.add_argument('--bench', type=int, metavar='N', help="Render N random gardens in memory and report the rate")
+    args = parser.parse_args(argv)
+
+    renderer = CalendarRenderer(SuccessionPlanner.from_catalogue(), args.year)
+
+    if args.bench:
+        rng = random.Random(0)
+        zones = sorted(renderer.planner.windows)
+        crops = sorted({name for plants in renderer.planner.windows.values() for name in plants})
+        start = time.perf_counter()
+        total_bytes = 0
+        for i in range(args.bench):
+            buffer = io.StringIO()
+            renderer.write_garden({"id": i, "zone": rng.choice(zones), "crops": rng.sample(crops, 12)}, buffer)
+            total_bytes += len(buffer.getvalue())
+        elapsed = time.perf_counter() - start
+        print(f"Rendered {args.bench} gardens x 12 crops ({total_bytes / 1e6:.0f} MB) in {elapsed:.1f}s "
+              f"({args.bench / elapsed:,.0f} gardens/s)")
+        return 0
+
+    if not args.gardens:
+        parser.error("--gardens FILE is required")
+    start = time.perf_counter()
+    stats = renderer.write_gardens(read_gardens(args.gardens), args.output_dir)
+    print(f"Wrote {stats['gardens']} calendars with {stats['events']} events to {args.output_dir}/ "
+          f"in {time.perf_counter() - start:.1f}s; {stats['skipped']} crops had no plan, "
+          f"{stats['rejected']} gardens had no id or a repeated one")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,14 +2,16 @@ import json
 import os
 import re
 
+from atomic_io import DirectorySyncBatch, write_json
+from climate_zones import ZONES
+from pipeline_metrics import METRICS, Progress
+from pipeline_profiler import profile_from_argv
+
 # Directories
 GARDEN_DATA_DIR = 'garden_data'
 DETAILED_DATA_DIR = 'gardenate_detailed_data'
 OUTPUT_DIR = 'garden_data_enhanced'
 
-# Create output directory
-os.makedirs(OUTPUT_DIR, exist_ok=True)
-
 def load_json_file(file_path):
     """Load a JSON file and return its contents"""
     try:
@@ -19,72 +21,23 @@ def load_json_file(file_path):
         print(f"Error loading {file_path}: {str(e)}")
         return None
 
-def save_json_file(data, file_path):
-    """Save data to a JSON file"""
+def save_json_file(data, file_path, batch=None):
+    """Save data to a JSON file, replacing it atomically"""
     try:
-        with open(file_path, 'w') as f:
-            json.dump(data, f, indent=2)
+        write_json(file_path, data, batch=batch, indent=2)
         return True
     except Exception as e:
         print(f"Error saving {file_path}: {str(e)}")
         return False
 
 def get_zone_code_from_name(zone_name):
-    """Map zone name to zone code based on the mapping in scrape_gardenate_details.py"""
-    zone_mapping = {
-        "Australia - arid": 1,
-        "Australia - cool/mountain": 2,
-        "Australia - sub-tropical": 3,
-        "Australia - temperate": 4,
-        "Australia - tropical": 5,
-        "Canada - Zone 2a Sub-Arctic": 6,
-        "Canada - Zone 2b Sub-Arctic": 7,
-        "Canada - Zone 3a Temperate Short Summer": 8,
-        "Canada - Zone 3b Temperate Warm Summer": 9,
-        "Canada - zone 4a Temperate Warm Summer": 10,
-        "Canada - Zone 4b Temperate Warm Summer": 11,
-        "Canada - Zone 5a Temperate Warm Summer": 12,
-        "Canada - Zone 5b Temperate Warm Summer": 13,
-        "Canada - Zone 6a Temperate Warm Summer": 14,
-        "Canada - Zone 6b Temperate Warm Summer": 15,
-        "Canada - Zone 7a Mild Temperate": 16,
-        "Canada - Zone 7b Mild Temperate": 17,
-        "Canada - Zone 8a Mild Temperate": 18,
-        "New Zealand - cool/mountain": 19,
-        "New Zealand - sub-tropical": 20,
-        "New Zealand - temperate": 21,
-        "South Africa - Dry summer sub-tropical": 22,
-        "South Africa - Humid sub-tropical": 23,
-        "South Africa - Semi-arid": 24,
-        "South Africa - Summer rainfall": 25,
-        "United Kingdom - cool/temperate": 26,
-        "United Kingdom - warm/temperate": 27,
-        "USA - Zone 2a": 101,
-        "USA - Zone 2b": 102,
-        "USA - Zone 3a": 103,
-        "USA - Zone 3b": 104,
-        "USA - Zone 4a": 105,
-        "USA - Zone 4b": 106,
-        "USA - Zone 5a": 107,
-        "USA - Zone 5b": 108,
-        "USA - Zone 6a": 109,
-        "USA - Zone 6b": 110,
-        "USA - Zone 7a": 111,
-        "USA - Zone 7b": 112,
-        "USA - Zone 8a": 113,
-        "USA - Zone 8b": 114,
-        "USA - Zone 9a": 115,
-        "USA - Zone 9b": 116,
-        "USA - Zone 10a": 117,
-        "USA - Zone 10b": 118,
-        "USA - Zone 11a": 119,
-        "USA - Zone 11b": 120,
-        "USA - Zone 12a": 121,
-        "USA - Zone 12b": 122,
-        "USA - Zone 13a": 123,
-        "USA - Zone 13b": 124
-    }
-    return zone_mapping.get(zone_name)
+    """Map zone name to its Gardenate zone code"""
+    return ZONES.get(zone_name)
+
+def detail_matches_zone(zone_detailed_data, zone_name):
+    """Check that a detailed record was scraped with the right code for its zone"""
+    zone_code = zone_detailed_data.get('zone_code')
+    return zone_code is None or zone_code == get_zone_code_from_name(zone_name)
 
 def extract_soil_temperature(sowing_text):
     """Extract soil temperature information from sowing text"""
@@ -127,6 +80,85 @@ def extract_harvest_time(harvest_text):
     
     return harvest_text
 
+def _round_number(value):
+    """Round a parsed measurement, keeping whole numbers as ints"""
+    value = round(value, 1)
+    return int(value) if value == int(value) else value
+
+def _numeric_range(min_value, max_value, factor=1.0):
+    """Build a {min, max} dict from two parsed numbers, applying a unit factor"""
+    low, high = sorted((float(min_value) * factor, float(max_value) * factor))
+    return {"min": _round_number(low), "max": _round_number(high)}
+
+def parse_soil_temperature_range(soil_temp_text):
+    """Parse a soil temperature text into a {min, max} range in °C"""
+    # Matches "16°C-35°C", "between 12°C and 21°C" and the Fahrenheit variants
+    temp_match = re.search(r'(-?\d+(?:\.\d+)?)\s*°?\s*([CF])\s*(?:-|to|and)\s*(-?\d+(?:\.\d+)?)\s*°?\s*([CF])', soil_temp_text or '')
+    if not temp_match:
+        return None
+    
+    min_temp, min_unit, max_temp, max_unit = temp_match.groups()
+    min_temp = float(min_temp)
+    max_temp = float(max_temp)
+    if min_unit == 'F':
+        min_temp = (min_temp - 32) * 5 / 9
+    if max_unit == 'F':
+        max_temp = (max_temp - 32) * 5 / 9
+    return _numeric_range(min_temp, max_temp)
+
+# Conversion factors from the spacing units used on Gardenate to centimetres
+SPACING_UNITS_TO_CM = {
+    "cm": 1.0,
+    "mm": 0.1,
+    "in": 2.54,
+    "inch": 2.54,
+    "inches": 2.54,
+    "m": 100.0,
+    "metre": 100.0,
+    "metres": 100.0,
+    "meter": 100.0,
+    "meters": 100.0,
+    "ft": 30.48,
+    "feet": 30.48,
+}
+
+def parse_spacing_range(spacing_text):
+    """Parse a spacing text into a {min, max} range in cm"""
+    # Matches "40-60 cm", "Space plants:  40 - 60  cm apart", "Thin to 5 cm" and "Rows 1 Metre apart"
+    spacing_match = re.search(r'(\d+(?:\.\d+)?)\s*(?:-\s*(\d+(?:\.\d+)?))?\s*(cm|mm|inches|inch|in|metres|metre|meters|meter|m|feet|ft)\b', spacing_text or '', re.IGNORECASE)
+    if not spacing_match:
+        return None
+    
+    min_space, max_space, unit = spacing_match.groups()
+    factor = SPACING_UNITS_TO_CM[unit.lower()]
+    return _numeric_range(min_space, max_space or min_space, factor)
+
+# Conversion factors from the harvest time units used on Gardenate to weeks
+HARVEST_UNITS_TO_WEEKS = {
+    "day": 1 / 7,
+    "week": 1.0,
+    "month": 52 / 12,
+    "year": 52.0,
+}
+
+def parse_harvest_range(harvest_text):
+    """Parse a harvest time text into a {min, max} range in weeks"""
+    # Matches "8-17 weeks", "Harvest in 8-10 days." and "Harvest in approximately 4 months"
+    harvest_match = re.search(r'(\d+(?:\.\d+)?)\s*(?:-\s*(\d+(?:\.\d+)?))?\s*(day|week|month|year)s?', harvest_text or '', re.IGNORECASE)
+    if not harvest_match:
+        return None
+    
+    min_time, max_time, unit = harvest_match.groups()
+    factor = HARVEST_UNITS_TO_WEEKS[unit.lower()]
+    return _numeric_range(min_time, max_time or min_time, factor)
+
+def add_numeric_growing_info(growing_info):
+    """Add structured numeric fields alongside the growing_info text fields"""
+    growing_info['soil_temperature_c'] = parse_soil_temperature_range(growing_info.get('soil_temperature', ''))
+    growing_info['spacing_cm'] = parse_spacing_range(growing_info.get('spacing', ''))
+    growing_info['harvest_weeks'] = parse_harvest_range(growing_info.get('harvest_time', ''))
+    return growing_info
+
 def extract_companion_plants(companion_text):
     """Extract companion plants from companion text"""
     if "Not applicable" in companion_text or not companion_text:
@@ -153,21 +185,103 @@ def extract_avoid_plants(avoid_text):
     avoid_plants = [plant.strip() for plant in avoid_text.split(',')]
     return avoid_plants
 
-def integrate_detailed_data():
+def integrate_plant_data(existing_data, plant_detailed_data):
+    """Merge one plant's detailed data into its existing data and add the numeric fields"""
+    # If we have detailed data, integrate it
+    if plant_detailed_data:
+        # Update each zone with detailed information
+        for zone_data in existing_data.get('zones', []):
+            zone_name = zone_data.get('zone_name', '')
+            
+            # Find matching detailed data for this zone
+            zone_detailed_data = plant_detailed_data.get(zone_name, {})
+            
+            # A record fetched with another zone's code holds that zone's page, so leave it out
+            if zone_detailed_data and not detail_matches_zone(zone_detailed_data, zone_name):
+                METRICS.items.inc(stage='validate', outcome='zone_mismatch')
+                zone_detailed_data = {}
+            
+            if zone_detailed_data:
+                # Extract and add detailed information
+                growing_info = zone_data.get('data', {}).get('growing_info', {})
+                
+                # Update soil temperature
+                soil_temp = extract_soil_temperature(zone_detailed_data.get('sowing', ''))
+                if soil_temp:
+                    growing_info['soil_temperature'] = soil_temp
+                
+                # Update spacing
+                spacing = extract_spacing(zone_detailed_data.get('spacing', ''))
+                if spacing:
+                    growing_info['spacing'] = spacing
+                
+                # Update harvest time
+                harvest_time = extract_harvest_time(zone_detailed_data.get('harvest', ''))
+                if harvest_time:
+                    growing_info['harvest_time'] = harvest_time
+                
+                # Update companion plants
+                companion_plants = extract_companion_plants(zone_detailed_data.get('companion', ''))
+                if companion_plants:
+                    zone_data['data']['companion_plants'] = companion_plants
+                
+                # Update plants to avoid
+                avoid_plants = extract_avoid_plants(zone_detailed_data.get('avoid', ''))
+                if avoid_plants:
+                    zone_data['data']['avoid_plants'] = avoid_plants
+                
+                # Add the full detailed text to additional notes
+                additional_notes = growing_info.get('additional_notes', [])
+                
+                if zone_detailed_data.get('sowing', ''):
+                    additional_notes.append(f"Sowing: {zone_detailed_data['sowing']}")
+                
+                if zone_detailed_data.get('spacing', ''):
+                    additional_notes.append(f"Spacing: {zone_detailed_data['spacing']}")
+                
+                if zone_detailed_data.get('harvest', ''):
+                    additional_notes.append(f"Harvest: {zone_detailed_data['harvest']}")
+                
+                growing_info['additional_notes'] = additional_notes
+                
+                # Update the growing_info in the data
+                zone_data['data']['growing_info'] = growing_info
+    
+    # Add numeric soil temperature, spacing and harvest ranges for every zone
+    # (all_plants.json holds a list of plants rather than a single plant)
+    plant_entries = existing_data if isinstance(existing_data, list) else [existing_data]
+    for plant_entry in plant_entries:
+        for zone_data in plant_entry.get('zones', []):
+            growing_info = zone_data.get('data', {}).get('growing_info')
+            if growing_info is not None:
+                add_numeric_growing_info(growing_info)
+    
+    return existing_data
+
+def integrate_detailed_data(garden_data_dir=GARDEN_DATA_DIR, detailed_data_dir=DETAILED_DATA_DIR, output_dir=OUTPUT_DIR):
     """Integrate detailed data with existing data"""
+    os.makedirs(output_dir, exist_ok=True)
+    
     # Get list of all plant files in garden_data directory
-    plant_files = [f for f in os.listdir(GARDEN_DATA_DIR) if f.startswith('all_') and f.endswith('.json')]
+    plant_files = [f for f in os.listdir(garden_data_dir) if f.startswith('all_') and f.endswith('.json')]
     
     # Load detailed data if available
-    detailed_data_file = os.path.join(DETAILED_DATA_DIR, 'all_detailed_data.json')
+    detailed_data_file = os.path.join(detailed_data_dir, 'all_detailed_data.json')
     all_detailed_data = load_json_file(detailed_data_file) if os.path.exists(detailed_data_file) else {}
     
+    progress = Progress(len(plant_files), "Integrating")
+    mismatches_before = METRICS.items.get(stage='validate', outcome='zone_mismatch')
+    batch = DirectorySyncBatch()
+    
     for plant_file in plant_files:
         plant_name = plant_file.replace('all_', '').replace('.json', '')
-        print(f"Processing {plant_name}...")
+        progress.update(detail=plant_name)
         
         # Load existing data
-        existing_data = load_json_file(os.path.join(GARDEN_DATA_DIR, plant_file))
+        input_file = os.path.join(garden_data_dir, plant_file)
+        with METRICS.time_stage('read'):
+            existing_data = load_json_file(input_file)
+        METRICS.bytes_in.inc(os.path.getsize(input_file), stage='read')
         if not existing_data:
             continue
         
@@ -182,68 +296,26 @@ def integrate_detailed_data():
         
         # If not found in all_detailed_data, try to load from individual file
         if not plant_detailed_data:
-            detailed_file = os.path.join(DETAILED_DATA_DIR, f"{plant_name.replace('/', '-')}.json")
+            detailed_file = os.path.join(detailed_data_dir, f"{plant_name.replace('/', '-')}.json")
             if os.path.exists(detailed_file):
                 plant_detailed_data = load_json_file(detailed_file)
         
-        # If we have detailed data, integrate it
-        if plant_detailed_data:
-            # Update each zone with detailed information
-            for zone_data in existing_data.get('zones', []):
-                zone_name = zone_data.get('zone_name', '')
-                
-                # Find matching detailed data for this zone
-                zone_detailed_data = plant_detailed_data.get(zone_name, {})
-                
-                if zone_detailed_data:
-                    # Extract and add detailed information
-                    growing_info = zone_data.get('data', {}).get('growing_info', {})
-                    
-                    # Update soil temperature
-                    soil_temp = extract_soil_temperature(zone_detailed_data.get('sowing', ''))
-                    if soil_temp:
-                        growing_info['soil_temperature'] = soil_temp
-                    
-                    # Update spacing
-                    spacing = extract_spacing(zone_detailed_data.get('spacing', ''))
-                    if spacing:
-                        growing_info['spacing'] = spacing
-                    
-                    # Update harvest time
-                    harvest_time = extract_harvest_time(zone_detailed_data.get('harvest', ''))
-                    if harvest_time:
-                        growing_info['harvest_time'] = harvest_time
-                    
-                    # Update companion plants
-                    companion_plants = extract_companion_plants(zone_detailed_data.get('companion', ''))
-                    if companion_plants:
-                        zone_data['data']['companion_plants'] = companion_plants
-                    
-                    # Update plants to avoid
-                    avoid_plants = extract_avoid_plants(zone_detailed_data.get('avoid', ''))
-                    if avoid_plants:
-                        zone_data['data']['avoid_plants'] = avoid_plants
-                    
-                    # Add the full detailed text to additional notes
-                    additional_notes = growing_info.get('additional_notes', [])
-                    
-                    if zone_detailed_data.get('sowing', ''):
-                        additional_notes.append(f"Sowing: {zone_detailed_data['sowing']}")
-                    
-                    if zone_detailed_data.get('spacing', ''):
-                        additional_notes.append(f"Spacing: {zone_detailed_data['spacing']}")
-                    
-                    if zone_detailed_data.get('harvest', ''):
-                        additional_notes.append(f"Harvest: {zone_detailed_data['harvest']}")
-                    
-                    growing_info['additional_notes'] = additional_notes
-                    
-                    # Update the growing_info in the data
-                    zone_data['data']['growing_info'] = growing_info
+        # Merge the detailed data into every zone
+        with METRICS.time_stage('integrate'):
+            integrate_plant_data(existing_data, plant_detailed_data)
         
         # Save the enhanced data
-        output_file = os.path.join(OUTPUT_DIR, plant_file)
-        save_json_file(existing_data, output_file)
+        output_file = os.path.join(output_dir, plant_file)
+        with METRICS.time_stage('write'):
+            saved = save_json_file(existing_data, output_file, batch)
+        if saved:
+            METRICS.bytes_out.inc(os.path.getsize(output_file), stage='write')
+    batch.flush()
+    
+    mismatches = METRICS.items.get(stage='validate', outcome='zone_mismatch') - mismatches_before
+    if mismatches:
+        print(f"Skipped {mismatches} detailed zone records scraped with stale zone codes; "
+              f"re-run scrape_gardenate_details.py to refresh them")
     
     print("Integration complete!")
 
@@ -252,4 +324,6 @@ if __name__ == "__main__":
     if not os.path.exists(DETAILED_DATA_DIR):
         print(f"Detailed data directory '{DETAILED_DATA_DIR}' not found. Please run scrape_gardenate_details.py first.")
     else:
-        integrate_detailed_data() 
\ No newline at end of file
+        profile_from_argv()
+        integrate_detailed_data()
+        METRICS.finish("integrate_detailed_data") 
\ No newline at end of file
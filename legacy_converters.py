@@ -0,0 +1,274 @@
+import dataclasses
+import json
+import os
+import sys
+import time
+
+from atomic_io import DirectorySyncBatch, write_json
+from climate_zones import CORE_ZONES, ZONES
+from integrate_detailed_data import (detail_matches_zone, extract_avoid_plants, extract_companion_plants,
+                                     extract_harvest_time, extract_soil_temperature, extract_spacing,
+                                     parse_harvest_range, parse_soil_temperature_range, parse_spacing_range)
+from pipeline_metrics import METRICS
+from plant_model import MONTHS, Calendar, GrowingInfo, Plant, ZoneProfile
+from plant_names import name_key
+
+OUTPUT_DIR = 'garden_data_canonical'
+
+# Every legacy shape in the repo, in merge order: a field already filled by an earlier source
+# is kept, so the curated catalogue wins over the single-zone extractions and the scraped details
+SOURCES = [
+    ('garden_data', 'all_'),
+    (os.path.join('gardenate_data', 'processed'), ''),
+    ('gardenate_detailed_data', ''),
+]
+# Lists of plants that repeat files already read from the same directory
+SKIP_FILES = {'all_plants.json', 'all_detailed_data.json', 'selected_plants_data.json'}
+
+# The catalogue numbers its ten zones alphabetically; zones only the scraped details cover follow
+ZONE_NUMBERS = {name: i for i, name in enumerate(sorted(CORE_ZONES) + sorted(set(ZONES) - set(CORE_ZONES)))}
+
+_EMPTY_CALENDAR = Calendar.from_dict(dict.fromkeys(MONTHS, []))
+
+
+def _zone_profile(zone_name, plant_name, **fields):
+    """A ZoneProfile with every field the legacy shape does not have left empty"""
+    fields.setdefault('growing_info', GrowingInfo('', '', '', ()))
+    return ZoneProfile(**{
+        "zone_name": sys.intern(zone_name),
+        "zone_number": ZONE_NUMBERS.get(zone_name, -1),
+        "plant_name": sys.intern(plant_name),
+        "alternative_names": (),
+        "scientific_name": '',
+        "family": '',
+        "climate_zone": sys.intern(zone_name),
+        "calendar": _EMPTY_CALENDAR,
+        "companion_plants": (),
+        "avoid_plants": (),
+        "culinary_hints": (),
+        **fields,
+    })
+
+
+def _strip_bullet(text):
+    """Drop the '- ' list markers the early extractors left on the first item of a list"""
+    return text.lstrip('-').strip()
+
+
+# --- garden_data/all_<plant>.json: {"name", "zones": [{"zone_name", "zone_number", "data"}]}
+
+def is_catalogue_plant(data):
+    if isinstance(data, list):
+        return bool(data) and all(is_catalogue_plant(plant) for plant in data)
+    return isinstance(data, dict) and 'name' in data and isinstance(data.get('zones'), list)
+
+
+def _catalogue_profile(plant_name, zone):
+    profile = ZoneProfile.from_dict({
+        "zone_name": zone['zone_name'],
+        "zone_number": zone['zone_number'],
+        "data": {"alternative_names": [], **zone['data']},
+    })
+    # The first extractor took the site name for the plant's and 'Unknown' for the zone's
+    return dataclasses.replace(profile, plant_name=plant_name,
+                               climate_zone=profile.zone_name if profile.climate_zone == 'Unknown' else profile.climate_zone)
+
+
+def convert_catalogue_plant(data):
+    for plant in data if isinstance(data, list) else [data]:
+        name = sys.intern(plant['name'])
+        yield Plant(name=name, zones=tuple(_catalogue_profile(name, zone) for zone in plant['zones']))
+
+
+# --- gardenate_data/processed/*.json: one plant in one zone, months as "Jan": "ST"
+
+def is_processed_plant(data):
+    return isinstance(data, dict) and 'planting_calendar' in data
+
+
+def convert_processed_plant(data):
+    growing_info = data.get('growing_info', {})
+    companions = data.get('companion_planting', {})
+    profile = _zone_profile(
+        data['climate_zone'], data['plant_name'],
+        alternative_names=tuple(sys.intern(name) for name in data.get('alternate_names', [])),
+        calendar=Calendar.from_dict({
+            month: [code for code in data['planting_calendar'].get(month.capitalize(), '') if code in 'STP']
+            for month in MONTHS
+        }),
+        growing_info=GrowingInfo(
+            soil_temperature=extract_soil_temperature(growing_info.get('soil_temp', '')),
+            spacing=extract_spacing(_strip_bullet(growing_info.get('spacing', ''))),
+            harvest_time=extract_harvest_time(_strip_bullet(growing_info.get('harvest_time', ''))),
+            additional_notes=tuple(data.get('growing_notes', [])),
+        ),
+        companion_plants=tuple(_strip_bullet(name) for name in companions.get('compatible_with', [])),
+        avoid_plants=tuple(_strip_bullet(name) for name in companions.get('avoid_growing_close_to', [])),
+        culinary_hints=tuple(hint for hint in data.get('culinary_hints', [])
+                             if not hint.startswith('- cooking and eating')),
+    )
+    yield Plant(name=profile.plant_name, zones=(profile,))
+
+
+# --- gardenate_detailed_data/<plant>.json: {zone name: {"sowing", "spacing", "harvest", ...}}
+
+def _is_detailed_record(record):
+    return isinstance(record, dict) and 'zone_name' in record and 'sowing' in record
+
+
+def is_detailed_plant(data):
+    return isinstance(data, dict) and bool(data) and all(_is_detailed_record(record) for record in data.values())
+
+
+def convert_detailed_plant(data):
+    profiles = []
+    for zone_name, record in data.items():
+        # A record fetched with another zone's code holds that zone's page
+        if not detail_matches_zone(record, zone_name):
+            METRICS.items.inc(stage='validate', outcome='zone_mismatch')
+            continue
+        profiles.append(_zone_profile(
+            zone_name, record['plant_name'],
+            growing_info=GrowingInfo(
+                soil_temperature=extract_soil_temperature(record.get('sowing', '')),
+                spacing=extract_spacing(record.get('spacing', '')) if record.get('spacing') else '',
+                harvest_time=extract_harvest_time(record.get('harvest', '')) if record.get('harvest') else '',
+                additional_notes=(),
+            ),
+            companion_plants=tuple(extract_companion_plants(record.get('companion', ''))),
+            avoid_plants=tuple(extract_avoid_plants(record.get('avoid', ''))),
+        ))
+    yield Plant(name=sys.intern(next(iter(data.values()))['plant_name']), zones=tuple(profiles))
+
+
+# Shape name -> (detector, converter yielding Plant records); detectors are tried in order
+CONVERTERS = {
+    "catalogue": (is_catalogue_plant, convert_catalogue_plant),
+    "processed": (is_processed_plant, convert_processed_plant),
+    "detailed": (is_detailed_plant, convert_detailed_plant),
+}
+
+
+def detect_shape(data):
+    """Name of the converter that reads data, or None"""
+    return next((name for name, (detect, _) in CONVERTERS.items() if detect(data)), None)
+
+
+def convert(data):
+    """(shape, Plant records) for one parsed legacy file; ValueError if no converter knows its shape"""
+    shape = detect_shape(data)
+    if shape is None:
+        raise ValueError("unrecognised plant data shape")
+    return shape, CONVERTERS[shape][1](data)
+
+
+def _is_empty(value):
+    if isinstance(value, Calendar):
+        return not any(value.months)
+    return value in ('', (), None)
+
+
+def merge_profiles(base, extra):
+    """base with each empty field filled from extra, growing_info field by field"""
+    changes = {}
+    for field in dataclasses.fields(ZoneProfile):
+        if field.name in ('zone_name', 'zone_number', 'plant_name', 'growing_info'):
+            continue
+        value = getattr(base, field.name)
+        if _is_empty(value) and not _is_empty(getattr(extra, field.name)):
+            changes[field.name] = getattr(extra, field.name)
+    growing_changes = {
+        field.name: getattr(extra.growing_info, field.name)
+        for field in dataclasses.fields(GrowingInfo)
+        if _is_empty(getattr(base.growing_info, field.name)) and not _is_empty(getattr(extra.growing_info, field.name))
+    }
+    if growing_changes:
+        changes['growing_info'] = dataclasses.replace(base.growing_info, **growing_changes)
+    return dataclasses.replace(base, **changes) if changes else base
+
+
+def _with_numeric_fields(growing_info):
+    """Fill the numeric ranges from the text fields, as integrate_detailed_data does"""
+    def parsed(current, parser, text):
+        if current is not None:
+            return current
+        value = parser(text)
+        return None if value is None else (value['min'], value['max'])
+
+    return dataclasses.replace(
+        growing_info,
+        soil_temperature_c=parsed(growing_info.soil_temperature_c, parse_soil_temperature_range, growing_info.soil_temperature),
+        spacing_cm=parsed(growing_info.spacing_cm, parse_spacing_range, growing_info.spacing),
+        harvest_weeks=parsed(growing_info.harvest_weeks, parse_harvest_range, growing_info.harvest_time),
+        has_numeric=True,
+    )
+
+
+def legacy_files(sources=SOURCES):
+    """Paths of every legacy file, source by source"""
+    for directory, prefix in sources:
+        if not os.path.isdir(directory):
+            continue
+        for file_name in sorted(os.listdir(directory)):
+            if file_name.startswith(prefix) and file_name.endswith('.json') and file_name not in SKIP_FILES:
+                yield os.path.join(directory, file_name)
+
+
+def convert_legacy_data(paths):
+    """Read every file once and merge its profiles into canonical Plant records.
+
+    Plants are matched on their name key (see plant_names.py), so "Tomatoes" in one shape and
+    "Tomato" in another become one plant, named as the first source names it. Returns
+    (plants sorted by name, {shape: files read, "unrecognised": [paths]}).
+    """
+    plants = {}
+    stats = dict.fromkeys(CONVERTERS, 0)
+    stats["unrecognised"] = []
+    for path in paths:
+        with open(path, 'r') as f:
+            data = json.load(f)
+        try:
+            shape, converted = convert(data)
+        except ValueError:
+            stats["unrecognised"].append(path)
+            continue
+        stats[shape] += 1
+        for plant in converted:
+            _, zones = plants.setdefault(name_key(plant.name), (plant.name, {}))
+            for profile in plant.zones:
+                current = zones.get(profile.zone_name)
+                zones[profile.zone_name] = profile if current is None else merge_profiles(current, profile)
+
+    records = []
+    for name, zones in sorted(plants.values()):
+        profiles = []
+        for profile in sorted(zones.values(), key=lambda profile: profile.zone_number):
+            scientific = profile.scientific_name.casefold()
+            # The single-zone extractions listed the scientific name as an alternative one
+            alternatives = tuple(alt for alt in profile.alternative_names if alt.casefold() != scientific)
+            profiles.append(dataclasses.replace(profile, plant_name=name, alternative_names=alternatives,
+                                                growing_info=_with_numeric_fields(profile.growing_info)))
+        records.append(Plant(name=name, zones=tuple(profiles)))
+    return records, stats
+
+
+def write_canonical_catalogue(plants, output_dir=OUTPUT_DIR):
+    """One all_<plant>.json per plant, in the integrated catalogue's format"""
+    os.makedirs(output_dir, exist_ok=True)
+    with DirectorySyncBatch() as batch:
+        for plant in plants:
+            write_json(os.path.join(output_dir, f"all_{plant.name.replace('/', '-')}.json"), plant.to_dict(),
+                       batch=batch, indent=2)
+    return {"plants": len(plants), "zones": sum(len(plant.zones) for plant in plants)}
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    plants, stats = convert_legacy_data(legacy_files())
+    converted = time.perf_counter() - start
+    output_dir = sys.argv[1] if len(sys.argv) > 1 else OUTPUT_DIR
+    written = write_canonical_catalogue(plants, output_dir)
+    print(f"Converted {', '.join(f'{stats[shape]} {shape}' for shape in CONVERTERS)} files in {converted:.2f}s; "
+          f"wrote {written['plants']} plants / {written['zones']} zones to {output_dir}/")
+    for path in stats["unrecognised"]:
+        print(f"Skipped {path}: unrecognised shape")
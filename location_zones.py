@@ -0,0 +1,260 @@
+import csv
+import functools
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+
+from climate_zones import ZONES
+
+HARDINESS_ZONES_FILE = os.path.join('server', 'data', 'hardiness-zones.json')
+REFERENCE_POINTS_FILE = os.path.join('server', 'data', 'zone-reference-points.json')
+
+EARTH_RADIUS_KM = 6371.0
+
+# A reference point this close decides the USDA zone outright; one further away than
+# NEAREST_MAX_KM is not trusted over the latitude estimate
+REFERENCE_RADIUS_KM = 40
+NEAREST_MAX_KM = 300
+# Beyond this distance from every reference point the country is unknown
+COUNTRY_MAX_KM = 800
+# Beyond this distance from the nearest reference with a Gardenate zone, that zone is approximate
+GARDENATE_MAX_KM = 400
+
+# Coordinates are rounded like the server's zone cache keys (about 1 km), so a bulk import
+# with many users in the same town resolves each town once
+COORDINATE_PRECISION = 2
+
+GARDENATE_USDA_PREFIXES = {'us': 'USA - ', 'ca': 'Canada - '}
+USDA_ZONE_PATTERN = re.compile(r'zone (\d+[ab])', re.I)
+
+
+def _unit_vector(lat, lng):
+    lat, lng = math.radians(lat), math.radians(lng)
+    return (math.cos(lat) * math.cos(lng), math.cos(lat) * math.sin(lng), math.sin(lat))
+
+
+def _chord_to_km(chord_squared):
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(chord_squared) / 2))
+
+
+class KDTree:
+    """Nearest-neighbour search over points on the globe.
+
+    Points are stored as 3-D unit vectors, so distances are straight-line chords: they order
+    points exactly like great-circle distances and need no special case at the antimeridian.
+    """
+
+    def __init__(self, coordinates):
+        self.vectors = [_unit_vector(lat, lng) for lat, lng in coordinates]
+        self.root = self._build(list(range(len(self.vectors))), 0)
+
+    def _build(self, ids, depth):
+        if not ids:
+            return None
+        axis = depth % 3
+        ids.sort(key=lambda i: self.vectors[i][axis])
+        middle = len(ids) // 2
+        return (ids[middle], axis, self._build(ids[:middle], depth + 1), self._build(ids[middle + 1:], depth + 1))
+
+    def nearest(self, lat, lng):
+        """(index of the nearest point, distance in km), or (None, inf) for an empty tree"""
+        x, y, z = query = _unit_vector(lat, lng)
+        best_id, best = None, math.inf
+        # (subtree, squared distance from the query to the plane that separates it)
+        stack = [(self.root, 0.0)]
+        while stack:
+            node, plane = stack.pop()
+            if node is None or plane >= best:
+                continue
+            point_id, axis, left, right = node
+            px, py, pz = self.vectors[point_id]
+            distance = (x - px) ** 2 + (y - py) ** 2 + (z - pz) ** 2
+            if distance < best:
+                best_id, best = point_id, distance
+            offset = query[axis] - self.vectors[point_id][axis]
+            near, far = (left, right) if offset < 0 else (right, left)
+            stack.append((far, offset * offset))
+            stack.append((near, 0.0))
+        return best_id, (_chord_to_km(best) if best_id is not None else math.inf)
+
+
+class RectangleGrid:
+    """Point-in-rectangle lookup for the lat/lng ranges in hardiness-zones.json's geo_zones.
+
+    Each rectangle is listed in every 1° cell it overlaps, smallest first, so a lookup checks a
+    handful of candidates and the most specific rectangle wins where they overlap.
+    """
+
+    def __init__(self, rectangles):
+        self.rectangles = rectangles
+        self.cells = {}
+        by_area = sorted(range(len(rectangles)), key=lambda i: (self._area(rectangles[i]), i))
+        for i in by_area:
+            (lat_min, lat_max), (lng_min, lng_max) = rectangles[i]['lat_range'], rectangles[i]['lng_range']
+            for lat_cell in range(math.floor(lat_min), math.floor(lat_max) + 1):
+                for lng_cell in range(math.floor(lng_min), math.floor(lng_max) + 1):
+                    self.cells.setdefault((lat_cell, lng_cell), []).append(i)
+
+    @staticmethod
+    def _area(rectangle):
+        (lat_min, lat_max), (lng_min, lng_max) = rectangle['lat_range'], rectangle['lng_range']
+        return (lat_max - lat_min) * (lng_max - lng_min)
+
+    def find(self, lat, lng):
+        """The smallest rectangle containing the point, or None"""
+        for i in self.cells.get((math.floor(lat), math.floor(lng)), ()):
+            (lat_min, lat_max), (lng_min, lng_max) = self.rectangles[i]['lat_range'], self.rectangles[i]['lng_range']
+            if lat_min <= lat <= lat_max and lng_min <= lng <= lng_max:
+                return self.rectangles[i]
+        return None
+
+
+def estimate_usda_zone_from_latitude(lat):
+    """Last resort, the same bands as estimateZoneFromLatitude() in growing-data-service.js"""
+    bands = [(26, '11a'), (28, '10b'), (30, '10a'), (32, '9b'), (34, '9a'), (36, '8b'), (38, '8a'),
+             (40, '7b'), (42, '7a'), (44, '6b'), (46, '6a'), (48, '5b'), (50, '5a'), (52, '4b'),
+             (54, '4a'), (56, '3b'), (58, '3a'), (60, '2b'), (65, '2a')]
+    return next((zone for limit, zone in bands if abs(lat) < limit), '1a')
+
+
+class LocationZoneResolver:
+    """Resolve coordinates to a USDA hardiness zone and the Gardenate zone to use for them.
+
+    USDA zone: a reference point within REFERENCE_RADIUS_KM, else the most specific geo_zones
+    rectangle, else the nearest reference point within NEAREST_MAX_KM, else the latitude bands.
+
+    Gardenate zone: in Australia, New Zealand, the UK and South Africa, the zone of the nearest
+    reference point in the same country; in the USA and Canada, the zone named after the USDA
+    zone. Elsewhere the USA zone with the same USDA zone is the closest analogue, and the result
+    is marked approximate.
+    """
+
+    def __init__(self, hardiness_zones, reference_points):
+        self.usda_zones = list(hardiness_zones['zones'])
+        self.grid = RectangleGrid(hardiness_zones.get('geo_zones', []))
+
+        cities = hardiness_zones.get('cities', {})
+        self.points = [dict(point, usda=point.get('usda') or cities.get(point['name'])) for point in reference_points]
+        self.tree = KDTree([(point['lat'], point['lng']) for point in self.points])
+
+        # One tree per country whose Gardenate zones come from reference points
+        self.country_trees = {}
+        for country in sorted({point['country'] for point in self.points if point.get('gardenate_zone')}):
+            ids = [i for i, point in enumerate(self.points) if point['country'] == country and point.get('gardenate_zone')]
+            self.country_trees[country] = (ids, KDTree([(self.points[i]['lat'], self.points[i]['lng']) for i in ids]))
+
+        self.usda_gardenate_zones = {}
+        for country, prefix in GARDENATE_USDA_PREFIXES.items():
+            self.usda_gardenate_zones[country] = {
+                USDA_ZONE_PATTERN.search(name).group(1).lower(): name
+                for name in ZONES if name.startswith(prefix) and USDA_ZONE_PATTERN.search(name)
+            }
+
+        self._resolve_rounded = functools.lru_cache(maxsize=65536)(self._resolve)
+
+    @classmethod
+    def from_files(cls, hardiness_zones_file=HARDINESS_ZONES_FILE, reference_points_file=REFERENCE_POINTS_FILE):
+        with open(hardiness_zones_file, 'r') as f:
+            hardiness_zones = json.load(f)
+        with open(reference_points_file, 'r') as f:
+            reference_points = json.load(f)['points']
+        return cls(hardiness_zones, reference_points)
+
+    def _usda_gardenate_zone(self, country, usda_zone):
+        """The country's Gardenate zone for usda_zone, or for the closest USDA zone it has"""
+        zones = self.usda_gardenate_zones[country]
+        if usda_zone in zones:
+            return zones[usda_zone]
+        target = self.usda_zones.index(usda_zone)
+        closest = min(zones, key=lambda zone: abs(self.usda_zones.index(zone) - target))
+        return zones[closest]
+
+    def resolve(self, lat, lng):
+        """{usda_zone, usda_source, gardenate_zone, gardenate_code, country, nearest, distance_km, approximate}"""
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise ValueError(f"Not a latitude/longitude: {lat}, {lng}")
+        return self._resolve_rounded(round(lat, COORDINATE_PRECISION), round(lng, COORDINATE_PRECISION))
+
+    def resolve_many(self, coordinates):
+        """Resolve an iterable of (lat, lng) pairs"""
+        return [self.resolve(lat, lng) for lat, lng in coordinates]
+
+    def _resolve(self, lat, lng):
+        nearest_id, distance = self.tree.nearest(lat, lng)
+        nearest = self.points[nearest_id] if nearest_id is not None else None
+
+        if nearest and nearest['usda'] and distance <= REFERENCE_RADIUS_KM:
+            usda_zone, usda_source = nearest['usda'], 'reference'
+        elif (rectangle := self.grid.find(lat, lng)) is not None:
+            usda_zone, usda_source = rectangle['zone'], 'geo_zone'
+        elif nearest and nearest['usda'] and distance <= NEAREST_MAX_KM:
+            usda_zone, usda_source = nearest['usda'], 'nearest_reference'
+        else:
+            usda_zone, usda_source = estimate_usda_zone_from_latitude(lat), 'latitude'
+
+        country = nearest['country'] if nearest and distance <= COUNTRY_MAX_KM else None
+        if country in self.country_trees:
+            ids, tree = self.country_trees[country]
+            point_id, gardenate_distance = tree.nearest(lat, lng)
+            gardenate_zone = self.points[ids[point_id]]['gardenate_zone']
+            approximate = gardenate_distance > GARDENATE_MAX_KM
+        else:
+            gardenate_zone = self._usda_gardenate_zone(country if country in GARDENATE_USDA_PREFIXES else 'us', usda_zone)
+            approximate = country not in GARDENATE_USDA_PREFIXES
+
+        return {
+            "lat": lat,
+            "lng": lng,
+            "usda_zone": usda_zone,
+            "usda_source": usda_source,
+            "gardenate_zone": gardenate_zone,
+            "gardenate_code": ZONES[gardenate_zone],
+            "country": country,
+            "nearest": nearest['name'] if nearest else None,
+            "distance_km": round(distance, 1),
+            "approximate": approximate,
+        }
+
+
+CSV_FIELDS = ['usda_zone', 'usda_source', 'gardenate_zone', 'gardenate_code', 'country', 'approximate']
+
+
+def resolve_csv(resolver, input_file, output_file):
+    """Add zone columns to a CSV with lat/lng (or latitude/longitude) columns, row by row"""
+    reader = csv.DictReader(input_file)
+    lat_field = next(field for field in reader.fieldnames if field.lower() in ('lat', 'latitude'))
+    lng_field = next(field for field in reader.fieldnames if field.lower() in ('lng', 'lon', 'long', 'longitude'))
+    writer = csv.DictWriter(output_file, fieldnames=reader.fieldnames + CSV_FIELDS)
+    writer.writeheader()
+    rows = 0
+    for row in reader:
+        result = resolver.resolve(float(row[lat_field]), float(row[lng_field]))
+        writer.writerow({**row, **{field: result[field] for field in CSV_FIELDS}})
+        rows += 1
+    return rows
+
+
+if __name__ == "__main__":
+    resolver = LocationZoneResolver.from_files()
+
+    if len(sys.argv) > 2 and sys.argv[1] == '--csv':
+        with open(sys.argv[2], 'r', newline='') as f:
+            rows = resolve_csv(resolver, f, sys.stdout)
+        print(f"Resolved {rows} locations", file=sys.stderr)
+    elif len(sys.argv) > 1 and sys.argv[1] == '--bench':
+        count = int(sys.argv[2]) if len(sys.argv) > 2 else 100000
+        rng = random.Random(0)
+        coordinates = [(rng.uniform(-60, 70), rng.uniform(-180, 180)) for _ in range(count)]
+        start = time.perf_counter()
+        resolver.resolve_many(coordinates)
+        elapsed = time.perf_counter() - start
+        print(f"Resolved {count} random locations in {elapsed:.2f}s ({count / elapsed:,.0f}/s)")
+    elif len(sys.argv) == 3:
+        print(json.dumps(resolver.resolve(float(sys.argv[1]), float(sys.argv[2])), indent=2))
+    else:
+        print("Usage: python location_zones.py LAT LNG | --csv FILE | --bench [N]")
+        sys.exit(1)
@@ -0,0 +1,358 @@
+import argparse
+import datetime
+import os
+import re
+import sys
+
+from catalogue_io import load_plants_from_dir
+from dataset_delta import plant_hash
+from plant_names import name_key
+
+# Same database and collection as the server's Plant model (server/models/Plant.js)
+DEFAULT_URI = os.environ.get('MONGODB_URI') or os.environ.get('DATABASE_URL') or 'mongodb://localhost:27017/plantperfectly'
+DEFAULT_DATABASE = 'plantperfectly'
+COLLECTION = 'plants'
+INPUT_DIR = 'garden_data_enhanced'
+
+BATCH_SIZE = 500
+
+# Hash of the document this exporter last wrote; a plant whose hash is unchanged is skipped
+HASH_FIELD = 'gardenate_hash'
+
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+MONTH_NAMES = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+
+# Gardenate calendar codes and the planting types the app uses
+CALENDAR_CODE_MAPPING = {
+    'S': 'indoor_seed',  # Plant undercover in seed trays
+    'T': 'transplant',   # Transplant seedlings
+    'P': 'direct_sow',   # Plant directly in the ground
+}
+
+# Zones whose calendar becomes the growing_calendar notes, as in integrateGardenateData.js
+NOTES_ZONE_PREFERENCE = ['Australia - temperate', 'Australia - sub-tropical', 'Australia - cool/mountain']
+
+FAMILY_TAGS = [
+    (('solanaceae',), 'nightshade'),
+    (('brassicaceae', 'cruciferae'), 'brassica'),
+    (('apiaceae', 'umbelliferae'), 'umbelliferous'),
+    (('fabaceae', 'leguminosae'), 'legume'),
+    (('cucurbitaceae',), 'cucurbit'),
+    (('asteraceae', 'compositae'), 'composite'),
+    (('lamiaceae', 'labiatae'), 'herb'),
+    (('alliaceae', 'amaryllidaceae'), 'allium'),
+]
+
+# Fields of an existing document that are only filled in when they are empty
+FILL_IF_EMPTY = {
+    'scientific_name': lambda value: bool(value),
+    'description': lambda value: bool(value),
+    'plant_family': lambda value: bool(value),
+    'culinary_uses': lambda value: bool(value),
+    'companion_plants': lambda value: bool(value),
+    'spacing': lambda value: bool(value and value.get('plants')),
+    'days_to_maturity': lambda value: bool(value and value.get('min')),
+}
+
+
+def format_monthly_calendar(monthly_calendar):
+    """Turn {"jan": ["S", "T"], ...} into {"indoor_seed": [0, ...], "direct_sow": [...], "transplant": [...]}"""
+    formatted = {'indoor_seed': [], 'direct_sow': [], 'transplant': []}
+    for month, codes in monthly_calendar.items():
+        month_number = MONTHS.index(month.lower())
+        for code in codes or []:
+            planting_type = CALENDAR_CODE_MAPPING.get(code)
+            if planting_type and month_number not in formatted[planting_type]:
+                formatted[planting_type].append(month_number)
+    for months in formatted.values():
+        months.sort()
+    return formatted
+
+
+def format_spacing(spacing_text):
+    numbers = [int(number) for number in re.findall(r'\d+', spacing_text or '')]
+    if not numbers:
+        return {'plants': None, 'rows': None}
+    return {'plants': numbers[0], 'rows': numbers[1] if len(numbers) > 1 else numbers[0]}
+
+
+def format_harvest_time(harvest_text):
+    numbers = [int(number) for number in re.findall(r'\d+', harvest_text or '')]
+    if not numbers:
+        return {'min': None, 'max': None}
+    return {'min': min(numbers[:2]), 'max': max(numbers[:2])}
+
+
+def format_growing_requirements(growing_info):
+    requirements = {
+        'sunlight': 'full sun',
+        'soil_ph': {'min': None, 'max': None},
+        'soil_type': [],
+        'water_needs': 'moderate',
+        'min_temperature': None,
+        'max_temperature': None,
+        'soil_temperature': {'min': None, 'optimal': None, 'maximum': None},
+    }
+
+    soil_temperature_c = growing_info.get('soil_temperature_c')
+    match = re.search(r'(\d+)°C and (\d+)°C', growing_info.get('soil_temperature') or '')
+    if soil_temperature_c:
+        low, high = soil_temperature_c['min'], soil_temperature_c['max']
+    elif match:
+        low, high = int(match.group(1)), int(match.group(2))
+    else:
+        low = high = None
+    if low is not None:
+        requirements['soil_temperature'] = {'min': low, 'optimal': (low + high) / 2, 'maximum': high}
+
+    for note in growing_info.get('additional_notes') or []:
+        note = note.lower()
+        if 'shade' in note or 'partial sun' in note:
+            requirements['sunlight'] = 'partial shade'
+        if 'full shade' in note:
+            requirements['sunlight'] = 'full shade'
+        if 'water' in note and 'regular' in note:
+            requirements['water_needs'] = 'high'
+        if 'drought' in note or 'dry' in note:
+            requirements['water_needs'] = 'low'
+    return requirements
+
+
+def format_plant(plant):
+    """Build a Plant document from an all_<plant>.json entry, as formatPlantData does in
+    server/scripts/integrateGardenateData.js; returns None for plants without zone data"""
+    zones = plant.get('zones') or []
+    first = zones[0].get('data') if zones else None
+    if not first:
+        return None
+
+    growing_info = first.get('growing_info') or {}
+    notes = growing_info.get('additional_notes') or []
+    culinary_hints = first.get('culinary_hints') or []
+    family = first.get('family') or ''
+    harvest_weeks = growing_info.get('harvest_weeks')
+
+    tags = [tag for families, tag in FAMILY_TAGS if any(name in family.lower() for name in families)]
+    if 'herb' not in tags:
+        tags.append('vegetable')
+
+    return {
+        'name': plant.get('name') or first.get('plant_name'),
+        'scientific_name': first.get('scientific_name') or '',
+        'description': ' '.join(notes),
+        'image_url': '',
+        'growing_requirements': format_growing_requirements(growing_info),
+        'growing_calendar': {
+            'indoor_seed_start': {'weeks_before_last_frost': None, 'notes': ''},
+            'direct_sow': {
+                'spring': {'weeks_from_last_frost': None, 'soil_temperature_required': None, 'notes': ''},
+                'fall': {'weeks_before_first_frost': None, 'notes': ''},
+            },
+            'transplant': {'weeks_after_last_frost': None, 'hardening_off_days': 7, 'notes': ''},
+            'succession_planting': {'recommended': False, 'interval_days': 14, 'max_plantings': 3, 'notes': ''},
+        },
+        'hardiness_zones': {'min': '1a', 'max': '13b'},
+        'microclimate_adjustments': {
+            'heat_sensitivity': 'moderate',
+            'cold_sensitivity': 'moderate',
+            'wind_sensitivity': 'moderate',
+            'shade_tolerance': 'moderate',
+        },
+        'life_cycle': 'annual',
+        'days_to_maturity': (
+            {'min': int(harvest_weeks['min'] * 7 + 0.5), 'max': int(harvest_weeks['max'] * 7 + 0.5)}
+            if harvest_weeks else format_harvest_time(growing_info.get('harvest_time'))
+        ),
+        'days_to_germination': {'min': None, 'max': None, 'optimal_temp': None},
+        'spacing': format_spacing(growing_info.get('spacing')),
+        'planting_depth': None,
+        'height': {'min': None, 'max': None},
+        'width': {'min': None, 'max': None},
+        'companion_plants': [
+            {'plant': None, 'relationship': 'beneficial', 'notes': 'Recommended companion plant from Gardenate'}
+            for _ in first.get('companion_plants') or []
+        ],
+        'pests': [],
+        'diseases': [],
+        'harvesting': {
+            'instructions': ' '.join(note for note in notes
+                                     if any(word in note.lower() for word in ('harvest', 'pick', 'collect'))),
+            'storage': ' '.join(hint for hint in culinary_hints
+                                if any(word in hint.lower() for word in ('store', 'keep', 'preserve'))),
+            'indicators': [],
+            'window_length': None,
+            'preservation_methods': [],
+        },
+        'edible_parts': [],
+        'culinary_uses': culinary_hints,
+        'tags': tags,
+        'community_success_rates': {'germination': None, 'yield': None, 'difficulty': 3},
+        'icon': 'default_plant',
+        'plant_family': family,
+        'plant_family_icon': '',
+        'gardenate_data': {
+            'monthly_calendars': {
+                zone['zone_name']: {
+                    'zone_number': zone.get('zone_number'),
+                    'calendar': format_monthly_calendar(zone['data']['monthly_calendar']),
+                }
+                for zone in zones if zone.get('data') and zone['data'].get('monthly_calendar')
+            },
+            'alternative_names': first.get('alternative_names') or [],
+            'notes': notes,
+        },
+    }
+
+
+def calendar_notes(document):
+    """Dotted-path $set entries for the growing_calendar notes on an existing plant"""
+    calendars = document['gardenate_data']['monthly_calendars']
+    zone_name = next((name for name in NOTES_ZONE_PREFERENCE if name in calendars), next(iter(calendars), None))
+    if zone_name is None:
+        return {}
+
+    calendar = calendars[zone_name]['calendar']
+    notes = {}
+    for planting_type, path, verb in (
+        ('indoor_seed', 'growing_calendar.indoor_seed_start.notes', 'starting indoors'),
+        ('transplant', 'growing_calendar.transplant.notes', 'transplanting'),
+        ('direct_sow', 'growing_calendar.direct_sow.spring.notes', 'direct sowing'),
+    ):
+        if calendar[planting_type]:
+            months = ', '.join(MONTH_NAMES[month] for month in calendar[planting_type])
+            notes[path] = f"Gardenate recommends {verb} in: {months}"
+    return notes
+
+
+def _first_word_key(name):
+    return name_key(name.split(' ')[0]) if name.strip() else ''
+
+
+def find_existing(documents_by_key, name, first_word_counts):
+    """Match a plant to an existing document by its full normalised name (see plant_names.name_key).
+
+    A document named after the plant's first word ("Beans" for "Beans - dwarf") is only used when no
+    other plant in the export starts with that word, so "Beans - climbing" and "Beans - dwarf" do
+    not both update one document.
+    """
+    existing = documents_by_key.get(name_key(name))
+    if existing is not None:
+        return existing
+    first_word = _first_word_key(name)
+    if first_word_counts.get(first_word) == 1:
+        return documents_by_key.get(first_word)
+    return None
+
+
+# What plan_operations needs to know about the documents already in the collection
+EXISTING_PROJECTION = {'name': 1, HASH_FIELD: 1, **{field: 1 for field in FILL_IF_EMPTY}}
+
+
+def plan_operations(plants, existing_documents, now=None):
+    """Return (update operations in order, counts) for plants against the current documents.
+
+    existing_documents only needs the fields in EXISTING_PROJECTION. New plants are upserted
+    whole; existing ones get their Gardenate data, calendar notes and any empty fields, unless
+    the document was written from identical data before.
+    """
+    from pymongo import UpdateOne
+
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    documents_by_key = {}
+    for document in existing_documents:
+        documents_by_key.setdefault(name_key(document.get('name', '')), document)
+
+    formatted = [format_plant(plant) for plant in plants]
+    first_word_counts = {}
+    for document in formatted:
+        if document is not None:
+            first_word = _first_word_key(document['name'])
+            first_word_counts[first_word] = first_word_counts.get(first_word, 0) + 1
+
+    operations = []
+    counts = {'created': 0, 'updated': 0, 'unchanged': 0, 'invalid': 0}
+    claimed = set()
+    for document in formatted:
+        if document is None:
+            counts['invalid'] += 1
+            continue
+        content_hash = plant_hash(document)
+        existing = find_existing(documents_by_key, document['name'], first_word_counts)
+        # Two plants whose names normalise alike must not take turns overwriting one document
+        if existing is not None and id(existing) in claimed:
+            existing = None
+        if existing is not None:
+            claimed.add(id(existing))
+
+        if existing is None:
+            operations.append(UpdateOne(
+                {'name': document['name']},
+                {'$setOnInsert': {**document, 'createdAt': now, '__v': 0},
+                 '$set': {HASH_FIELD: content_hash, 'updatedAt': now}},
+                upsert=True,
+            ))
+            counts['created'] += 1
+            continue
+
+        if existing.get(HASH_FIELD) == content_hash:
+            counts['unchanged'] += 1
+            continue
+
+        changes = {'gardenate_data': document['gardenate_data'], **calendar_notes(document)}
+        for field, is_set in FILL_IF_EMPTY.items():
+            if not is_set(existing.get(field)) and is_set(document[field]):
+                changes[field] = document[field]
+        operations.append(UpdateOne(
+            {'_id': existing['_id']},
+            {'$set': {**changes, HASH_FIELD: content_hash, 'updatedAt': now}},
+        ))
+        counts['updated'] += 1
+    return operations, counts
+
+
+
+def export_plants(collection, plants, batch_size=BATCH_SIZE, dry_run=False):
+    """Upsert plants into a pymongo (or mongomock) collection in ordered batches.
+
+    The existing documents are read in one query and every write goes through bulk_write, so a
+    full import costs one round trip plus one per batch_size changed plants.
+    """
+    operations, counts = plan_operations(plants, collection.find({}, EXISTING_PROJECTION))
+    counts['batches'] = 0
+    if dry_run:
+        return counts
+
+    for start in range(0, len(operations), batch_size):
+        collection.bulk_write(operations[start:start + batch_size], ordered=True)
+        counts['batches'] += 1
+    return counts
+
+
+def connect(uri=DEFAULT_URI):
+    """Return the plants collection; pymongo is only needed for this exporter"""
+    try:
+        from pymongo import MongoClient
+    except ImportError:
+        raise SystemExit("mongo_export.py needs pymongo: pip install pymongo")
+    client = MongoClient(uri)
+    return client.get_default_database(DEFAULT_DATABASE)[COLLECTION]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk-upsert the integrated catalogue into the plants collection")
+    parser.add_argument('--uri', default=DEFAULT_URI, help="MongoDB connection string (default: $MONGODB_URI)")
+    parser.add_argument('--input-dir', default=INPUT_DIR)
+    parser.add_argument('--batch-size', type=int, default=BATCH_SIZE)
+    parser.add_argument('--dry-run', action='store_true', help="Report what would change without writing")
+    args = parser.parse_args(argv)
+
+    plants = load_plants_from_dir(args.input_dir)
+    counts = export_plants(connect(args.uri), plants, args.batch_size, args.dry_run)
+    print(f"{len(plants)} plants: {counts['created']} created, {counts['updated']} updated, "
+          f"{counts['unchanged']} unchanged, {counts['invalid']} without zone data "
+          f"({counts['batches']} bulk writes{', dry run' if args.dry_run else ''})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
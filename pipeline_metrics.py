@@ -0,0 +1,225 @@
+import bisect
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+from atomic_io import atomic_open
+
+# Latency buckets in seconds, from fast parses up to slow fetches
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Set to a path ending in .prom for Prometheus text format, anything else for a JSON summary
+METRICS_FILE_ENV = 'PIPELINE_METRICS_FILE'
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self.values.get(tuple(sorted(labels.items())), 0)
+
+    def total(self):
+        return sum(self.values.values())
+
+
+class Histogram:
+    """Fixed-bucket histogram; observing a value is a bisect and two additions"""
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(key)
+            if series is None:
+                series = self.series[key] = {"counts": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            series["counts"][index] += 1
+            series["sum"] += value
+            series["count"] += 1
+
+    def quantile(self, q, **labels):
+        """Estimate a quantile as the upper bound of the bucket that contains it"""
+        series = self.series.get(tuple(sorted(labels.items())))
+        if not series or not series["count"]:
+            return None
+        target = q * series["count"]
+        seen = 0
+        for bound, count in zip(self.buckets + (float('inf'),), series["counts"]):
+            seen += count
+            if seen >= target:
+                return bound
+        return float('inf')
+
+
+class MetricsRegistry:
+    """Counters and histograms for one pipeline run, exportable as Prometheus text or JSON"""
+
+    def __init__(self, prefix='garden_pipeline'):
+        self.prefix = prefix
+        self.metrics = {}
+        self.started = time.time()
+
+        # Set by pipeline_profiler.profile_from_argv() when a script runs with --profile
+        self.profiler = None
+
+        self.stage_seconds = self.histogram('stage_seconds', "Time spent per item in each pipeline stage")
+        self.items = self.counter('items_total', "Items processed per stage and outcome")
+        self.bytes_in = self.counter('bytes_in_total', "Bytes read per stage")
+        self.bytes_out = self.counter('bytes_out_total', "Bytes written per stage")
+        self.cache = self.counter('cache_requests_total', "Cache lookups by result (hit or miss)")
+        self.retries = self.counter('retries_total', "Retried requests by reason")
+
+    def counter(self, name, help_text):
+        return self.metrics.setdefault(name, Counter(name, help_text))
+
+    def histogram(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        return self.metrics.setdefault(name, Histogram(name, help_text, buckets))
+
+    @contextmanager
+    def time_stage(self, stage):
+        """Time one item of a stage; the item is counted as an error if the block raises"""
+        profiler = self.profiler
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            if profiler is None:
+                yield
+            else:
+                with profiler.stage(stage):
+                    yield
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            self.stage_seconds.observe(time.perf_counter() - start, stage=stage)
+            self.items.inc(stage=stage, outcome=outcome)
+
+    def cache_ratio(self):
+        hits = self.cache.get(result="hit")
+        total = hits + self.cache.get(result="miss")
+        return hits / total if total else None
+
+    def to_prometheus(self):
+        """Render every metric in the Prometheus text exposition format"""
+        lines = []
+        for metric in self.metrics.values():
+            full_name = f"{self.prefix}_{metric.name}"
+            if isinstance(metric, Counter):
+                lines.append(f"# HELP {full_name} {metric.help_text}")
+                lines.append(f"# TYPE {full_name} counter")
+                for key, value in sorted(metric.values.items()):
+                    lines.append(f"{full_name}{_format_labels(key)} {value}")
+            else:
+                lines.append(f"# HELP {full_name} {metric.help_text}")
+                lines.append(f"# TYPE {full_name} histogram")
+                for key, series in sorted(metric.series.items()):
+                    cumulative = 0
+                    for bound, count in zip(metric.buckets + (float('inf'),), series["counts"]):
+                        cumulative += count
+                        le = "+Inf" if bound == float('inf') else repr(bound)
+                        lines.append(f"{full_name}_bucket{_format_labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{full_name}_sum{_format_labels(key)} {series['sum']}")
+                    lines.append(f"{full_name}_count{_format_labels(key)} {series['count']}")
+        return "\n".join(lines) + "\n"
+
+    def to_summary(self):
+        """Summarize the run per stage: counts, throughput, latency percentiles and bytes"""
+        elapsed = time.time() - self.started
+        stages = {}
+        for key, series in self.stage_seconds.series.items():
+            stage = dict(key)["stage"]
+            stages[stage] = {
+                "items": series["count"],
+                "errors": self.items.get(stage=stage, outcome="error"),
+                "seconds": round(series["sum"], 4),
+                "items_per_second": round(series["count"] / series["sum"], 2) if series["sum"] else None,
+                "p50_seconds": self.stage_seconds.quantile(0.5, stage=stage),
+                "p95_seconds": self.stage_seconds.quantile(0.95, stage=stage),
+                "bytes_in": self.bytes_in.get(stage=stage),
+                "bytes_out": self.bytes_out.get(stage=stage),
+            }
+        return {
+            "elapsed_seconds": round(elapsed, 3),
+            "stages": stages,
+            "cache_hit_ratio": self.cache_ratio(),
+            "retries": {dict(key).get("reason", ""): value for key, value in self.retries.values.items()},
+        }
+
+    def finish(self, run_name):
+        """Print a one-line summary and write the metrics file if PIPELINE_METRICS_FILE is set"""
+        summary = self.to_summary()
+        parts = [f"{stage}: {info['items']} in {info['seconds']:.2f}s" for stage, info in summary["stages"].items()]
+        print(f"{run_name} finished in {summary['elapsed_seconds']:.1f}s ({'; '.join(parts) or 'no items'})")
+
+        metrics_file = os.environ.get(METRICS_FILE_ENV)
+        if metrics_file:
+            with atomic_open(metrics_file) as f:
+                if metrics_file.endswith('.prom'):
+                    f.write(self.to_prometheus())
+                else:
+                    json.dump({"run": run_name, **summary}, f, indent=2)
+            print(f"Metrics written to {metrics_file}")
+
+        if self.profiler is not None:
+            self.profiler.finish()
+            self.profiler = None
+        return summary
+
+
+def _format_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{name}="{value}"' for name, value in key) + "}"
+
+
+class Progress:
+    """Single-line progress display that redraws at most a few times per second"""
+
+    def __init__(self, total, label="", interval=0.5, stream=None):
+        self.total = total
+        self.label = label
+        self.interval = interval
+        self.stream = stream or sys.stderr
+        self.done = 0
+        self.started = time.perf_counter()
+        self.last_draw = 0.0
+
+    def update(self, amount=1, detail=""):
+        self.done += amount
+        now = time.perf_counter()
+        if now - self.last_draw >= self.interval or self.done >= self.total:
+            self.last_draw = now
+            self._draw(now, detail)
+
+    def _draw(self, now, detail):
+        elapsed = now - self.started
+        rate = self.done / elapsed * 60 if elapsed else 0.0
+        percent = self.done / self.total * 100 if self.total else 100.0
+        self.stream.write(f"\r{self.label} {self.done}/{self.total} ({percent:.0f}%, {rate:.0f}/min) {detail[:40]:<40}")
+        if self.done >= self.total:
+            self.stream.write("\n")
+        self.stream.flush()
+
+
+# Shared registry for the scripts in this directory
+METRICS = MetricsRegistry()
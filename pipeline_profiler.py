@@ -0,0 +1,169 @@
+import cProfile
+import io
+import linecache
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+# Directories
+PROFILE_DIR = 'profile'
+
+# Allocation tracing is expensive, so only every Nth invocation of a stage is traced
+SNAPSHOT_EVERY = 10
+TRACEBACK_DEPTH = 8
+
+
+class PipelineProfiler:
+    """Per-stage cProfile stats, sampled call stacks and tracemalloc allocation sites"""
+
+    def __init__(self, output_dir=PROFILE_DIR, top_n=20, sample_interval=0.005, snapshot_every=SNAPSHOT_EVERY):
+        self.output_dir = output_dir
+        self.top_n = top_n
+        self.sample_interval = sample_interval
+        self.snapshot_every = snapshot_every
+
+        self.profiles = {}
+        self.invocations = {}
+        self.allocations = {}
+        self.peaks = {}
+        self.stacks = {}
+        self.active = []
+
+        self._thread_id = None
+        self._sampler = None
+        self._stop = threading.Event()
+        # Guards self.active, which the stage thread pushes and pops while the sampler reads it
+        self._active_lock = threading.Lock()
+
+    def start(self):
+        """Start the stack sampler"""
+        self._thread_id = threading.get_ident()
+        self._sampler = threading.Thread(target=self._sample_loop, name="pipeline-profiler", daemon=True)
+        self._sampler.start()
+        return self
+
+    def _sample_loop(self):
+        while not self._stop.wait(self.sample_interval):
+            with self._active_lock:
+                stage = self.active[-1] if self.active else None
+            if stage is None:
+                continue
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            # Folded stacks run from the root outwards, under the active stage
+            key = ";".join([stage] + names[::-1])
+            self.stacks[key] = self.stacks.get(key, 0) + 1
+
+    @contextmanager
+    def stage(self, name):
+        """Profile one invocation of a stage; nested stages pause the outer stage's profile"""
+        profile = self.profiles.get(name)
+        if profile is None:
+            profile = self.profiles[name] = cProfile.Profile()
+        count = self.invocations.get(name, 0)
+        self.invocations[name] = count + 1
+
+        # Tracing only inside the sampled invocation keeps the snapshot down to what this
+        # call allocated, instead of diffing two snapshots of the whole heap
+        traced = count % self.snapshot_every == 0 and not tracemalloc.is_tracing()
+        if traced:
+            tracemalloc.start(TRACEBACK_DEPTH)
+
+        if self.active:
+            self.profiles[self.active[-1]].disable()
+        with self._active_lock:
+            self.active.append(name)
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._active_lock:
+                self.active.pop()
+            if self.active:
+                self.profiles[self.active[-1]].enable()
+            if traced:
+                snapshot = tracemalloc.take_snapshot()
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                self.peaks[name] = max(self.peaks.get(name, 0), peak)
+                self._record_allocations(name, snapshot)
+
+    def _record_allocations(self, name, snapshot):
+        """Accumulate the allocations a stage invocation left behind, per source line"""
+        sites = self.allocations.setdefault(name, {})
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__)]
+        for stat in snapshot.filter_traces(filters).statistics('lineno'):
+            frame = stat.traceback[0]
+            key = (frame.filename, frame.lineno)
+            size, count = sites.get(key, (0, 0))
+            sites[key] = (size + stat.size, count + stat.count)
+
+    def finish(self):
+        """Stop profiling and write pstats, folded stacks and allocation reports"""
+        self._stop.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        for name, profile in self.profiles.items():
+            profile.dump_stats(os.path.join(self.output_dir, f"{name}.pstats"))
+
+        # Folded stacks can be fed straight to flamegraph.pl or speedscope
+        with open(os.path.join(self.output_dir, 'stacks.folded'), 'w') as f:
+            for key, count in sorted(self.stacks.items()):
+                f.write(f"{key} {count}\n")
+
+        with open(os.path.join(self.output_dir, 'allocations.txt'), 'w') as f:
+            f.write(self.allocation_report())
+
+        report = self.time_report()
+        with open(os.path.join(self.output_dir, 'summary.txt'), 'w') as f:
+            f.write(report)
+        print(report)
+        print(f"Profile written to {self.output_dir}/ (per-stage .pstats, stacks.folded, allocations.txt)")
+
+    def time_report(self, limit=5):
+        """Top functions by cumulative time for each stage"""
+        out = io.StringIO()
+        for name, profile in self.profiles.items():
+            out.write(f"=== {name} ({self.invocations[name]} calls) ===\n")
+            stats = pstats.Stats(profile, stream=out)
+            stats.sort_stats('cumulative').print_stats(limit)
+        return out.getvalue()
+
+    def allocation_report(self):
+        """Top-N allocation sites (net bytes retained) for each stage"""
+        lines = []
+        for name, sites in self.allocations.items():
+            sampled = (self.invocations[name] + self.snapshot_every - 1) // self.snapshot_every
+            lines.append(f"=== {name} ({sampled} of {self.invocations[name]} calls traced, "
+                         f"peak {self.peaks.get(name, 0) / 1024:.1f} KiB) ===")
+            top_sites = sorted(sites.items(), key=lambda item: item[1][0], reverse=True)[:self.top_n]
+            for (filename, lineno), (size, count) in top_sites:
+                source = linecache.getline(filename, lineno).strip()
+                lines.append(f"{size / 1024:10.1f} KiB {count:8d} blocks  {filename}:{lineno}  {source}")
+            lines.append("")
+        return "\n".join(lines)
+
+
+def profile_from_argv(argv=None):
+    """Install a profiler on the shared metrics registry if --profile[=DIR] was passed"""
+    from pipeline_metrics import METRICS
+
+    for arg in (sys.argv[1:] if argv is None else argv):
+        if arg == '--profile' or arg.startswith('--profile='):
+            output_dir = arg.split('=', 1)[1] if '=' in arg else os.path.join(PROFILE_DIR, time.strftime('%Y%m%d-%H%M%S'))
+            METRICS.profiler = PipelineProfiler(output_dir).start()
+            return METRICS.profiler
+    return None
@@ -0,0 +1,220 @@
+import functools
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from urllib.parse import quote_plus
+
+from atomic_io import write_json
+from climate_zones import ZONES
+from crawl_state import CRAWL_STATE_DIR
+
+# Site to crawl; point this at replay_server.py for local tests
+BASE_URL = os.environ.get('GARDENATE_BASE_URL', 'https://www.gardenate.com').rstrip('/')
+INDEX_PATH = '/plants/'
+
+CATALOGUE_FILE = os.path.join(CRAWL_STATE_DIR, 'plant_catalogue.json')
+CATALOGUE_VERSION = 1
+
+# Plants known before discovery existed; used until plant_discovery.py has been run once
+KNOWN_PLANTS = [
+    "Amaranth", "Angelica", "Artichokes (Globe)", "Asparagus", "Asparagus Pea",
+    "Basil", "Beans - climbing", "Beans - dwarf", "Beetroot", "Borage", "Broad Beans",
+    "Broccoli", "Brussels sprouts", "Burdock", "Cabbage", "Cape Gooseberry", "Capsicum",
+    "Cardoon", "Carrot", "Cauliflower", "Celeriac", "Celery", "Chicory", "Chilli peppers",
+    "Chinese cabbage", "Chives", "Choko/Chayote", "Collards", "Coriander", "Corn Salad",
+    "Cowpeas", "Cucumber", "Daikon", "Dill", "Eggplant", "Endive", "Fennel", "Florence Fennel",
+    "French tarragon", "Garlic", "Ginger", "Horseradish", "Jerusalem Artichokes", "Kale",
+    "Kohlrabi", "Leeks", "Lemon Balm", "Lettuce", "Luffa", "Marrow", "Mint", "Mizuna",
+    "Mustard greens", "NZ Spinach", "Okra", "Onion", "Oregano", "Pak Choy", "Parsley",
+    "Parsnip", "Peas", "Potato", "Pumpkin", "Radish", "Rhubarb", "Rocket", "Rockmelon",
+    "Rosella", "Rosemary", "Rutabaga", "Sage", "Salsify", "Savory - summer savory",
+    "Savory - winter savory", "Shallots", "Silverbeet", "Snow Peas", "Spinach", "Spring onions",
+    "Squash", "Strawberries (from seeds)", "Strawberry Plants", "Sunflower", "Sweet corn",
+    "Sweet Marjoram", "Sweet Potato", "Taro", "Thyme", "Tomatillo", "Tomato", "Turnip",
+    "Watermelon", "Yacon", "Yam/Oca", "Zucchini"
+]
+
+# Links to plant pages, e.g. <a href="/plant/Choko%2FChayote">Choko/Chayote</a>; comment and
+# paging links carry a suffix or query string and are not matched
+PLANT_LINK_PATTERN = re.compile(r'<a\s[^>]*href="(?:https?://[^/"]+)?/plant/([^/?#"]+)/?"[^>]*>(.*?)</a>', re.S)
+ZONE_OPTION_PATTERN = re.compile(r'<option value="(\d+)"[^>]*>\s*([^<]+?)\s*(?:</option>|<|$)', re.M)
+TAG_PATTERN = re.compile(r'<[^>]+>')
+
+
+def parse_plant_index(html_content):
+    """Return {plant name: URL slug} for every plant linked from the index page"""
+    found = {}
+    for slug, text in PLANT_LINK_PATTERN.findall(html_content):
+        name = ' '.join(TAG_PATTERN.sub(' ', text).split())
+        if name and name not in found:
+            found[name] = slug
+    return found
+
+
+def parse_zone_options(html_content):
+    """Return {zone name: code} from the zone selector on a plant page"""
+    zones = {}
+    for code, name in ZONE_OPTION_PATTERN.findall(html_content):
+        zones.setdefault(name, int(code))
+    return zones
+
+
+def index_digest(plants):
+    """Content hash of a plant index, so cosmetic page changes do not count as changes"""
+    canonical = json.dumps(sorted((name, entry['slug']) for name, entry in plants.items()))
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def load_catalogue(path=CATALOGUE_FILE):
+    """Load the cached catalogue, or None if discovery has not been run"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r') as f:
+        catalogue = json.load(f)
+    return catalogue if catalogue.get("version") == CATALOGUE_VERSION else None
+
+
+def save_catalogue(catalogue, path=CATALOGUE_FILE):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    write_json(path, catalogue, indent=2)
+    _cached_catalogue.cache_clear()
+
+
+def diff_plant_index(old_plants, new_plants):
+    """Compare two {name: {"slug": ...}} indexes"""
+    return {
+        "added": sorted(name for name in new_plants if name not in old_plants),
+        "removed": sorted(name for name in old_plants if name not in new_plants),
+        "moved": sorted(name for name in new_plants
+                        if name in old_plants and old_plants[name]['slug'] != new_plants[name]['slug']),
+    }
+
+
+def discover(path=CATALOGUE_FILE, force=False):
+    """Refresh the cached plant index and zone list, returning (catalogue, changes).
+
+    The index is fetched with the cached ETag/Last-Modified, so when nothing changed the
+    whole check is a single 304 response.
+    """
+    import requests  # Only discovery needs it; the cache readers are imported by cheap CLI commands
+
+    cached = load_catalogue(path)
+    now = time.strftime('%Y-%m-%dT%H:%M:%S')
+    catalogue = cached or {"version": CATALOGUE_VERSION, "plants": {}, "zones": {}, "crawled": {}}
+    no_changes = {"added": [], "removed": [], "moved": []}
+
+    headers = {}
+    if cached and not force:
+        if cached.get("etag"):
+            headers['If-None-Match'] = cached["etag"]
+        if cached.get("last_modified"):
+            headers['If-Modified-Since'] = cached["last_modified"]
+
+    response = requests.get(f"{BASE_URL}{INDEX_PATH}", headers=headers)
+    if response.status_code == 304 and catalogue["zones"]:
+        catalogue["checked_at"] = now
+        save_catalogue(catalogue, path)
+        return catalogue, no_changes
+    if response.status_code == 304:
+        response = requests.get(f"{BASE_URL}{INDEX_PATH}")
+    response.raise_for_status()
+
+    index = parse_plant_index(response.text)
+    if not index:
+        raise ValueError(f"No plant links found on {BASE_URL}{INDEX_PATH}; has the page layout changed?")
+
+    old_plants = catalogue["plants"]
+    new_plants = {}
+    for name, slug in sorted(index.items()):
+        previous = old_plants.get(name)
+        unchanged = previous is not None and previous['slug'] == slug
+        new_plants[name] = {"slug": slug, "updated_at": previous['updated_at'] if unchanged else now}
+    changes = diff_plant_index(old_plants, new_plants)
+
+    catalogue.update({
+        "plants": new_plants,
+        "digest": index_digest(new_plants),
+        "etag": response.headers.get('ETag'),
+        "last_modified": response.headers.get('Last-Modified'),
+        "checked_at": now,
+    })
+
+    # The zone list only appears on plant pages; one page is enough
+    if not catalogue["zones"] or changes["added"] or force:
+        first_slug = next(iter(new_plants.values()))['slug']
+        page = requests.get(f"{BASE_URL}/plant/{first_slug}")
+        if page.status_code == 200:
+            catalogue["zones"] = parse_zone_options(page.text) or catalogue["zones"]
+
+    save_catalogue(catalogue, path)
+    return catalogue, changes
+
+
+@functools.lru_cache(maxsize=None)
+def _cached_catalogue(path):
+    return load_catalogue(path)
+
+
+def catalogue_plant_names(path=CATALOGUE_FILE):
+    """Plant names from the cached index, or KNOWN_PLANTS if discovery has not been run"""
+    catalogue = _cached_catalogue(path)
+    return list(catalogue["plants"]) if catalogue else list(KNOWN_PLANTS)
+
+
+def plant_slug(plant_name, path=CATALOGUE_FILE):
+    """URL slug for a plant page, as linked from the index"""
+    catalogue = _cached_catalogue(path)
+    entry = catalogue["plants"].get(plant_name) if catalogue else None
+    return entry['slug'] if entry else quote_plus(plant_name)
+
+
+def changed_plants(consumer, path=CATALOGUE_FILE):
+    """Plants added or moved since the consumer's last completed crawl (all plants on its first run)"""
+    catalogue = _cached_catalogue(path)
+    if not catalogue:
+        return list(KNOWN_PLANTS)
+    last_crawl = catalogue.get("crawled", {}).get(consumer)
+    return [name for name, entry in catalogue["plants"].items() if last_crawl is None or entry['updated_at'] > last_crawl]
+
+
+def removed_plants(plant_names, path=CATALOGUE_FILE):
+    """Those of plant_names no longer in the cached index (none if discovery has not been run)"""
+    catalogue = _cached_catalogue(path)
+    if not catalogue:
+        return []
+    return sorted(name for name in plant_names if name not in catalogue["plants"])
+
+
+def mark_crawled(consumer, started_at, path=CATALOGUE_FILE):
+    """Record that a consumer finished a crawl that started at started_at"""
+    catalogue = load_catalogue(path)
+    if catalogue is None:
+        return
+    catalogue.setdefault("crawled", {})[consumer] = started_at
+    save_catalogue(catalogue, path)
+
+
+def zone_drift(catalogue):
+    """Zones whose name or code on the site differs from climate_zones.ZONES"""
+    site_zones = catalogue.get("zones", {})
+    return {
+        "new": sorted(name for name in site_zones if name not in ZONES),
+        "missing": sorted(name for name in ZONES if site_zones and name not in site_zones),
+        "recoded": sorted(name for name, code in site_zones.items() if name in ZONES and ZONES[name] != code),
+    }
+
+
+if __name__ == "__main__":
+    catalogue, changes = discover(force='--force' in sys.argv)
+    print(f"{len(catalogue['plants'])} plants, {len(catalogue['zones'])} zones (digest {catalogue.get('digest')})")
+    for kind in ("added", "removed", "moved"):
+        if changes[kind]:
+            print(f"{kind.capitalize()}: {', '.join(changes[kind])}")
+    if not any(changes.values()):
+        print("No changes to the plant index")
+    for kind, names in zone_drift(catalogue).items():
+        if names:
+            print(f"Zones {kind} compared to climate_zones.py: {', '.join(names)}")
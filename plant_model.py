@@ -0,0 +1,218 @@
+import json
+import os
+import sys
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional, Tuple
+
+from catalogue_io import load_plants_from_dir, plant_files, retained_bytes
+
+# Directories
+INPUT_DIR = 'garden_data_enhanced'
+
+MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+
+NUMERIC_FIELDS = ("soil_temperature_c", "spacing_cm", "harvest_weeks")
+
+
+class PlantingMethod(Enum):
+    """Gardenate calendar codes"""
+    SEED_TRAY = "S"   # Plant undercover in seed trays
+    TRANSPLANT = "T"  # Plant out (transplant) seedlings
+    DIRECT_SOW = "P"  # Sow seed directly in the garden
+
+
+# Every distinct combination of codes in a calendar cell is built once and shared
+_CALENDAR_CELLS = {}
+
+
+def _calendar_cell(codes):
+    """Return the shared tuple of PlantingMethod members for a list of codes"""
+    key = tuple(codes)
+    cell = _CALENDAR_CELLS.get(key)
+    if cell is None:
+        cell = tuple(PlantingMethod(code) for code in key)
+        _CALENDAR_CELLS[key] = cell
+    return cell
+
+
+def _intern_all(values):
+    """Intern a list of short repeated strings into a tuple"""
+    return tuple(sys.intern(value) for value in values)
+
+
+def _range_from_dict(value):
+    return None if value is None else (value["min"], value["max"])
+
+
+def _range_to_dict(value):
+    return None if value is None else {"min": value[0], "max": value[1]}
+
+
+@dataclass(slots=True)
+class Calendar:
+    """Planting methods for each month, jan..dec"""
+    months: Tuple[Tuple[PlantingMethod, ...], ...]
+
+    @classmethod
+    def from_dict(cls, monthly_calendar):
+        return cls(tuple(_calendar_cell(monthly_calendar[month]) for month in MONTHS))
+
+    def to_dict(self):
+        return {month: [method.value for method in cell] for month, cell in zip(MONTHS, self.months)}
+
+    def months_for(self, method):
+        """Return the month indexes (0-11) in which a planting method applies"""
+        return [i for i, cell in enumerate(self.months) if method in cell]
+
+
+@dataclass(slots=True)
+class GrowingInfo:
+    """Soil temperature, spacing and harvest details for one zone"""
+    soil_temperature: str
+    spacing: str
+    harvest_time: str
+    additional_notes: Tuple[str, ...]
+    soil_temperature_c: Optional[Tuple[float, float]] = None
+    spacing_cm: Optional[Tuple[float, float]] = None
+    harvest_weeks: Optional[Tuple[float, float]] = None
+    has_numeric: bool = False
+
+    @classmethod
+    def from_dict(cls, growing_info):
+        return cls(
+            soil_temperature=sys.intern(growing_info["soil_temperature"]),
+            spacing=sys.intern(growing_info["spacing"]),
+            harvest_time=sys.intern(growing_info["harvest_time"]),
+            additional_notes=tuple(growing_info["additional_notes"]),
+            soil_temperature_c=_range_from_dict(growing_info.get("soil_temperature_c")),
+            spacing_cm=_range_from_dict(growing_info.get("spacing_cm")),
+            harvest_weeks=_range_from_dict(growing_info.get("harvest_weeks")),
+            has_numeric=any(field in growing_info for field in NUMERIC_FIELDS),
+        )
+
+    def to_dict(self):
+        growing_info = {
+            "soil_temperature": self.soil_temperature,
+            "spacing": self.spacing,
+            "harvest_time": self.harvest_time,
+            "additional_notes": list(self.additional_notes),
+        }
+        if self.has_numeric:
+            growing_info["soil_temperature_c"] = _range_to_dict(self.soil_temperature_c)
+            growing_info["spacing_cm"] = _range_to_dict(self.spacing_cm)
+            growing_info["harvest_weeks"] = _range_to_dict(self.harvest_weeks)
+        return growing_info
+
+
+@dataclass(slots=True)
+class ZoneProfile:
+    """Everything extracted for one plant in one climate zone"""
+    zone_name: str
+    zone_number: int
+    plant_name: str
+    alternative_names: Tuple[str, ...]
+    scientific_name: str
+    family: str
+    climate_zone: str
+    calendar: Calendar
+    growing_info: GrowingInfo
+    companion_plants: Tuple[str, ...]
+    avoid_plants: Tuple[str, ...]
+    culinary_hints: Tuple[str, ...]
+
+    @classmethod
+    def from_dict(cls, zone):
+        data = zone["data"]
+        return cls(
+            zone_name=sys.intern(zone["zone_name"]),
+            zone_number=zone["zone_number"],
+            plant_name=sys.intern(data["plant_name"]),
+            alternative_names=_intern_all(data["alternative_names"]),
+            scientific_name=sys.intern(data["scientific_name"]),
+            family=sys.intern(data["family"]),
+            climate_zone=sys.intern(data["climate_zone"]),
+            calendar=Calendar.from_dict(data["monthly_calendar"]),
+            growing_info=GrowingInfo.from_dict(data["growing_info"]),
+            companion_plants=_intern_all(data["companion_plants"]),
+            avoid_plants=_intern_all(data["avoid_plants"]),
+            culinary_hints=tuple(data["culinary_hints"]),
+        )
+
+    def to_dict(self):
+        return {
+            "zone_name": self.zone_name,
+            "zone_number": self.zone_number,
+            "data": {
+                "plant_name": self.plant_name,
+                "alternative_names": list(self.alternative_names),
+                "scientific_name": self.scientific_name,
+                "family": self.family,
+                "climate_zone": self.climate_zone,
+                "monthly_calendar": self.calendar.to_dict(),
+                "growing_info": self.growing_info.to_dict(),
+                "companion_plants": list(self.companion_plants),
+                "avoid_plants": list(self.avoid_plants),
+                "culinary_hints": list(self.culinary_hints),
+            },
+        }
+
+
+@dataclass(slots=True)
+class Plant:
+    """A plant and its per-zone profiles, matching the all_<plant>.json files"""
+    name: str
+    zones: Tuple[ZoneProfile, ...]
+
+    @classmethod
+    def from_dict(cls, plant):
+        return cls(
+            name=sys.intern(plant["name"]),
+            zones=tuple(ZoneProfile.from_dict(zone) for zone in plant["zones"]),
+        )
+
+    def to_dict(self):
+        return {"name": self.name, "zones": [zone.to_dict() for zone in self.zones]}
+
+    def zone(self, zone_name):
+        """Return the profile for a zone, or None if the plant has no data for it"""
+        for zone in self.zones:
+            if zone.zone_name == zone_name:
+                return zone
+        return None
+
+
+def load_plant(file_path):
+    """Load an all_<plant>.json file into a Plant"""
+    with open(file_path, 'r') as f:
+        return Plant.from_dict(json.load(f))
+
+
+def load_catalogue(input_dir=INPUT_DIR):
+    """Load every all_<plant>.json file in a directory into Plant records"""
+    return [load_plant(os.path.join(input_dir, file_name)) for file_name in plant_files(input_dir)]
+
+
+def measure_footprint(input_dir=INPUT_DIR):
+    """Compare the resident size of a full catalogue load as dicts and as Plant records"""
+    plants_as_dicts, dict_bytes = retained_bytes(load_plants_from_dir, input_dir)
+    plants, model_bytes = retained_bytes(load_catalogue, input_dir)
+
+    mismatches = sum(1 for plant, plant_dict in zip(plants, plants_as_dicts) if plant.to_dict() != plant_dict)
+    return {
+        "plants": len(plants),
+        "zones": sum(len(plant.zones) for plant in plants),
+        "dict_bytes": dict_bytes,
+        "model_bytes": model_bytes,
+        "saving": 1 - model_bytes / dict_bytes if dict_bytes else 0.0,
+        "mismatches": mismatches,
+    }
+
+
+if __name__ == "__main__":
+    stats = measure_footprint(sys.argv[1] if len(sys.argv) > 1 else INPUT_DIR)
+    print(f"Loaded {stats['plants']} plants / {stats['zones']} zones")
+    print(f"Dicts: {stats['dict_bytes'] / 1024:.0f} KiB, records: {stats['model_bytes'] / 1024:.0f} KiB "
+          f"({stats['saving']:.0%} smaller)")
+    if stats['mismatches']:
+        print(f"Warning: {stats['mismatches']} plants did not round-trip exactly")
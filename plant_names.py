@@ -0,0 +1,271 @@
+import functools
+import json
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+from catalogue_io import load_plants_from_dir
+
+INPUT_DIR = 'garden_data_enhanced'
+DETAILED_DATA_FILE = os.path.join('gardenate_detailed_data', 'all_detailed_data.json')
+
+# Trigram similarity (Dice coefficient) below which a fuzzy match is not trusted; above it, every
+# word of the reference must still start or be the start of a word of the name ("beets" ->
+# "Beetroot", but not "sweet peas" -> "Sweet Potato")
+MIN_SIMILARITY = 0.55
+
+# "Compatible with (can grow beside): Asparagus, Chervil,Carrot" / "Avoid growing close to: ..."
+REFERENCE_PREFIX_PATTERN = re.compile(r'^[^:]*(?:beside|close to)\)?:\s*', re.I)
+REFERENCE_SPLIT_PATTERN = re.compile(r'\s*(?:,|;|\.\s|\band\b|\bor\b)\s*', re.I)
+# "Peppers (Capsicum)", "zucchini/squash": parts of one reference that may each name a plant
+PART_PATTERN = re.compile(r'[()/]')
+NON_ALPHANUMERIC_PATTERN = re.compile(r'[^a-z0-9]+')
+
+
+def _singular(word):
+    """Crude English singular; it only has to map both sides of a comparison the same way"""
+    if len(word) > 4 and word.endswith('ies'):
+        return word[:-3] + 'y'
+    if word.endswith(('oes', 'ches', 'shes', 'sses', 'xes')):
+        return word[:-2]
+    if len(word) > 3 and word.endswith('s') and not word.endswith(('ss', 'us', 'is')):
+        return word[:-1]
+    return word
+
+
+def name_key(text):
+    """Case-, punctuation-, spacing- and plural-insensitive key: 'Egg plants.' -> 'eggplant'"""
+    return ''.join(_singular(word) for word in NON_ALPHANUMERIC_PATTERN.sub(' ', text.lower()).split())
+
+
+def name_aliases(name, alternative_names=()):
+    """Other ways a plant is referred to, e.g. 'Yam/Oca' -> Yam, Oca and 'Beans - dwarf' -> dwarf Beans"""
+    aliases = [name, *alternative_names]
+    without_note = re.sub(r'\s*\(.*?\)', '', name).strip()
+    if without_note != name:
+        aliases.append(without_note)
+    if '/' in without_note:
+        aliases.extend(part.strip() for part in without_note.split('/'))
+    if ' - ' in without_note:
+        head, tail = without_note.split(' - ', 1)
+        aliases.append(tail if head.lower() in tail.lower() else f"{tail} {head}")
+    return aliases
+
+
+def _words(text):
+    return {_singular(word) for word in NON_ALPHANUMERIC_PATTERN.sub(' ', text.lower()).split()}
+
+
+def _words_agree(words, name_words):
+    """Every word is, or shares a prefix with, one of the name's words"""
+    return all(any(word.startswith(other) or other.startswith(word) for other in name_words) for word in words)
+
+
+def _trigrams(key):
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlantNameResolver:
+    """Map free-text plant references ("Potatoes", "egg plant", "leeks.") to catalogue names.
+
+    Exact keys (see name_key) are looked up in a dict; anything else goes through a trigram
+    index over the same keys and resolves to the most similar name above MIN_SIMILARITY, or
+    to a single plant whose name contains every word of the reference. A text may name several
+    plants ("Alliums (Chives, leek, garlic, onions) Sunflower"); resolve_all() returns all of them
+    and the fragments that named none, and resolve() only answers for a text naming one plant.
+    Results are cached.
+    """
+
+    def __init__(self, plants):
+        """plants: {canonical name: alternative names}"""
+        self.names = sorted(plants)
+        self.keys = {}
+        ambiguous = set()
+        for name in self.names:
+            for alias in name_aliases(name, plants[name]):
+                key = name_key(alias)
+                if not key:
+                    continue
+                if alias == name or key not in self.keys:
+                    self.keys[key] = name
+                    ambiguous.discard(key)
+                elif self.keys[key] != name and name_key(self.keys[key]) != key:
+                    ambiguous.add(key)
+        for key in ambiguous:
+            del self.keys[key]
+
+        self.key_list = sorted(self.keys)
+        self.trigram_index = {}
+        for key_id, key in enumerate(self.key_list):
+            for trigram in _trigrams(key):
+                self.trigram_index.setdefault(trigram, []).append(key_id)
+
+        self.words = {name: _words(name) for name in self.names}
+        self.resolve_all = functools.lru_cache(maxsize=None)(self._resolve_all)
+
+    @classmethod
+    def from_plants(cls, plants):
+        """Index plants in the all_*.json shape, with each plant's first-zone alternative names"""
+        names = {}
+        for plant in plants:
+            zones = plant.get('zones') or [{}]
+            names[plant['name']] = zones[0].get('data', {}).get('alternative_names') or []
+        return cls(names)
+
+    @classmethod
+    def from_catalogue(cls, input_dir=INPUT_DIR):
+        return cls.from_plants(load_plants_from_dir(input_dir))
+
+    def alias_table(self):
+        """{name_key: catalogue name} for every exact spelling, for clients that can compute name_key"""
+        return dict(sorted(self.keys.items()))
+
+    def candidates(self, text, limit=3):
+        """The closest catalogue names to text as (name, similarity), best first"""
+        key = name_key(text)
+        if not key:
+            return []
+        query = _trigrams(key)
+        shared = Counter(key_id for trigram in query for key_id in self.trigram_index.get(trigram, ()))
+        scores = {}
+        for key_id, count in shared.items():
+            name = self.keys[self.key_list[key_id]]
+            similarity = 2 * count / (len(query) + len(_trigrams(self.key_list[key_id])))
+            scores[name] = max(scores.get(name, 0), similarity)
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+
+    def _match(self, text):
+        """The catalogue name text spells out on its own, or None"""
+        key = name_key(text)
+        if key in self.keys:
+            return self.keys[key]
+
+        words = _words(text)
+        best = self.candidates(text, limit=2)
+        if (best and best[0][1] >= MIN_SIMILARITY and (len(best) == 1 or best[0][1] > best[1][1])
+                and _words_agree(words, self.words[best[0][0]])):
+            return best[0][0]
+
+        # "sprouts" -> "Brussels sprouts", as long as exactly one plant has all the words ("corn" is in
+        # both "Sweet corn" and "Corn Salad", so it stays unresolved)
+        containing = [name for name, name_words in self.words.items() if words and words <= name_words]
+        return containing[0] if len(containing) == 1 else None
+
+    def _fragment_names(self, fragment):
+        """Catalogue names one comma-separated fragment refers to, in order"""
+        key = name_key(fragment)
+        if key in self.keys:
+            return [self.keys[key]]
+
+        # "Peppers (Capsicum": the parts that are exact names, or failing that whatever each part
+        # matches; "Alliums (Chives" is Chives, "zucchini/squash" is Zucchini and Squash
+        parts = [part for part in PART_PATTERN.split(fragment) if name_key(part)]
+        if len(parts) > 1:
+            exact = [self.keys[name_key(part)] for part in parts if name_key(part) in self.keys]
+            matches = exact or [self._match(part) for part in parts]
+            return list(dict.fromkeys(filter(None, matches)))
+
+        name = self._match(fragment)
+        return [name] if name else []
+
+    def _resolve_all(self, text):
+        """(catalogue names text refers to, fragments of it that name no plant), as tuples"""
+        names = []
+        unresolved = []
+        for fragment in split_references(text):
+            found = self._fragment_names(fragment)
+            if not found:
+                unresolved.append(fragment)
+            names.extend(name for name in found if name not in names)
+        return tuple(names), tuple(unresolved)
+
+    def resolve(self, text):
+        """The one catalogue name text refers to, or None if it names no plant, several, or has
+        a part that names none"""
+        names, unresolved = self.resolve_all(text)
+        return names[0] if len(names) == 1 and not unresolved else None
+
+
+def _split_unopened(text):
+    """'onions) Sunflower' -> 'onions', 'Sunflower': a ')' closing a '(' of an earlier fragment ends a name"""
+    parts = []
+    depth = start = 0
+    for i, char in enumerate(text):
+        if char == '(':
+            depth += 1
+        elif char == ')' and depth:
+            depth -= 1
+        elif char == ')':
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def split_references(value):
+    """Split a companion/avoid value (a list or "Compatible with ...: A, B,C") into names"""
+    texts = value if isinstance(value, list) else [value or '']
+    references = []
+    for text in texts:
+        text = REFERENCE_PREFIX_PATTERN.sub('', text.strip())
+        if text.lower().startswith('not applicable'):
+            continue
+        for part in REFERENCE_SPLIT_PATTERN.split(text):
+            references.extend(name.strip(' .') for name in _split_unopened(part) if name.strip(' .'))
+    return references
+
+
+def companion_references(input_dir=INPUT_DIR, detailed_data_file=DETAILED_DATA_FILE):
+    """Every companion and avoid reference in the integrated catalogue and the scraped details"""
+    references = []
+    for plant in load_plants_from_dir(input_dir):
+        for zone in plant.get('zones', []):
+            data = zone.get('data', {})
+            references.extend(split_references(data.get('companion_plants') or []))
+            references.extend(split_references(data.get('avoid_plants') or []))
+    if os.path.exists(detailed_data_file):
+        with open(detailed_data_file, 'r') as f:
+            for zones in json.load(f).values():
+                for record in zones.values():
+                    references.extend(split_references(record.get('companion', '')))
+                    references.extend(split_references(record.get('avoid', '')))
+    return references
+
+
+def resolve_references(resolver, references):
+    """Resolve references in bulk: ({reference: catalogue names}, Counter of unresolved fragments)"""
+    resolved = {}
+    unresolved = Counter()
+    for reference in references:
+        names, leftover = resolver.resolve_all(reference)
+        unresolved.update(leftover)
+        if names:
+            resolved[reference] = names
+    return resolved, unresolved
+
+
+if __name__ == "__main__":
+    resolver = PlantNameResolver.from_catalogue(sys.argv[1] if len(sys.argv) > 1 else INPUT_DIR)
+    if len(sys.argv) > 2:
+        for text in sys.argv[2:]:
+            print(f"{text!r} -> {resolver.resolve(text)}  (closest: {resolver.candidates(text)})")
+        sys.exit(0)
+
+    references = companion_references()
+    start = time.perf_counter()
+    resolved, unresolved = resolve_references(resolver, references)
+    elapsed = time.perf_counter() - start
+
+    print(f"Resolved {len(references) - sum(unresolved.values())} of {len(references)} companion references "
+          f"({len(set(references))} distinct) in {elapsed * 1000:.1f} ms")
+    for reference, names in sorted(resolved.items()):
+        if [name_key(reference)] != [name_key(name) for name in names]:
+            print(f"  {reference} -> {', '.join(names)}")
+    if unresolved:
+        print("Unresolved:")
+        for reference, count in unresolved.most_common():
+            closest = ', '.join(f"{name} ({similarity:.2f})" for name, similarity in resolver.candidates(reference))
+            print(f"  {reference} x{count}" + (f"  closest: {closest}" if closest else ''))
@@ -0,0 +1,204 @@
+import datetime
+import json
+import mmap
+import os
+import struct
+import sys
+
+from atomic_io import atomic_open
+from catalogue_io import load_plants_from_dir
+from sowing_windows import SOIL_TEMPERATURE_FILE, WEEKS, build_sowing_windows, plant_soil_range
+from succession_planner import load_harvest_ranges
+
+# Directories
+INPUT_DIR = 'garden_data_enhanced'
+OUTPUT_FILE = os.path.join(INPUT_DIR, 'recommendations.grec')
+
+# File layout: header, string offsets, string pool (zone names, then plant names), one
+# (first entry, count) slot per zone and week, then the ranked entries
+MAGIC = b'GREC'
+VERSION = 1
+HEADER = struct.Struct('<4sHHIIIIIII')
+SLOT = struct.Struct('<IH')
+# Entry: plant id, methods possible that week (bits as in the binary catalogue), score 0-255
+ENTRY = struct.Struct('<HBB')
+
+METHOD_BITS = {"S": 1, "T": 2, "P": 4}
+
+# Sowing straight into the ground is the simplest thing to do this week; seed trays still
+# need transplanting later
+METHOD_SCORES = {"P": 1.0, "T": 0.8, "S": 0.6}
+WEIGHTS = {"method": 0.5, "harvest": 0.25, "soil": 0.25}
+# A crop ready in this many weeks scores 0.5 for time to harvest
+HARVEST_HALF_SCORE_WEEKS = 12
+# Used when a plant has no harvest time or soil temperature range, or is not sown direct
+NEUTRAL_SCORE = 0.5
+
+
+def soil_fit(temperature, soil_range):
+    """1.0 at the middle of the plant's range, 0.5 at its edges, 0 outside it"""
+    if not soil_range:
+        return NEUTRAL_SCORE
+    low, high = soil_range['min'], soil_range['max']
+    if not low <= temperature <= high:
+        return 0.0
+    half_width = (high - low) / 2
+    if half_width == 0:
+        return 1.0
+    return 1.0 - 0.5 * abs(temperature - (low + high) / 2) / half_width
+
+
+def score_recommendation(methods, harvest_range, soil_range, temperature):
+    """Rank of one plant for one week in 0..1; methods are the calendar codes open that week"""
+    best_method = max(methods, key=METHOD_SCORES.get)
+    harvest = (HARVEST_HALF_SCORE_WEEKS / (HARVEST_HALF_SCORE_WEEKS + harvest_range['min'])
+               if harvest_range else NEUTRAL_SCORE)
+    # Only seed sown straight into the ground germinates at the soil temperature; trays are raised
+    # under cover and transplants have already germinated
+    soil = soil_fit(temperature, soil_range) if best_method == 'P' else NEUTRAL_SCORE
+    return (WEIGHTS["method"] * METHOD_SCORES[best_method] + WEIGHTS["harvest"] * harvest
+            + WEIGHTS["soil"] * soil)
+
+
+def build_recommendations(plants, soil_data, harvest_ranges):
+    """{zone: [[(plant, methods, score), ...] per week, best first]}"""
+    table = build_sowing_windows(plants, soil_data)
+    soil_ranges = {}
+    for plant in plants:
+        ranges = {zone['zone_name']: plant_soil_range(zone['data'].get('growing_info', {})) for zone in plant.get('zones', [])}
+        plant_range = next(filter(None, ranges.values()), None)
+        for zone_name, soil_range in ranges.items():
+            soil_ranges[(zone_name, plant['name'])] = soil_range or plant_range
+
+    recommendations = {}
+    for zone_name, windows in sorted(table["windows"].items()):
+        curve = table["curves"][zone_name]
+        weeks = []
+        for week in range(WEEKS):
+            ranked = []
+            for plant_name, masks in windows.items():
+                methods = [code for code in METHOD_BITS if masks[code] >> week & 1]
+                if methods:
+                    score = score_recommendation(methods, harvest_ranges.get((zone_name, plant_name)),
+                                                 soil_ranges.get((zone_name, plant_name)), curve[week])
+                    ranked.append((plant_name, methods, score))
+            ranked.sort(key=lambda item: (-item[2], item[0]))
+            weeks.append(ranked)
+        recommendations[zone_name] = weeks
+    return recommendations
+
+
+def export_recommendations(recommendations, output_file):
+    """Write build_recommendations() output to the indexed binary format"""
+    zone_names = sorted(recommendations)
+    plant_names = sorted({plant for weeks in recommendations.values() for ranked in weeks for plant, _, _ in ranked})
+    plant_ids = {name: i for i, name in enumerate(plant_names)}
+
+    encoded = [name.encode('utf-8') for name in zone_names + plant_names]
+    string_offsets = [0]
+    for name in encoded:
+        string_offsets.append(string_offsets[-1] + len(name))
+
+    slots = []
+    entries = []
+    for zone_name in zone_names:
+        for ranked in recommendations[zone_name]:
+            slots.append(SLOT.pack(len(entries), len(ranked)))
+            entries.extend(
+                ENTRY.pack(plant_ids[plant], sum(METHOD_BITS[code] for code in methods), round(score * 255))
+                for plant, methods, score in ranked
+            )
+
+    offsets_start = HEADER.size
+    pool_start = offsets_start + 4 * len(string_offsets)
+    slots_start = pool_start + string_offsets[-1]
+    entries_start = slots_start + SLOT.size * len(slots)
+
+    with atomic_open(output_file, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, WEEKS, len(zone_names), len(plant_names), len(entries),
+                            offsets_start, pool_start, slots_start, entries_start))
+        f.write(struct.pack(f'<{len(string_offsets)}I', *string_offsets))
+        f.write(b''.join(encoded))
+        f.write(b''.join(slots))
+        f.write(b''.join(entries))
+
+    return {
+        "zones": len(zone_names),
+        "plants": len(plant_names),
+        "entries": len(entries),
+        "bytes": os.path.getsize(output_file),
+    }
+
+
+def write_recommendations(input_dir=INPUT_DIR, output_file=OUTPUT_FILE, soil_temperature_file=SOIL_TEMPERATURE_FILE):
+    plants = load_plants_from_dir(input_dir)
+    with open(soil_temperature_file, 'r') as f:
+        soil_data = json.load(f)
+    return export_recommendations(build_recommendations(plants, soil_data, load_harvest_ranges(plants)), output_file)
+
+
+def week_of(date):
+    """0-based week of the year as used by the tables (days 365 and 366 belong to the last week)"""
+    return min((date.timetuple().tm_yday - 1) // 7, WEEKS - 1)
+
+
+class RecommendationReader:
+    """Memory-mapped reader for files written by export_recommendations"""
+
+    def __init__(self, file_path=OUTPUT_FILE):
+        self._file = open(file_path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        (magic, version, self.weeks, zone_count, plant_count, _, offsets_start, pool_start,
+         self._slots_start, self._entries_start) = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError(f"{file_path} is not a version {VERSION} recommendation table")
+
+        offsets = struct.unpack_from(f'<{zone_count + plant_count + 1}I', self._mmap, offsets_start)
+        names = [self._mmap[pool_start + offsets[i]:pool_start + offsets[i + 1]].decode('utf-8')
+                 for i in range(zone_count + plant_count)]
+        self.zone_names = names[:zone_count]
+        self.plant_names = names[zone_count:]
+        self._zone_ids = {name: i for i, name in enumerate(self.zone_names)}
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def recommend(self, zone_name, week, limit=None):
+        """[(plant, methods, score)] for a zone and 0-based week, best first; [] for an unknown zone"""
+        zone_id = self._zone_ids.get(zone_name)
+        if zone_id is None:
+            return []
+        first, count = SLOT.unpack_from(self._mmap, self._slots_start + SLOT.size * (zone_id * self.weeks + week % self.weeks))
+        if limit is not None:
+            count = min(count, limit)
+        results = []
+        for offset in range(self._entries_start + ENTRY.size * first, self._entries_start + ENTRY.size * (first + count), ENTRY.size):
+            plant_id, method_bits, score = ENTRY.unpack_from(self._mmap, offset)
+            methods = [code for code, bit in METHOD_BITS.items() if method_bits & bit]
+            results.append((self.plant_names[plant_id], methods, score / 255))
+        return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] != '--write':
+        if not os.path.exists(OUTPUT_FILE):
+            print(f"No recommendation table at {OUTPUT_FILE}; run `python recommendations.py --write` first.")
+            sys.exit(1)
+        week = int(sys.argv[2]) - 1 if len(sys.argv) > 2 else week_of(datetime.date.today())
+        with RecommendationReader() as reader:
+            for plant, methods, score in reader.recommend(sys.argv[1], week, limit=20):
+                print(f"{score:.2f}  {''.join(methods):<3}  {plant}")
+        sys.exit(0)
+
+    stats = write_recommendations()
+    print(f"Recommendations for {stats['zones']} zones x {WEEKS} weeks ({stats['entries']} entries): "
+          f"{stats['bytes'] / 1024:.0f} KiB -> {OUTPUT_FILE}")
@@ -0,0 +1,238 @@
+import argparse
+import glob
+import hashlib
+import os
+import random
+import re
+import signal
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote_plus, urlparse
+
+# Archived pages are stored as <plant>_<zone>_raw.html, e.g. test_data/celery_26_raw.html,
+# and an optional copy of the plant index as plants_index.html
+ARCHIVE_DIR = 'test_data'
+INDEX_FILE = 'plants_index.html'
+DEFAULT_PORT = 8765
+
+
+def normalize_plant_name(plant_name):
+    """Normalize a plant name from a URL or file name so both map to the same key"""
+    return re.sub(r'[\s/]+', '-', unquote_plus(plant_name).strip().lower())
+
+
+def load_archive(archive_dir=ARCHIVE_DIR):
+    """Load archived pages into {(plant, zone): html bytes}"""
+    pages = {}
+    for file_path in glob.glob(os.path.join(archive_dir, '*_raw.html')):
+        match = re.match(r'(.+)_(\d+)_raw\.html$', os.path.basename(file_path))
+        if not match:
+            continue
+        with open(file_path, 'rb') as f:
+            pages[(normalize_plant_name(match.group(1)), int(match.group(2)))] = f.read()
+    return pages
+
+
+def load_index(archive_dir=ARCHIVE_DIR):
+    """Load the archived plant index page, or None if the archive has none"""
+    file_path = os.path.join(archive_dir, INDEX_FILE)
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path, 'rb') as f:
+        return f.read()
+
+
+class ReplayConfig:
+    """Fault and throttling settings shared by all request handlers"""
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, burst_every=0, burst_length=0,
+                 retry_after=1, bandwidth_kbps=0.0, fallback=False, seed=None):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.burst_every = burst_every
+        self.burst_length = burst_length
+        self.retry_after = retry_after
+        self.bandwidth_kbps = bandwidth_kbps
+        self.fallback = fallback
+        self.random = random.Random(seed)
+
+
+class ReplayStats:
+    """Thread-safe request counters, printed when the server stops"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.statuses = {}
+        self.bytes_sent = 0
+
+    def next_request(self):
+        with self.lock:
+            self.requests += 1
+            return self.requests
+
+    def record(self, status, bytes_sent):
+        with self.lock:
+            self.statuses[status] = self.statuses.get(status, 0) + 1
+            self.bytes_sent += bytes_sent
+
+    def summary(self):
+        with self.lock:
+            statuses = ", ".join(f"{status}: {count}" for status, count in sorted(self.statuses.items()))
+            return f"{self.requests} requests ({statuses}), {self.bytes_sent / 1024:.1f} KiB sent"
+
+
+class ReplayHandler(BaseHTTPRequestHandler):
+    """Serves /plant/<name>?zone=N and /plants/ from the archive with the configured faults"""
+
+    server_version = "GardenateReplay/1.0"
+
+    def log_message(self, format, *args):
+        # Per-request logging would dominate the cost of a load test
+        pass
+
+    def do_GET(self):
+        server = self.server
+        config = server.config
+        request_number = server.stats.next_request()
+
+        delay = config.latency_ms + config.random.uniform(-config.jitter_ms, config.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+
+        # 429 bursts: the first burst_length requests of every burst_every requests are throttled
+        if config.burst_every and (request_number - 1) % config.burst_every < config.burst_length:
+            self._send_error(429, {"Retry-After": str(config.retry_after)})
+            return
+
+        if config.error_rate and config.random.random() < config.error_rate:
+            self._send_error(500)
+            return
+
+        parsed = urlparse(self.path)
+        if parsed.path.rstrip('/') == '/plants' and server.index is not None:
+            self._send_index(server.index)
+            return
+
+        match = re.match(r'^/plant/([^/]+)$', parsed.path)
+        if not match:
+            self._send_error(404)
+            return
+
+        plant = normalize_plant_name(match.group(1))
+        try:
+            zone = int(parse_qs(parsed.query).get('zone', ['0'])[0])
+        except ValueError:
+            self._send_error(400)
+            return
+
+        body = server.pages.get((plant, zone))
+        if body is None and config.fallback:
+            body = next((html for (name, _), html in sorted(server.pages.items()) if name == plant), None)
+        if body is None:
+            self._send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self._write_throttled(body)
+        server.stats.record(200, len(body))
+
+    def _send_index(self, body):
+        """Serve the plant index with an ETag, answering matching conditional requests with 304"""
+        etag = '"' + hashlib.sha1(body).hexdigest()[:16] + '"'
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            self.server.stats.record(304, 0)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self._write_throttled(body)
+        self.server.stats.record(200, len(body))
+
+    def _send_error(self, status, headers=None):
+        body = f"{status}\n".encode('utf-8')
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "text/plain")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.stats.record(status, len(body))
+
+    def _write_throttled(self, body):
+        """Write the body, sleeping between chunks to respect the bandwidth cap"""
+        bandwidth_kbps = self.server.config.bandwidth_kbps
+        if not bandwidth_kbps:
+            self.wfile.write(body)
+            return
+        chunk_size = 4096
+        seconds_per_chunk = chunk_size / (bandwidth_kbps * 1024)
+        for start in range(0, len(body), chunk_size):
+            self.wfile.write(body[start:start + chunk_size])
+            time.sleep(seconds_per_chunk)
+
+
+def create_server(pages, config, host='127.0.0.1', port=DEFAULT_PORT, index=None):
+    """Create (but do not start) a replay server; port 0 picks a free port"""
+    server = ThreadingHTTPServer((host, port), ReplayHandler)
+    server.daemon_threads = True
+    server.pages = pages
+    server.index = index
+    server.config = config
+    server.stats = ReplayStats()
+    return server
+
+
+def _raise_keyboard_interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve archived Gardenate pages for offline scraper load tests")
+    parser.add_argument('--archive', default=ARCHIVE_DIR, help="Directory of <plant>_<zone>_raw.html pages")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency-ms', type=float, default=0.0, help="Added latency per request")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="Random +/- variation of the latency")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 500")
+    parser.add_argument('--burst-every', type=int, default=0, help="Start a 429 burst every N requests")
+    parser.add_argument('--burst-length', type=int, default=0, help="Number of 429 responses per burst")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After seconds sent with 429s")
+    parser.add_argument('--bandwidth-kbps', type=float, default=0.0, help="Per-response bandwidth cap in KiB/s")
+    parser.add_argument('--fallback', action='store_true', help="Serve any archived zone of a plant when the requested zone is missing")
+    parser.add_argument('--seed', type=int, help="Random seed for reproducible fault injection")
+    args = parser.parse_args()
+
+    pages = load_archive(args.archive)
+    config = ReplayConfig(args.latency_ms, args.jitter_ms, args.error_rate, args.burst_every, args.burst_length,
+                          args.retry_after, args.bandwidth_kbps, args.fallback, args.seed)
+    server = create_server(pages, config, args.host, args.port, load_index(args.archive))
+
+    # Stop cleanly (and print the stats) on SIGTERM as well as Ctrl+C
+    signal.signal(signal.SIGTERM, _raise_keyboard_interrupt)
+
+    host, port = server.server_address[:2]
+    print(f"Replaying {len(pages)} archived pages from {args.archive} on http://{host}:{port}")
+    print(f"Scrape against it with: GARDENATE_BASE_URL=http://{host}:{port} GARDENATE_REQUEST_DELAY=0 python scrape_gardenate_details.py")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(server.stats.summary())
+
+
+if __name__ == "__main__":
+    main()
@@ -4,10 +4,15 @@ import json
 import time
 import re
 import os
-from urllib.parse import quote_plus
+from atomic_io import atomic_open
+from pipeline_metrics import METRICS
+from pipeline_profiler import profile_from_argv
+from climate_zones import check_page_zone, select_zones
+from plant_discovery import plant_slug
 
-# Create directory for detailed data
-os.makedirs('gardenate_detailed_data', exist_ok=True)
+# Site to scrape and delay between requests; point these at replay_server.py for local load tests
+BASE_URL = os.environ.get('GARDENATE_BASE_URL', 'https://www.gardenate.com').rstrip('/')
+REQUEST_DELAY = float(os.environ.get('GARDENATE_REQUEST_DELAY', '1'))
 
 # List of plants to scrape (just a few for testing)
 plants = [
@@ -15,11 +20,7 @@ plants = [
 ]
 
 # Climate zones with their zone codes (just a few for testing)
-climate_zones = {
-    "United Kingdom - cool/temperate": 26,
-    "USA - Zone 6b": 110,
-    "Australia - temperate": 4
-}
+climate_zones = select_zones(["United Kingdom - cool/temperate", "USA - Zone 6b", "Australia - temperate"])
 
 def extract_detailed_info(html_content):
     """Extract detailed growing information from the HTML content"""
@@ -98,21 +99,30 @@ def extract_detailed_info(html_content):
 def scrape_plant_details(plant_name, zone_name, zone_code):
     """Scrape detailed plant information for a specific plant and zone"""
     # Format plant name for URL
-    formatted_plant_name = quote_plus(plant_name)
-    url = f"https://www.gardenate.com/plant/{formatted_plant_name}?zone={zone_code}"
+    formatted_plant_name = plant_slug(plant_name)
+    url = f"{BASE_URL}/plant/{formatted_plant_name}?zone={zone_code}"
     
     print(f"Scraping detailed info for {plant_name} in {zone_name} (zone code: {zone_code})...")
     
     try:
-        response = requests.get(url)
+        with METRICS.time_stage('fetch'):
+            response = requests.get(url)
+        METRICS.bytes_in.inc(len(response.content), stage='fetch')
         if response.status_code != 200:
             print(f"Failed to retrieve data for {plant_name} in {zone_name}")
             return None
         
+        # Gardenate serves its default zone for unknown codes, so reject pages for any other zone
+        matches, found_zone = check_page_zone(response.text, zone_code)
+        if not matches:
+            print(f"Rejected {plant_name} in {zone_name}: page is for {found_zone or 'an unknown zone'}")
+            return None
+        
         print(f"Successfully retrieved page for {plant_name} in {zone_name}")
         
         # Extract detailed information
-        detailed_info = extract_detailed_info(response.text)
+        with METRICS.time_stage('parse'):
+            detailed_info = extract_detailed_info(response.text)
         
         # Add metadata
         detailed_info["plant_name"] = plant_name
@@ -128,6 +138,9 @@ def scrape_plant_details(plant_name, zone_name, zone_code):
 
 def main():
     """Main function to scrape selected plants and zones"""
+    # Create directory for detailed data
+    os.makedirs('gardenate_detailed_data', exist_ok=True)
+    
     all_data = {}
     
     for plant_name in plants:
@@ -135,7 +148,7 @@ def main():
         
         for zone_name, zone_code in climate_zones.items():
             # Add a delay to avoid overwhelming the server
-            time.sleep(1)
+            time.sleep(REQUEST_DELAY)
             
             detailed_info = scrape_plant_details(plant_name, zone_name, zone_code)
             if detailed_info:
@@ -147,16 +160,20 @@ def main():
             
             # Save individual plant data
             filename = f"gardenate_detailed_data/{plant_name.replace('/', '-')}.json"
-            with open(filename, 'w') as f:
-                json.dump(plant_data, f, indent=2)
+            with METRICS.time_stage('write'):
+                with atomic_open(filename) as f:
+                    json.dump(plant_data, f, indent=2)
             
             print(f"Saved detailed data for {plant_name}")
     
     # Save all data to a single file
-    with open("gardenate_detailed_data/selected_plants_data.json", 'w') as f:
-        json.dump(all_data, f, indent=2)
+    with METRICS.time_stage('write'):
+        with atomic_open("gardenate_detailed_data/selected_plants_data.json") as f:
+            json.dump(all_data, f, indent=2)
     
     print("Completed scraping detailed plant information for selected plants")
+    METRICS.finish("scrape_few_plants")
 
 if __name__ == "__main__":
+    profile_from_argv()
     main() 
\ No newline at end of file
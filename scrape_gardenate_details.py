@@ -4,84 +4,32 @@ import json
 import time
 import re
 import os
-from urllib.parse import quote_plus
+import sys
+from atomic_io import atomic_open, write_json
+from climate_zones import ZONES, check_page_zone
+from crawl_scheduler import CrawlScheduler, budget_from_argv, group_by_plant, schedule_file
+from crawl_state import CRAWL_STATE_DIR
+from plant_discovery import catalogue_plant_names, changed_plants, mark_crawled, plant_slug, removed_plants
+from pipeline_metrics import METRICS, Progress
+from pipeline_profiler import profile_from_argv
+from zone_dedup import ZoneClasses, zone_fingerprint
 
-# Create directory for detailed data
-os.makedirs('gardenate_detailed_data', exist_ok=True)
+# Site to scrape and delay between requests; point these at replay_server.py for local load tests
+BASE_URL = os.environ.get('GARDENATE_BASE_URL', 'https://www.gardenate.com').rstrip('/')
+REQUEST_DELAY = float(os.environ.get('GARDENATE_REQUEST_DELAY', '1'))
 
-# List of all plants from the website
-plants = [
-    "Amaranth", "Angelica", "Artichokes (Globe)", "Asparagus", "Asparagus Pea",
-    "Basil", "Beans - climbing", "Beans - dwarf", "Beetroot", "Borage", "Broad Beans",
-    "Broccoli", "Brussels sprouts", "Burdock", "Cabbage", "Cape Gooseberry", "Capsicum",
-    "Cardoon", "Carrot", "Cauliflower", "Celeriac", "Celery", "Chicory", "Chilli peppers",
-    "Chinese cabbage", "Chives", "Choko/Chayote", "Collards", "Coriander", "Corn Salad",
-    "Cowpeas", "Cucumber", "Daikon", "Dill", "Eggplant", "Endive", "Fennel", "Florence Fennel",
-    "French tarragon", "Garlic", "Ginger", "Horseradish", "Jerusalem Artichokes", "Kale",
-    "Kohlrabi", "Leeks", "Lemon Balm", "Lettuce", "Luffa", "Marrow", "Mint", "Mizuna",
-    "Mustard greens", "NZ Spinach", "Okra", "Onion", "Oregano", "Pak Choy", "Parsley",
-    "Parsnip", "Peas", "Potato", "Pumpkin", "Radish", "Rhubarb", "Rocket", "Rockmelon",
-    "Rosella", "Rosemary", "Rutabaga", "Sage", "Salsify", "Savory - summer savory",
-    "Savory - winter savory", "Shallots", "Silverbeet", "Snow Peas", "Spinach", "Spring onions",
-    "Squash", "Strawberries (from seeds)", "Strawberry Plants", "Sunflower", "Sweet corn",
-    "Sweet Marjoram", "Sweet Potato", "Taro", "Thyme", "Tomatillo", "Tomato", "Turnip",
-    "Watermelon", "Yacon", "Yam/Oca", "Zucchini"
-]
+# Rate-limited (429) and server error responses are retried this many times
+MAX_RETRIES = 3
 
-# Climate zones with their zone codes
-climate_zones = {
-    "Australia - arid": 1,
-    "Australia - cool/mountain": 2,
-    "Australia - sub-tropical": 3,
-    "Australia - temperate": 4,
-    "Australia - tropical": 5,
-    "Canada - Zone 2a Sub-Arctic": 6,
-    "Canada - Zone 2b Sub-Arctic": 7,
-    "Canada - Zone 3a Temperate Short Summer": 8,
-    "Canada - Zone 3b Temperate Warm Summer": 9,
-    "Canada - zone 4a Temperate Warm Summer": 10,
-    "Canada - Zone 4b Temperate Warm Summer": 11,
-    "Canada - Zone 5a Temperate Warm Summer": 12,
-    "Canada - Zone 5b Temperate Warm Summer": 13,
-    "Canada - Zone 6a Temperate Warm Summer": 14,
-    "Canada - Zone 6b Temperate Warm Summer": 15,
-    "Canada - Zone 7a Mild Temperate": 16,
-    "Canada - Zone 7b Mild Temperate": 17,
-    "Canada - Zone 8a Mild Temperate": 18,
-    "New Zealand - cool/mountain": 19,
-    "New Zealand - sub-tropical": 20,
-    "New Zealand - temperate": 21,
-    "South Africa - Dry summer sub-tropical": 22,
-    "South Africa - Humid sub-tropical": 23,
-    "South Africa - Semi-arid": 24,
-    "South Africa - Summer rainfall": 25,
-    "United Kingdom - cool/temperate": 26,
-    "United Kingdom - warm/temperate": 27,
-    "USA - Zone 2a": 101,
-    "USA - Zone 2b": 102,
-    "USA - Zone 3a": 103,
-    "USA - Zone 3b": 104,
-    "USA - Zone 4a": 105,
-    "USA - Zone 4b": 106,
-    "USA - Zone 5a": 107,
-    "USA - Zone 5b": 108,
-    "USA - Zone 6a": 109,
-    "USA - Zone 6b": 110,
-    "USA - Zone 7a": 111,
-    "USA - Zone 7b": 112,
-    "USA - Zone 8a": 113,
-    "USA - Zone 8b": 114,
-    "USA - Zone 9a": 115,
-    "USA - Zone 9b": 116,
-    "USA - Zone 10a": 117,
-    "USA - Zone 10b": 118,
-    "USA - Zone 11a": 119,
-    "USA - Zone 11b": 120,
-    "USA - Zone 12a": 121,
-    "USA - Zone 12b": 122,
-    "USA - Zone 13a": 123,
-    "USA - Zone 13b": 124
-}
+# Climate zones with their Gardenate zone codes
+climate_zones = ZONES
+
+# Zones of a plant that returned identical details on earlier runs
+ZONE_CLASSES_FILE = os.path.join(CRAWL_STATE_DIR, 'detail_zone_classes.json')
+DETAIL_FIELDS = ("sowing", "spacing", "harvest", "companion", "avoid")
+
+ALL_DETAILED_DATA_FILE = 'gardenate_detailed_data/all_detailed_data.json'
+SCHEDULE_FILE = schedule_file('scrape_gardenate_details')
 
 def extract_detailed_info(html_content):
     """Extract detailed growing information from the HTML content"""
@@ -141,22 +89,45 @@ def extract_detailed_info(html_content):
         "avoid": avoid_info
     }
 
+def fetch_page(url):
+    """Fetch a page, retrying rate-limited and server error responses"""
+    for attempt in range(MAX_RETRIES + 1):
+        with METRICS.time_stage('fetch'):
+            response = requests.get(url)
+        METRICS.bytes_in.inc(len(response.content), stage='fetch')
+        
+        if (response.status_code != 429 and response.status_code < 500) or attempt == MAX_RETRIES:
+            return response
+        
+        # Honour Retry-After when the server sends it, otherwise back off exponentially
+        METRICS.retries.inc(reason=str(response.status_code))
+        retry_after = response.headers.get('Retry-After', '')
+        time.sleep(float(retry_after) if retry_after.isdigit() else REQUEST_DELAY * 2 ** attempt)
+    
+    return response
+
 def scrape_plant_details(plant_name, zone_name, zone_code):
     """Scrape detailed plant information for a specific plant and zone"""
     # Format plant name for URL
-    formatted_plant_name = quote_plus(plant_name)
-    url = f"https://www.gardenate.com/plant/{formatted_plant_name}?zone={zone_code}"
-    
-    print(f"Scraping detailed info for {plant_name} in {zone_name} (zone code: {zone_code})...")
+    formatted_plant_name = plant_slug(plant_name)
+    url = f"{BASE_URL}/plant/{formatted_plant_name}?zone={zone_code}"
     
     try:
-        response = requests.get(url)
+        response = fetch_page(url)
         if response.status_code != 200:
             print(f"Failed to retrieve data for {plant_name} in {zone_name}")
             return None
         
+        # Gardenate serves its default zone for unknown codes, so reject pages for any other zone
+        matches, found_zone = check_page_zone(response.text, zone_code)
+        if not matches:
+            print(f"Rejected {plant_name} in {zone_name}: page is for {found_zone or 'an unknown zone'}")
+            METRICS.items.inc(stage='validate', outcome='zone_mismatch')
+            return None
+        
         # Extract detailed information
-        detailed_info = extract_detailed_info(response.text)
+        with METRICS.time_stage('parse'):
+            detailed_info = extract_detailed_info(response.text)
         
         # Add metadata
         detailed_info["plant_name"] = plant_name
@@ -170,20 +141,72 @@ def scrape_plant_details(plant_name, zone_name, zone_code):
         print(f"Error scraping {plant_name} in {zone_name}: {str(e)}")
         return None
 
-def main():
-    """Main function to scrape all plants and zones"""
+def main(plant_names=None, budget=None):
+    """Main function to scrape all plants and zones, or only the given plants.
+    
+    With a budget, only that many pages are fetched, most likely to have changed first.
+    """
+    # Create directory for detailed data
+    os.makedirs('gardenate_detailed_data', exist_ok=True)
+    
+    started_at = time.strftime('%Y-%m-%dT%H:%M:%S')
     all_data = {}
+    if (plant_names is not None or budget is not None) and os.path.exists(ALL_DETAILED_DATA_FILE):
+        # Partial refresh: keep the other plants and zones in the combined file, except plants
+        # that have left the plant index
+        with open(ALL_DETAILED_DATA_FILE, 'r') as f:
+            all_data = json.load(f)
+        for name in removed_plants(all_data):
+            print(f"Removed {name} from {ALL_DETAILED_DATA_FILE}: no longer in the plant index")
+            del all_data[name]
+    if plant_names is None:
+        plant_names = catalogue_plant_names()
+    
+    scheduler = CrawlScheduler.load(SCHEDULE_FILE)
+    if budget is None:
+        crawl_plan = {plant_name: climate_zones for plant_name in plant_names}
+    else:
+        pages = [(plant_name, zone_name) for plant_name in plant_names for zone_name in climate_zones]
+        crawl_plan = group_by_plant(scheduler.plan(pages, budget), climate_zones)
+    
+    progress = Progress(sum(len(zones) for zones in crawl_plan.values()), "Scraping")
+    zone_classes = ZoneClasses.load(ZONE_CLASSES_FILE)
     
-    for plant_name in plants:
-        plant_data = {}
+    for plant_name, plant_zones in crawl_plan.items():
+        zone_results = {}
         
-        for zone_name, zone_code in climate_zones.items():
+        # Representatives of each group of identical zones are fetched first; the rest of a
+        # group is copied from its representative when that page has not changed
+        for zone_name, zone_code, source in zone_classes.plan(plant_name, plant_zones):
+            if source is not None and source in zone_results and zone_classes.can_reuse(plant_name, source):
+                zone_results[zone_name] = {
+                    **zone_results[source],
+                    "zone_name": zone_name,
+                    "zone_code": zone_code,
+                    "url": f"{BASE_URL}/plant/{plant_slug(plant_name)}?zone={zone_code}",
+                }
+                zone_classes.observe(plant_name, zone_name, zone_classes.fresh[(plant_name, source)])
+                scheduler.record(plant_name, zone_name, zone_classes.fresh[(plant_name, source)])
+                METRICS.cache.inc(result='hit')
+                progress.update(detail=plant_name)
+                continue
+            
             # Add a delay to avoid overwhelming the server
-            time.sleep(1)
+            time.sleep(REQUEST_DELAY)
             
             detailed_info = scrape_plant_details(plant_name, zone_name, zone_code)
+            fingerprint = None
             if detailed_info:
-                plant_data[zone_name] = detailed_info
+                zone_results[zone_name] = detailed_info
+                fingerprint = zone_fingerprint({field: detailed_info[field] for field in DETAIL_FIELDS})
+                zone_classes.observe(plant_name, zone_name, fingerprint)
+            scheduler.record(plant_name, zone_name, fingerprint)
+            if source is not None:
+                METRICS.cache.inc(result='miss')
+            progress.update(detail=plant_name)
+        
+        zone_results = {**all_data.get(plant_name, {}), **zone_results}
+        plant_data = {zone_name: zone_results[zone_name] for zone_name in climate_zones if zone_name in zone_results}
         
         # Save data for this plant
         if plant_data:
@@ -191,16 +214,25 @@ def main():
             
             # Save individual plant data
             filename = f"gardenate_detailed_data/{plant_name.replace('/', '-')}.json"
-            with open(filename, 'w') as f:
-                json.dump(plant_data, f, indent=2)
-            
-            print(f"Saved detailed data for {plant_name}")
+            with METRICS.time_stage('write'):
+                content = json.dumps(plant_data, indent=2)
+                with atomic_open(filename) as f:
+                    f.write(content)
+            METRICS.bytes_out.inc(len(content.encode('utf-8')), stage='write')
     
     # Save all data to a single file
-    with open("gardenate_detailed_data/all_detailed_data.json", 'w') as f:
-        json.dump(all_data, f, indent=2)
+    write_json(ALL_DETAILED_DATA_FILE, all_data, indent=2)
+    zone_classes.save(ZONE_CLASSES_FILE)
+    scheduler.save(SCHEDULE_FILE)
+    if budget is None:
+        mark_crawled('scrape_gardenate_details', started_at)
     
     print("Completed scraping detailed plant information")
+    METRICS.finish("scrape_gardenate_details")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    profile_from_argv()
+    
+    # --changed-only scrapes just the plants plant_discovery.py found new or moved since the last run;
+    # --budget=N fetches only the N pages most likely to have changed
+    main(changed_plants('scrape_gardenate_details') if '--changed-only' in sys.argv else None, budget_from_argv()) 
\ No newline at end of file
@@ -11,6 +11,7 @@ const fs = require('fs');
 const path = require('path');
 const mongoose = require('mongoose');
 const Plant = require('../models/Plant');
+const { applyDeltaPatch, readDeltaPatch, readSnapshot } = require('../utils/gardenateDelta');
 require('dotenv').config({ path: path.join(__dirname, '../../.env') });
 
 // Map Gardenate climate zones to our hardiness zones
@@ -37,6 +38,9 @@ const calendarCodeMapping = {
 // Path to the Gardenate data directory
 const gardenateDataPath = path.join(__dirname, '../../garden_data');
 
+// Snapshot (all_<plant>.json files) that delta patches are applied to unless --snapshot is given
+const defaultSnapshotPath = path.join(__dirname, '../../garden_data_enhanced');
+
 /**
  * Read all plant data from the Gardenate data directory
  * @returns {Array} Array of plant data objects
@@ -94,6 +98,46 @@ async function readGardenateData() {
   }
 }
 
+/**
+ * Options for a delta import: --delta <patch.json> [--snapshot <dir>]
+ * @returns {Object|null} {patchPath, snapshotDir}, or null when running a full import
+ */
+function deltaOptions() {
+  const flagIndex = process.argv.indexOf('--delta');
+  if (flagIndex === -1 || !process.argv[flagIndex + 1]) return null;
+  const snapshotIndex = process.argv.indexOf('--snapshot');
+  return {
+    patchPath: path.resolve(process.argv[flagIndex + 1]),
+    snapshotDir: snapshotIndex !== -1 && process.argv[snapshotIndex + 1]
+      ? path.resolve(process.argv[snapshotIndex + 1])
+      : defaultSnapshotPath
+  };
+}
+
+/**
+ * Read the all_<plant>.json snapshot a delta patch was built from and apply the patch to it
+ * @param {Object} options - From deltaOptions()
+ * @returns {Array} The added and updated plants; rejected updates are reported and skipped
+ */
+function readDeltaPlants(options) {
+  console.log(`Reading delta patch from ${options.patchPath}`);
+  const patch = readDeltaPatch(options.patchPath);
+  console.log(`Reading the snapshot the patch applies to from ${options.snapshotDir}`);
+  const snapshot = readSnapshot(options.snapshotDir);
+
+  const { changed, removed, rejected } = applyDeltaPatch(snapshot, patch);
+  for (const name of removed) {
+    console.log(`Delta removes ${name}; leaving the database entry in place`);
+  }
+  for (const { name, reason } of rejected) {
+    console.error(`Rejected the delta for ${name}: ${reason}`);
+  }
+  if (rejected.length > 0) {
+    process.exitCode = 1;
+  }
+  return changed;
+}
+
 /**
  * Convert Gardenate monthly calendar to our format
  * @param {Object} monthlyCalendar - Gardenate monthly calendar object
@@ -224,8 +268,12 @@ function formatGrowingRequirements(growingInfo) {
     soil_temperature: { min: null, optimal: null, maximum: null }
   };
 
-  // Extract soil temperature if available
-  if (growingInfo.soil_temperature) {
+  // Prefer the numeric soil temperature range emitted by integrate_detailed_data.py
+  if (growingInfo.soil_temperature_c) {
+    requirements.soil_temperature.min = growingInfo.soil_temperature_c.min;
+    requirements.soil_temperature.optimal = (growingInfo.soil_temperature_c.min + growingInfo.soil_temperature_c.max) / 2;
+    requirements.soil_temperature.maximum = growingInfo.soil_temperature_c.max;
+  } else if (growingInfo.soil_temperature) {
     const tempMatch = growingInfo.soil_temperature.match(/(\d+)°C and (\d+)°C/);
     if (tempMatch) {
       requirements.soil_temperature.min = parseInt(tempMatch[1]);
@@ -300,7 +348,12 @@ function formatPlantData(gardenatePlant) {
       shade_tolerance: 'moderate'
     },
     life_cycle: 'annual', // Default value
-    days_to_maturity: formatHarvestTime(firstZoneData.growing_info?.harvest_time),
+    days_to_maturity: firstZoneData.growing_info?.harvest_weeks
+      ? {
+          min: Math.round(firstZoneData.growing_info.harvest_weeks.min * 7),
+          max: Math.round(firstZoneData.growing_info.harvest_weeks.max * 7)
+        }
+      : formatHarvestTime(firstZoneData.growing_info?.harvest_time),
     days_to_germination: { min: null, max: null, optimal_temp: null },
     spacing: formatSpacing(firstZoneData.growing_info?.spacing),
     planting_depth: null,
@@ -426,9 +479,17 @@ async function integrateGardenateData() {
     });
     console.log('Connected to MongoDB');
 
-    // Read Gardenate data
-    const gardenatePlants = await readGardenateData();
-    console.log(`Read ${gardenatePlants.length} plants from Gardenate data`);
+    // Read Gardenate data; with --delta, only the plants the patch adds or updates, patched
+    // from the snapshot the patch was built from
+    let gardenatePlants;
+    const delta = deltaOptions();
+    if (delta) {
+      gardenatePlants = readDeltaPlants(delta);
+      console.log(`Delta patch touches ${gardenatePlants.length} plants`);
+    } else {
+      gardenatePlants = await readGardenateData();
+      console.log(`Read ${gardenatePlants.length} plants from Gardenate data`);
+    }
 
     if (gardenatePlants.length === 0) {
       console.error('No plants found in Gardenate data. Aborting integration.');
@@ -132,6 +132,15 @@ app.use('/api/export', apiLimiter, pdfExportRoutes);
 
 // Serve static assets in production
 if (process.env.NODE_ENV === 'production') {
+  // Zone bundles are named by content hash and can be cached for good; their index is revalidated
+  app.use('/zone_bundles', express.static(path.join(__dirname, '../client/build/zone_bundles'), {
+    setHeaders: (res, filePath) => {
+      res.setHeader('Cache-Control', path.basename(filePath) === 'index.json'
+        ? 'no-cache'
+        : 'public, max-age=31536000, immutable');
+    }
+  }));
+
   // Set static folder
   app.use(express.static(path.join(__dirname, '../client/build')));
   
@@ -0,0 +1,171 @@
+/**
+ * Apply dataset_delta.py patches to an all_<plant>.json snapshot, as `dataset_delta.py apply` does
+ *
+ * Kept free of database dependencies so the import script and the tests can share it.
+ */
+
+const crypto = require('crypto');
+const fs = require('fs');
+const path = require('path');
+
+const PATCH_VERSION = 1;
+
+/**
+ * Read every all_<plant>.json file in a snapshot directory, keyed by plant name
+ * (the combined all_plants.json is skipped, as in dataset_delta.load_snapshot)
+ * @param {String} snapshotDir - Directory the patch was built from
+ * @returns {Map} Plant name -> plant data
+ */
+function readSnapshot(snapshotDir) {
+  const plants = new Map();
+  const files = fs.readdirSync(snapshotDir)
+    .filter(file => file.startsWith('all_') && file.endsWith('.json') && file !== 'all_plants.json')
+    .sort();
+  for (const file of files) {
+    const plant = JSON.parse(fs.readFileSync(path.join(snapshotDir, file), 'utf8'));
+    plants.set(plant.name, plant);
+  }
+  return plants;
+}
+
+/**
+ * JSON with sorted keys and no whitespace, matching dataset_delta.plant_hash
+ * @param {*} value - Parsed JSON value
+ * @returns {String} Canonical JSON text
+ */
+function canonicalJson(value) {
+  if (Array.isArray(value)) {
+    return `[${value.map(canonicalJson).join(',')}]`;
+  }
+  if (value !== null && typeof value === 'object') {
+    return `{${Object.keys(value).sort().map(key => `${JSON.stringify(key)}:${canonicalJson(value[key])}`).join(',')}}`;
+  }
+  return JSON.stringify(value);
+}
+
+/**
+ * Content hash of a plant, independent of key order (dataset_delta.plant_hash)
+ * @param {Object} plant - Plant data
+ * @returns {String} First 16 hex digits of the SHA-256 of the canonical JSON
+ */
+function plantHash(plant) {
+  return crypto.createHash('sha256').update(canonicalJson(plant), 'utf8').digest('hex').slice(0, 16);
+}
+
+/**
+ * Read a delta patch written by dataset_delta.py
+ * @param {String} patchPath - Path to the patch file
+ * @returns {Object} The parsed patch
+ */
+function readDeltaPatch(patchPath) {
+  const patch = JSON.parse(fs.readFileSync(patchPath, 'utf8'));
+  if (patch.version !== PATCH_VERSION) {
+    throw new Error(`Unsupported delta patch version: ${patch.version}`);
+  }
+  return patch;
+}
+
+/**
+ * Set or remove a dotted field path inside a zone entry
+ * @param {Object} target - Zone entry to modify
+ * @param {String} fieldPath - Dotted path such as "data.monthly_calendar.jan"
+ * @param {*} value - Value to set, or undefined to remove the field
+ */
+function setDeltaField(target, fieldPath, value) {
+  const keys = fieldPath.split('.');
+  for (const key of keys.slice(0, -1)) {
+    const isObject = target[key] !== null && typeof target[key] === 'object' && !Array.isArray(target[key]);
+    if (value === undefined && !isObject) return;
+    if (!isObject) target[key] = {};
+    target = target[key];
+  }
+  if (value === undefined) {
+    delete target[keys[keys.length - 1]];
+  } else {
+    target[keys[keys.length - 1]] = value;
+  }
+}
+
+/**
+ * Apply the per-zone changes for one plant in place (dataset_delta.apply_plant_patch)
+ * @param {Object} plant - Plant data
+ * @param {Object} changes - The plant's entry in the patch
+ */
+function applyPlantPatch(plant, changes) {
+  const zones = new Map((plant.zones || []).map(zone => [zone.zone_name, zone]));
+  for (const [zoneName, zoneChange] of Object.entries(changes.zones || {})) {
+    if (zoneChange.op === 'add') {
+      zones.set(zoneName, zoneChange.value);
+    } else if (zoneChange.op === 'remove') {
+      zones.delete(zoneName);
+    } else {
+      const zone = zones.get(zoneName);
+      // Unsets first, so a field replaced by a whole value is not removed afterwards
+      for (const fieldPath of zoneChange.unset || []) {
+        setDeltaField(zone, fieldPath, undefined);
+      }
+      for (const [fieldPath, value] of Object.entries(zoneChange.set || {})) {
+        setDeltaField(zone, fieldPath, value);
+      }
+    }
+  }
+  const zoneOrder = changes.zone_order || (plant.zones || []).map(zone => zone.zone_name);
+  plant.zones = zoneOrder.filter(zoneName => zones.has(zoneName)).map(zoneName => zones.get(zoneName));
+}
+
+/**
+ * Apply a delta patch to the snapshot it was built from
+ *
+ * An update is applied only to a plant whose hash matches the patch's base_hash, and kept only
+ * if the result matches its target_hash; any other update is rejected, as dataset_delta.apply_patch
+ * refuses it.
+ * @param {Map} plants - Plant name -> plant data, from readSnapshot (modified in place)
+ * @param {Object} patch - Delta patch from dataset_delta.py
+ * @returns {Object} {changed: added or updated plants, removed: names, rejected: [{name, reason}]}
+ */
+function applyDeltaPatch(plants, patch) {
+  const result = { changed: [], removed: [], rejected: [] };
+
+  for (const [name, changes] of Object.entries(patch.plants)) {
+    if (changes.op === 'remove') {
+      plants.delete(name);
+      result.removed.push(name);
+      continue;
+    }
+    if (changes.op === 'add') {
+      plants.set(name, changes.value);
+      result.changed.push(changes.value);
+      continue;
+    }
+
+    const plant = plants.get(name);
+    if (!plant) {
+      result.rejected.push({ name, reason: 'not in the snapshot' });
+      continue;
+    }
+    if (plantHash(plant) !== changes.base_hash) {
+      result.rejected.push({ name, reason: 'the patch was made against a different version of the plant' });
+      continue;
+    }
+    const patched = JSON.parse(JSON.stringify(plant));
+    applyPlantPatch(patched, changes);
+    if (plantHash(patched) !== changes.target_hash) {
+      result.rejected.push({ name, reason: 'applying the patch did not produce the expected result' });
+      continue;
+    }
+    plants.set(name, patched);
+    result.changed.push(patched);
+  }
+
+  return result;
+}
+
+module.exports = {
+  applyDeltaPatch,
+  applyPlantPatch,
+  canonicalJson,
+  plantHash,
+  readDeltaPatch,
+  readSnapshot,
+  setDeltaField
+};
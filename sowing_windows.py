@@ -0,0 +1,207 @@
+import json
+import math
+import os
+import sys
+
+from atomic_io import write_json
+from catalogue_io import load_plants_from_dir
+from integrate_detailed_data import parse_soil_temperature_range
+
+INPUT_DIR = 'garden_data_enhanced'
+OUTPUT_FILE = os.path.join(INPUT_DIR, 'sowing_windows.json')
+SOIL_TEMPERATURE_FILE = os.path.join('server', 'data', 'soil-temperature.json')
+
+WEEKS = 52
+ALL_WEEKS = (1 << WEEKS) - 1
+MONTHS = ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec']
+DAYS_IN_MONTH = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
+METHODS = ['S', 'T', 'P']
+
+# Seed germinates at about this depth; soil-temperature.json has surface, 4inch and 8inch
+SOIL_DEPTH = '4inch'
+
+# soil-temperature.json holds seasonal averages; each is taken as the temperature in the middle
+# of its (meteorological) season, the first of which is mid-January
+SEASON_CENTRE_DAY = 15
+SEASONS = {
+    'northern': ['winter', 'spring', 'summer', 'fall'],
+    'southern': ['summer', 'fall', 'winter', 'spring'],
+}
+
+# (country, region, regional factor, hemisphere) in soil-temperature.json for each Gardenate zone.
+# There are no New Zealand averages; the southern Australian curves are the closest climate.
+ZONE_SOIL_REGIONS = {
+    "Australia - arid": ('australia', 'central', 'desert', 'southern'),
+    "Australia - cool/mountain": ('australia', 'southern', 'mountain', 'southern'),
+    "Australia - sub-tropical": ('australia', 'central', None, 'southern'),
+    "Australia - temperate": ('australia', 'southern', None, 'southern'),
+    "Australia - tropical": ('australia', 'northern', None, 'southern'),
+    "New Zealand - cool/mountain": ('australia', 'southern', 'mountain', 'southern'),
+    "New Zealand - sub-tropical": ('australia', 'southern', None, 'southern'),
+    "New Zealand - temperate": ('australia', 'southern', 'coastal', 'southern'),
+    "United Kingdom - cool/temperate": ('uk', 'north', None, 'northern'),
+    "United Kingdom - warm/temperate": ('uk', 'south', None, 'northern'),
+}
+
+
+def _month_of_week(week):
+    """Month index of the middle day of a 0-based week"""
+    day = week * 7 + 3
+    for month, days in enumerate(DAYS_IN_MONTH):
+        if day < days:
+            return month
+        day -= days
+    return 11
+
+
+# MONTH_WEEKS[m] has a bit set for every week whose middle falls in month m
+MONTH_WEEKS = [sum(1 << week for week in range(WEEKS) if _month_of_week(week) == month) for month in range(12)]
+
+
+def weekly_curve(seasonal_values, hemisphere):
+    """Interpolate four seasonal values into one value per week.
+
+    The curve is the trigonometric polynomial through the four season centres (a mean, an annual
+    harmonic and a half-year term), so it is smooth, periodic and passes through every average.
+    """
+    y0, y1, y2, y3 = (seasonal_values[season] for season in SEASONS[hemisphere])
+    mean = (y0 + y1 + y2 + y3) / 4
+    cos1, sin1, cos2 = (y0 - y2) / 2, (y1 - y3) / 2, (y0 - y1 + y2 - y3) / 4
+    curve = []
+    for week in range(WEEKS):
+        angle = 2 * math.pi * (week * 7 + 3 - SEASON_CENTRE_DAY) / 365
+        curve.append(mean + cos1 * math.cos(angle) + sin1 * math.sin(angle) + cos2 * math.cos(2 * angle))
+    return curve
+
+
+def zone_soil_curves(soil_data, depth=SOIL_DEPTH):
+    """{Gardenate zone: 52 weekly soil temperatures in °C}"""
+    curves = {}
+    for zone_name, (country, region, factor, hemisphere) in ZONE_SOIL_REGIONS.items():
+        seasons = soil_data['historical_averages'][country][region]
+        offset = soil_data['regional_factors'][factor] if factor else 0
+        fahrenheit = weekly_curve({season: values[depth] + offset for season, values in seasons.items()}, hemisphere)
+        curves[zone_name] = [round((value - 32) * 5 / 9, 1) for value in fahrenheit]
+    return curves
+
+
+def soil_fit_mask(curve, temperature_range):
+    """Bit set for every week whose soil temperature is inside temperature_range ({min, max} °C)"""
+    if not temperature_range:
+        return ALL_WEEKS
+    low, high = temperature_range['min'], temperature_range['max']
+    return sum(1 << week for week, value in enumerate(curve) if low <= value <= high)
+
+
+def calendar_masks(monthly_calendar):
+    """{method: bit set for every week of the months the calendar marks with that method}"""
+    masks = dict.fromkeys(METHODS, 0)
+    for month, codes in enumerate(monthly_calendar.get(month_name, []) for month_name in MONTHS):
+        for code in codes:
+            if code in masks:
+                masks[code] |= MONTH_WEEKS[month]
+    return masks
+
+
+def plant_soil_range(growing_info):
+    """The plant's germination range in °C, parsed from the text if the numeric field is missing"""
+    if 'soil_temperature_c' in growing_info:
+        return growing_info['soil_temperature_c']
+    return parse_soil_temperature_range(growing_info.get('soil_temperature', ''))
+
+
+def build_sowing_windows(plants, soil_data):
+    """Week-level sowing windows for every plant in every zone with a soil curve.
+
+    Weeks are kept as 52-bit masks (bit 0 = 1-7 January), so a window is the AND of the calendar
+    mask for a method and the weeks in which the soil suits the plant, and every plant in a zone
+    is filtered with a handful of integer operations. Gardenate's soil temperatures are for
+    germination, so only direct sowing ('P') is limited by them; seed trays and transplants keep
+    their calendar weeks. A germination range is a property of the plant, so a zone without one
+    uses the range given for another zone.
+
+    Returns {"curves": {zone: [°C per week]}, "windows": {zone: {plant: {method: mask}}}}.
+    """
+    curves = zone_soil_curves(soil_data)
+    windows = {}
+    fit_cache = {}
+    for plant in sorted(plants, key=lambda plant: plant['name']):
+        zones = [zone for zone in plant.get('zones', []) if zone['zone_name'] in curves]
+        ranges = [plant_soil_range(zone['data'].get('growing_info', {})) for zone in zones]
+        plant_range = next(filter(None, ranges), None)
+        for zone, soil_range in zip(zones, ranges):
+            soil_range = soil_range or plant_range
+            key = (zone['zone_name'], soil_range['min'], soil_range['max']) if soil_range else (zone['zone_name'],)
+            if key not in fit_cache:
+                fit_cache[key] = soil_fit_mask(curves[zone['zone_name']], soil_range)
+            masks = calendar_masks(zone['data'].get('monthly_calendar', {}))
+            masks['P'] &= fit_cache[key]
+            windows.setdefault(zone['zone_name'], {})[plant['name']] = masks
+    return {"curves": curves, "windows": windows}
+
+
+def write_sowing_windows(input_dir=INPUT_DIR, output_file=OUTPUT_FILE, soil_temperature_file=SOIL_TEMPERATURE_FILE):
+    """Precompute the sowing window table; masks are stored as 13-digit hex strings"""
+    with open(soil_temperature_file, 'r') as f:
+        soil_data = json.load(f)
+    table = build_sowing_windows(load_plants_from_dir(input_dir), soil_data)
+    write_json(output_file, {
+        "weeks": WEEKS,
+        "depth": SOIL_DEPTH,
+        "curves": table["curves"],
+        "windows": {
+            zone_name: {name: {method: f"{mask:013x}" for method, mask in masks.items()} for name, masks in plants.items()}
+            for zone_name, plants in table["windows"].items()
+        },
+    }, separators=(',', ':'))
+    return {
+        "zones": len(table["windows"]),
+        "plant_zones": sum(len(plants) for plants in table["windows"].values()),
+        "bytes": os.path.getsize(output_file),
+    }
+
+
+class SowingWindows:
+    """Read side of sowing_windows.json: constant-time week lookups"""
+
+    def __init__(self, path=OUTPUT_FILE):
+        with open(path, 'r') as f:
+            table = json.load(f)
+        self.curves = table["curves"]
+        self.windows = {
+            zone_name: {name: {method: int(mask, 16) for method, mask in masks.items()} for name, masks in plants.items()}
+            for zone_name, plants in table["windows"].items()
+        }
+
+    def mask(self, plant_name, zone_name, method='P'):
+        return self.windows.get(zone_name, {}).get(plant_name, {}).get(method, 0)
+
+    def can_sow(self, plant_name, zone_name, week, method='P'):
+        """week is 0-based (0 = 1-7 January)"""
+        return bool(self.mask(plant_name, zone_name, method) >> week & 1)
+
+    def weeks(self, plant_name, zone_name, method='P'):
+        mask = self.mask(plant_name, zone_name, method)
+        return [week for week in range(WEEKS) if mask >> week & 1]
+
+
+def week_strip(mask, code):
+    """One character per week, e.g. '....PPPP....'"""
+    return ''.join(code if mask >> week & 1 else '.' for week in range(WEEKS))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] != '--write':
+        if not os.path.exists(OUTPUT_FILE):
+            print(f"No sowing window table at {OUTPUT_FILE}; run `python sowing_windows.py --write` first.")
+            sys.exit(1)
+        windows = SowingWindows()
+        for zone_name in sorted(windows.windows):
+            masks = windows.windows[zone_name].get(sys.argv[1])
+            if masks:
+                print(f"{zone_name:<32} " + ' '.join(week_strip(masks[method], method) for method in METHODS))
+        sys.exit(0)
+
+    stats = write_sowing_windows()
+    print(f"Sowing windows for {stats['plant_zones']} plant/zone pairs in {stats['zones']} zones: "
+          f"{stats['bytes'] / 1024:.0f} KiB -> {OUTPUT_FILE}")
@@ -0,0 +1,275 @@
+import argparse
+import datetime
+import json
+import math
+import os
+import random
+import sys
+import time
+
+from atomic_io import atomic_open
+from catalogue_io import load_plants_from_dir
+from integrate_detailed_data import parse_harvest_range
+from plant_names import PlantNameResolver
+from sowing_windows import SOIL_TEMPERATURE_FILE, WEEKS, build_sowing_windows
+
+INPUT_DIR = 'garden_data_enhanced'
+DETAILED_DATA_FILE = os.path.join('gardenate_detailed_data', 'all_detailed_data.json')
+
+# Sow again at least this often, even when a crop's harvest window is shorter
+MIN_INTERVAL_WEEKS = 2
+# Crops that take this long to first harvest are sown once, not in succession
+SINGLE_SOWING_WEEKS = 26
+# The method used when a week allows several: direct sowing first, seed trays last
+METHOD_PREFERENCE = ['P', 'T', 'S']
+
+
+def load_harvest_ranges(plants, detailed_data_file=DETAILED_DATA_FILE):
+    """{(zone, plant): {min, max} weeks}, using a plant's range from any zone or the scraped
+    details when a zone has none (Gardenate gives the same harvest time in every zone)"""
+    fallback = {}
+    if detailed_data_file and os.path.exists(detailed_data_file):
+        with open(detailed_data_file, 'r') as f:
+            for plant_name, zones in json.load(f).items():
+                ranges = (parse_harvest_range(record.get('harvest', '')) for record in zones.values())
+                fallback[plant_name.lower()] = next(filter(None, ranges), None)
+
+    ranges = {}
+    for plant in plants:
+        zone_ranges = {}
+        for zone in plant.get('zones', []):
+            growing_info = zone['data'].get('growing_info', {})
+            zone_ranges[zone['zone_name']] = (growing_info['harvest_weeks'] if 'harvest_weeks' in growing_info
+                                              else parse_harvest_range(growing_info.get('harvest_time', '')))
+        plant_range = next(filter(None, zone_ranges.values()), None) or fallback.get(plant['name'].lower())
+        for zone_name, harvest in zone_ranges.items():
+            ranges[(zone_name, plant['name'])] = harvest or plant_range
+    return ranges
+
+
+def season_start(mask):
+    """The first sowable week after the longest run of unsowable weeks, so a window that spans the
+    new year (e.g. weeks 40-51 and 0-3 in the southern hemisphere) is planned as one season"""
+    if mask == (1 << WEEKS) - 1:
+        return 0
+    best_week, best_gap, gap = 0, -1, 0
+    for offset in range(2 * WEEKS):
+        week = offset % WEEKS
+        if mask >> week & 1:
+            if offset >= WEEKS and gap > best_gap:
+                best_week, best_gap = week, gap
+            gap = 0
+        else:
+            gap += 1
+    return best_week
+
+
+def _valid_interval(interval):
+    return interval is None or (isinstance(interval, int) and not isinstance(interval, bool) and interval >= 1)
+
+
+class SuccessionPlanner:
+    """Staggered sowings that keep a crop harvesting through its season in one zone.
+
+    A sowing in week w is harvested from w + min to w + max weeks of the crop's harvest time, so
+    the next one is due (max - min) weeks later, or in the next week the zone's sowing windows
+    allow it. Plans depend only on (zone, crop, interval), so a batch of gardens computes each
+    distinct plan once and shares it.
+    """
+
+    def __init__(self, windows, harvest_ranges, resolver=None):
+        self.windows = windows
+        self.harvest_ranges = harvest_ranges
+        self.resolver = resolver
+        self._plans = {}
+        self._dated_plans = {}
+
+    @classmethod
+    def from_catalogue(cls, input_dir=INPUT_DIR, soil_temperature_file=SOIL_TEMPERATURE_FILE,
+                       detailed_data_file=DETAILED_DATA_FILE):
+        plants = load_plants_from_dir(input_dir)
+        with open(soil_temperature_file, 'r') as f:
+            windows = build_sowing_windows(plants, json.load(f))["windows"]
+        return cls(windows, load_harvest_ranges(plants, detailed_data_file), PlantNameResolver.from_plants(plants))
+
+    def plan(self, zone_name, crop, interval=None):
+        """{crop, zone, interval, season_start, sowings: [{week, method, harvest_from, harvest_to}],
+        harvest_weeks} or {crop, zone, error}; the result is shared, do not modify it.
+
+        Sowing weeks are 0-based (0 = 1-7 January) and in calendar order. Harvest weeks count from
+        the start of the same year, so 60 is week 8 of the next year. The season starts in week
+        season_start; sowings in earlier weeks fall after the new year in the same season.
+        """
+        if not _valid_interval(interval):
+            # Garden files are user input; a zero interval would never advance the plan
+            return {"crop": crop, "zone": zone_name, "error": f"interval must be a whole number of weeks >= 1, not {interval!r}"}
+        key = (zone_name, crop, interval)
+        if key not in self._plans:
+            self._plans[key] = self._plan(zone_name, crop, interval)
+        return self._plans[key]
+
+    def _plan(self, zone_name, crop, interval):
+        name = crop if crop in self.windows.get(zone_name, {}) else (self.resolver.resolve(crop) if self.resolver else None)
+        masks = self.windows.get(zone_name, {}).get(name)
+        if masks is None:
+            error = f"no calendar for {zone_name}" if zone_name not in self.windows else f"unknown crop {crop!r}"
+            return {"crop": crop, "zone": zone_name, "error": error}
+        harvest = self.harvest_ranges.get((zone_name, name))
+        if not harvest:
+            return {"crop": name, "zone": zone_name, "error": "no harvest time"}
+
+        sowable = masks['P'] | masks['T'] | masks['S']
+        if not sowable:
+            return {"crop": name, "zone": zone_name, "error": "not sown in this zone"}
+
+        first, last = math.ceil(harvest['min']), max(math.ceil(harvest['min']), math.floor(harvest['max']))
+        if interval is None:
+            interval = max(MIN_INTERVAL_WEEKS, last - first)
+        single = first >= SINGLE_SOWING_WEEKS
+
+        # Stagger from the start of the season, which may be late in the year
+        start = season_start(sowable)
+        sowings = []
+        harvest_mask = 0
+        offset = 0
+        while offset < WEEKS:
+            week = (start + offset) % WEEKS
+            if not sowable >> week & 1:
+                offset += 1
+                continue
+            method = next(code for code in METHOD_PREFERENCE if masks[code] >> week & 1)
+            sowings.append({"week": week, "method": method, "harvest_from": week + first, "harvest_to": week + last})
+            for harvest_week in range(week + first, min(week + last, week + first + WEEKS - 1) + 1):
+                harvest_mask |= 1 << harvest_week % WEEKS
+            if single:
+                break
+            offset += interval
+
+        return {
+            "crop": name,
+            "zone": zone_name,
+            "interval": None if single else interval,
+            "season_start": start,
+            "sowings": sorted(sowings, key=lambda sowing: sowing['week']),
+            "harvest_weeks": bin(harvest_mask).count('1'),
+        }
+
+    def dated_plan(self, zone_name, crop, year, interval=None):
+        """plan() with every week replaced by the ISO date it starts on, for the season that starts
+        in year; sowings after the new year are dated in year + 1, and all are in date order"""
+        if not _valid_interval(interval):
+            return self.plan(zone_name, crop, interval)
+        key = (zone_name, crop, interval, year)
+        if key not in self._dated_plans:
+            plan = self.plan(zone_name, crop, interval)
+            if 'sowings' in plan:
+                sowings = []
+                season_order = lambda sowing: (sowing['week'] < plan['season_start'], sowing['week'])
+                for sowing in sorted(plan['sowings'], key=season_order):
+                    start = datetime.date(year + (sowing['week'] < plan['season_start']), 1, 1)
+                    sowings.append({
+                        "date": (start + datetime.timedelta(weeks=sowing['week'])).isoformat(),
+                        "method": sowing['method'],
+                        "harvest_from": (start + datetime.timedelta(weeks=sowing['harvest_from'])).isoformat(),
+                        "harvest_to": (start + datetime.timedelta(weeks=sowing['harvest_to'])).isoformat(),
+                    })
+                plan = dict(plan, sowings=sowings)
+            self._dated_plans[key] = plan
+        return self._dated_plans[key]
+
+    def plan_gardens(self, gardens, year):
+        """Full-year plans for many gardens: yields {id, zone, plans: [dated plan per crop]}.
+
+        A garden is {"id", "zone", "crops": [name or {"name", "interval"}]}.
+        """
+        for garden in gardens:
+            plans = []
+            for crop in garden.get('crops', []):
+                name, interval = (crop, None) if isinstance(crop, str) else (crop['name'], crop.get('interval'))
+                plans.append(self.dated_plan(garden['zone'], name, year, interval))
+            yield {"id": garden.get('id'), "zone": garden['zone'], "plans": plans}
+
+
+def read_gardens(path):
+    """Gardens from a JSON list or a JSON-lines file"""
+    with open(path, 'r') as f:
+        if f.read(1) == '[':
+            f.seek(0)
+            yield from json.load(f)
+            return
+        f.seek(0)
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _write_json_lines(items, f):
+    count = 0
+    for item in items:
+        f.write(json.dumps(item, ensure_ascii=False) + '\n')
+        count += 1
+    return count
+
+
+def _positive_int(text):
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {value}")
+    return value
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Succession-sowing plans from harvest times and sowing windows")
+    parser.add_argument('zone', nargs='?', help="Gardenate zone, e.g. 'Australia - temperate'")
+    parser.add_argument('crops', nargs='*', help="Crop names")
+    parser.add_argument('--interval', type=_positive_int, help="Weeks between sowings (default: the crop's harvest window)")
+    parser.add_argument('--year', type=int, default=datetime.date.today().year)
+    parser.add_argument('--gardens', metavar='FILE', help="Plan every garden in a JSON or JSON-lines file")
+    parser.add_argument('--output', metavar='FILE', help="Write the --gardens plans as JSON lines here")
+    parser.add_argument('--bench', type=int, metavar='N', help="Time plans for N random gardens")
+    parser.add_argument('--input-dir', default=INPUT_DIR)
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    planner = SuccessionPlanner.from_catalogue(args.input_dir)
+    print(f"Loaded {sum(len(plants) for plants in planner.windows.values())} plant/zone windows "
+          f"in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+    if args.bench:
+        rng = random.Random(0)
+        zones = sorted(planner.windows)
+        crops = sorted({name for plants in planner.windows.values() for name in plants})
+        gardens = [{"id": i, "zone": rng.choice(zones), "crops": rng.sample(crops, 12)} for i in range(args.bench)]
+        start = time.perf_counter()
+        sowings = sum(len(plan.get('sowings', ())) for garden in planner.plan_gardens(gardens, args.year)
+                      for plan in garden['plans'])
+        elapsed = time.perf_counter() - start
+        print(f"Planned {args.bench} gardens x 12 crops ({sowings} sowings) in {elapsed:.2f}s")
+        return 0
+
+    if args.gardens:
+        plans = planner.plan_gardens(read_gardens(args.gardens), args.year)
+        if args.output:
+            with atomic_open(args.output) as f:
+                count = _write_json_lines(plans, f)
+        else:
+            count = _write_json_lines(plans, sys.stdout)
+        print(f"Planned {count} gardens", file=sys.stderr)
+        return 0
+
+    if not args.zone or not args.crops:
+        parser.error("give a zone and at least one crop, or --gardens FILE")
+    for crop in args.crops:
+        plan = planner.dated_plan(args.zone, crop, args.year, args.interval)
+        if 'error' in plan:
+            print(f"{crop}: {plan['error']}")
+            continue
+        every = f"sow every {plan['interval']} weeks" if plan['interval'] else "sow once"
+        print(f"{plan['crop']}: {every}, harvesting {plan['harvest_weeks']} weeks of the year")
+        for sowing in plan['sowings']:
+            print(f"  {sowing['date']}  {sowing['method']}  harvest {sowing['harvest_from']} to {sowing['harvest_to']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
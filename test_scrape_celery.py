@@ -3,10 +3,13 @@ from bs4 import BeautifulSoup
 import json
 import time
 import os
-from urllib.parse import quote_plus
+from atomic_io import atomic_open
+from climate_zones import check_page_zone, select_zones
+from plant_discovery import plant_slug
 
-# Create directory for test data
-os.makedirs('test_data', exist_ok=True)
+# Site to scrape and delay between requests; point these at replay_server.py for local load tests
+BASE_URL = os.environ.get('GARDENATE_BASE_URL', 'https://www.gardenate.com').rstrip('/')
+REQUEST_DELAY = float(os.environ.get('GARDENATE_REQUEST_DELAY', '2'))
 
 def extract_detailed_info(html_content):
     """Extract detailed growing information from the HTML content"""
@@ -88,20 +91,19 @@ def extract_detailed_info(html_content):
 
 def scrape_celery_details():
     """Scrape detailed information for Celery in various zones"""
+    # Create directory for test data
+    os.makedirs('test_data', exist_ok=True)
+    
     plant_name = "Celery"
-    formatted_plant_name = quote_plus(plant_name)
+    formatted_plant_name = plant_slug(plant_name)
     
     # Test with a few different zones
-    test_zones = {
-        "United Kingdom - cool/temperate": 26,
-        "USA - Zone 6b": 110,
-        "Australia - temperate": 4
-    }
+    test_zones = select_zones(["United Kingdom - cool/temperate", "USA - Zone 6b", "Australia - temperate"])
     
     all_data = {}
     
     for zone_name, zone_code in test_zones.items():
-        url = f"https://www.gardenate.com/plant/{formatted_plant_name}?zone={zone_code}"
+        url = f"{BASE_URL}/plant/{formatted_plant_name}?zone={zone_code}"
         print(f"\nScraping {plant_name} in {zone_name} (zone code: {zone_code})...")
         print(f"URL: {url}")
         
@@ -113,8 +115,14 @@ def scrape_celery_details():
             
             print("Successfully retrieved page")
             
+            # Gardenate serves its default zone for unknown codes, so reject pages for any other zone
+            matches, found_zone = check_page_zone(response.text, zone_code)
+            if not matches:
+                print(f"Rejected page: it is for {found_zone or 'an unknown zone'}")
+                continue
+            
             # Save the raw HTML for debugging
-            with open(f"test_data/celery_{zone_code}_raw.html", 'w', encoding='utf-8') as f:
+            with atomic_open(f"test_data/celery_{zone_code}_raw.html", encoding='utf-8') as f:
                 f.write(response.text)
             
             # Extract detailed information
@@ -129,13 +137,13 @@ def scrape_celery_details():
             all_data[zone_name] = detailed_info
             
             # Add a delay to avoid overwhelming the server
-            time.sleep(2)
+            time.sleep(REQUEST_DELAY)
             
         except Exception as e:
             print(f"Error scraping: {str(e)}")
     
     # Save the collected data
-    with open("test_data/celery_detailed.json", 'w') as f:
+    with atomic_open("test_data/celery_detailed.json") as f:
         json.dump(all_data, f, indent=2)
     
     print("\nTest scraping complete. Data saved to test_data/celery_detailed.json")
@@ -0,0 +1,42 @@
+import os
+import stat
+import tempfile
+import unittest
+
+from atomic_io import NEW_FILE_MODE, atomic_open, write_json
+
+
+class AtomicOpenTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'plants.json')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def mode(self):
+        return stat.S_IMODE(os.stat(self.path).st_mode)
+
+    def test_new_file_is_readable_by_others(self):
+        write_json(self.path, {"name": "Carrot"})
+        self.assertEqual(self.mode(), NEW_FILE_MODE)
+
+    def test_replaced_file_keeps_its_mode(self):
+        write_json(self.path, {"name": "Carrot"})
+        os.chmod(self.path, 0o600)
+        write_json(self.path, {"name": "Beetroot"})
+        self.assertEqual(self.mode(), 0o600)
+
+    def test_failed_write_leaves_the_old_file(self):
+        write_json(self.path, {"name": "Carrot"})
+        with self.assertRaises(RuntimeError):
+            with atomic_open(self.path) as f:
+                f.write('{"name": ')
+                raise RuntimeError("interrupted")
+        with open(self.path) as f:
+            self.assertEqual(f.read(), '{"name": "Carrot"}')
+        self.assertEqual(os.listdir(self.directory.name), ['plants.json'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import copy
+import os
+import tempfile
+import unittest
+
+from catalogue_binary import CatalogueReader, export_catalogue
+from catalogue_io import load_plants_from_dir
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'garden_data_enhanced')
+
+
+class CatalogueTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.plants = load_plants_from_dir(DATA_DIR)[:5]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'catalogue.gcat')
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        export_catalogue(self.plants, self.path)
+        with CatalogueReader(self.path) as reader:
+            self.assertEqual([view.to_dict() for view in reader], self.plants)
+
+    def test_calendar_bytes_view_the_memory_map(self):
+        export_catalogue(self.plants, self.path)
+        with CatalogueReader(self.path) as reader:
+            zone = reader.plant(0).zones[0]
+            calendar = zone.calendar_bytes
+            self.assertEqual(len(calendar), 12)
+            self.assertIs(calendar.obj, reader._buffer.obj)
+            self.assertEqual(bool(calendar[3] & 4), "P" in zone.monthly_calendar["apr"])
+            calendar.release()
+
+    def test_range_too_wide_for_the_catalogue(self):
+        plant = copy.deepcopy(self.plants[0])
+        plant['zones'][0]['data']['growing_info']['spacing_cm'] = {"min": 10, "max": 4000}
+        with self.assertRaisesRegex(ValueError, "spacing_cm range 10-4000"):
+            export_catalogue([plant], self.path)
+        self.assertFalse(os.path.exists(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
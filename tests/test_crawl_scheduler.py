@@ -0,0 +1,64 @@
+import math
+import os
+import tempfile
+import unittest
+
+from crawl_scheduler import DAY, CrawlScheduler, budget_from_argv, group_by_plant
+
+
+class CrawlSchedulerTest(unittest.TestCase):
+    def test_unknown_page_comes_first(self):
+        scheduler = CrawlScheduler()
+        scheduler.record("Carrot", "A", "f1", now=0)
+        self.assertEqual(scheduler.change_probability("Tomato", "A", now=DAY), 1.0)
+        self.assertEqual(scheduler.plan([("Carrot", "A"), ("Tomato", "A")], 1, now=DAY), [("Tomato", "A")])
+
+    def test_probability_grows_with_age(self):
+        scheduler = CrawlScheduler()
+        scheduler.record("Carrot", "A", "f1", now=0)
+        self.assertAlmostEqual(scheduler.change_probability("Carrot", "A", now=30 * DAY), 1 - math.exp(-1))
+        self.assertLess(scheduler.change_probability("Carrot", "A", now=DAY),
+                        scheduler.change_probability("Carrot", "A", now=10 * DAY))
+
+    def test_pages_that_change_are_refreshed_first(self):
+        scheduler = CrawlScheduler()
+        for day, fingerprint in enumerate(["a", "b", "c", "d"]):
+            scheduler.record("Carrot", "A", fingerprint, now=day * DAY)
+            scheduler.record("Tomato", "A", "same", now=day * DAY)
+        self.assertEqual(scheduler.entry("Carrot", "A")["changes"], 3)
+        self.assertEqual(scheduler.plan([("Tomato", "A"), ("Carrot", "A")], 1, now=10 * DAY), [("Carrot", "A")])
+
+    def test_failed_pages_back_off(self):
+        scheduler = CrawlScheduler()
+        scheduler.record("Carrot", "A", None, now=0)
+        entry = scheduler.entry("Carrot", "A")
+        self.assertEqual(scheduler.retry_days(entry), 1)
+        scheduler.record("Carrot", "A", None, now=0)
+        scheduler.record("Carrot", "A", None, now=0)
+        self.assertEqual(scheduler.retry_days(entry), 4)
+        entry["failures"] = 20
+        self.assertEqual(scheduler.retry_days(entry), 60)
+        scheduler.record("Carrot", "A", "f1", now=0)
+        self.assertEqual(entry["failures"], 0)
+
+    def test_save_and_load(self):
+        scheduler = CrawlScheduler()
+        scheduler.record("Carrot", "A", "f1", now=0)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'state', 'schedule.json')
+            scheduler.save(path)
+            self.assertEqual(CrawlScheduler.load(path).pages, scheduler.pages)
+            self.assertEqual(CrawlScheduler.load(os.path.join(directory, 'missing.json')).pages, {})
+
+    def test_group_by_plant_keeps_zone_order(self):
+        zones = {"A": 1, "B": 2, "C": 3}
+        self.assertEqual(group_by_plant([("Carrot", "C"), ("Carrot", "A"), ("Tomato", "B")], zones),
+                         {"Carrot": {"A": 1, "C": 3}, "Tomato": {"B": 2}})
+
+    def test_budget_from_argv(self):
+        self.assertEqual(budget_from_argv(['--changed-only', '--budget=50']), 50)
+        self.assertIsNone(budget_from_argv(['--changed-only']))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import copy
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+from catalogue_io import load_plants_from_dir
+from dataset_delta import apply_patch, diff_snapshots, diff_zone, load_snapshot, plant_hash
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DELTA_JS = os.path.join(REPO_DIR, 'server', 'utils', 'gardenateDelta.js')
+SNAPSHOT_DIR = os.path.join(REPO_DIR, 'garden_data_enhanced')
+
+# Applies a patch with the server's applier and prints {"changed": {...}, "removed": [...], "rejected": [...]}
+APPLY_JS = """
+const delta = require(process.argv[1]);
+const plants = delta.readSnapshot(process.argv[2]);
+const result = delta.applyDeltaPatch(plants, delta.readDeltaPatch(process.argv[3]));
+console.log(JSON.stringify({
+  changed: Object.fromEntries(result.changed.map(plant => [plant.name, plant])),
+  removed: result.removed,
+  rejected: result.rejected.map(entry => entry.name)
+}));
+"""
+
+
+def _plant(growing_info):
+    return {
+        "name": "Tomato",
+        "zones": [{
+            "zone_name": "Australia - temperate",
+            "zone_number": 3,
+            "data": {"plant_name": "Tomato", "growing_info": growing_info},
+        }],
+    }
+
+
+class DeltaPatchTest(unittest.TestCase):
+    def assert_round_trip(self, old_plant, new_plant):
+        patch = diff_snapshots({"Tomato": old_plant}, {"Tomato": new_plant})
+        plants = {"Tomato": copy.deepcopy(old_plant)}
+        self.assertEqual(apply_patch(plants, patch), ["Tomato"])
+        self.assertEqual(plants["Tomato"], new_plant)
+        return patch
+
+    def test_leaf_to_dict_is_set_whole(self):
+        old = _plant({"soil_temperature": "", "soil_temperature_c": None})
+        new = _plant({"soil_temperature": "16°C-35°C", "soil_temperature_c": {"min": 16, "max": 35}})
+        patch = self.assert_round_trip(old, new)
+        zone_change = patch["plants"]["Tomato"]["zones"]["Australia - temperate"]
+        self.assertEqual(zone_change["set"]["data.growing_info.soil_temperature_c"], {"min": 16, "max": 35})
+        self.assertNotIn("unset", zone_change)
+
+    def test_dict_to_leaf_is_set_whole(self):
+        old = _plant({"soil_temperature_c": {"min": 16, "max": 35}})
+        new = _plant({"soil_temperature_c": None})
+        patch = self.assert_round_trip(old, new)
+        zone_change = patch["plants"]["Tomato"]["zones"]["Australia - temperate"]
+        self.assertEqual(zone_change["set"], {"data.growing_info.soil_temperature_c": None})
+        self.assertNotIn("unset", zone_change)
+
+    def test_changed_leaves_and_removed_fields(self):
+        old = _plant({"soil_temperature_c": {"min": 16, "max": 35}, "spacing": "40 cm"})
+        new = _plant({"soil_temperature_c": {"min": 18, "max": 35}})
+        self.assert_round_trip(old, new)
+        self.assertEqual(diff_zone(old["zones"][0], new["zones"][0]), {
+            "set": {"data.growing_info.soil_temperature_c.min": 18},
+            "unset": ["data.growing_info.spacing"],
+        })
+
+    def test_identical_zones_have_no_changes(self):
+        plant = _plant({"soil_temperature_c": None})
+        self.assertIsNone(diff_zone(plant["zones"][0], copy.deepcopy(plant["zones"][0])))
+
+
+@unittest.skipIf(shutil.which('node') is None, "node is not installed")
+class JavaScriptApplierTest(unittest.TestCase):
+    """server/utils/gardenateDelta.js must patch a snapshot exactly as apply_patch does"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        self.old_dir = os.path.join(self.tmp, 'old')
+        os.makedirs(self.old_dir)
+        for file_name in ['all_Basil.json', 'all_Carrot.json', 'all_Tomato.json', 'all_Zucchini.json']:
+            shutil.copy(os.path.join(SNAPSHOT_DIR, file_name), self.old_dir)
+
+    def run_node(self, snapshot_dir, patch):
+        patch_file = os.path.join(self.tmp, 'patch.json')
+        with open(patch_file, 'w') as f:
+            json.dump(patch, f)
+        output = subprocess.run(['node', '-e', APPLY_JS, DELTA_JS, snapshot_dir, patch_file],
+                                check=True, capture_output=True, text=True).stdout
+        return json.loads(output)
+
+    def make_patch(self):
+        old = load_snapshot(self.old_dir)
+        new = copy.deepcopy(old)
+        tomato = new["Tomato"]["zones"][0]["data"]
+        tomato["growing_info"]["spacing"] = "50 cm"
+        tomato["growing_info"]["soil_temperature_c"] = None
+        tomato["culinary_hints"].append("Roast with garlic.")
+        del new["Carrot"]["zones"][-1]
+        new["Basil"]["zones"].reverse()
+        del new["Zucchini"]
+        new["Sunflower"] = {"name": "Sunflower", "zones": []}
+        return old, new, diff_snapshots(old, new)
+
+    def test_matches_the_python_applier(self):
+        old, new, patch = self.make_patch()
+        result = self.run_node(self.old_dir, patch)
+        plants = copy.deepcopy(old)
+        apply_patch(plants, patch)
+        self.assertEqual(result["rejected"], [])
+        self.assertEqual(result["removed"], ["Zucchini"])
+        self.assertEqual(sorted(result["changed"]), ["Basil", "Carrot", "Sunflower", "Tomato"])
+        for name, plant in result["changed"].items():
+            self.assertEqual(plant, plants[name])
+            self.assertEqual(plant, new[name])
+
+    def test_rejects_a_plant_that_does_not_match_the_base(self):
+        _, _, patch = self.make_patch()
+        with open(os.path.join(self.old_dir, 'all_Carrot.json')) as f:
+            carrot = json.load(f)
+        carrot["zones"][0]["data"]["family"] = "Edited by hand"
+        with open(os.path.join(self.old_dir, 'all_Carrot.json'), 'w') as f:
+            json.dump(carrot, f)
+        os.remove(os.path.join(self.old_dir, 'all_Basil.json'))
+
+        result = self.run_node(self.old_dir, patch)
+        self.assertEqual(sorted(result["rejected"]), ["Basil", "Carrot"])
+        self.assertEqual(sorted(result["changed"]), ["Sunflower", "Tomato"])
+
+    def test_hashes_agree_with_plant_hash(self):
+        script = ("const d = require(process.argv[1]);"
+                  "console.log(JSON.stringify([...d.readSnapshot(process.argv[2]).values()].map(d.plantHash)));")
+        output = subprocess.run(['node', '-e', script, DELTA_JS, SNAPSHOT_DIR],
+                                check=True, capture_output=True, text=True).stdout
+        self.assertEqual(json.loads(output), [plant_hash(plant) for plant in load_plants_from_dir(SNAPSHOT_DIR)])
+
+    def test_integral_floats_hash_like_ints(self):
+        self.assertEqual(plant_hash({"min": 20.0, "max": 7.5}), plant_hash({"min": 20, "max": 7.5}))
+
+
+if __name__ == "__main__":
+    unittest.main()
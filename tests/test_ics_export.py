@@ -0,0 +1,61 @@
+import io
+import unittest
+
+from ics_export import MAX_LINE_OCTETS, CalendarRenderer, escape_text, fold_line, garden_key
+from sowing_windows import WEEKS
+from succession_planner import SuccessionPlanner
+
+
+def unfold(text):
+    return text.replace('\r\n ', '')
+
+
+class FoldingTest(unittest.TestCase):
+    def test_escape_text(self):
+        self.assertEqual(escape_text('a\\b;c,d\ne'), r'a\\b\;c\,d\ne')
+
+    def test_short_line_is_not_folded(self):
+        self.assertEqual(fold_line("SUMMARY:Sow direct: Carrot"), "SUMMARY:Sow direct: Carrot\r\n")
+
+    def test_long_line_is_folded_to_75_octets(self):
+        line = "DESCRIPTION:" + "x" * 200
+        folded = fold_line(line)
+        self.assertTrue(folded.endswith('\r\n'))
+        self.assertTrue(all(len(part.encode('utf-8')) <= MAX_LINE_OCTETS for part in folded[:-2].split('\r\n')))
+        self.assertEqual(unfold(folded), line + '\r\n')
+
+    def test_fold_never_splits_a_character(self):
+        line = "SUMMARY:" + "é" * 100
+        folded = fold_line(line)
+        for part in folded[:-2].split('\r\n'):
+            self.assertLessEqual(len(part.encode('utf-8')), MAX_LINE_OCTETS)
+        self.assertEqual(unfold(folded), line + '\r\n')
+
+
+class CalendarRendererTest(unittest.TestCase):
+    def setUp(self):
+        windows = {"Zone": {"Lettuce": {'P': (1 << WEEKS) - 1, 'T': 0, 'S': 0}}}
+        planner = SuccessionPlanner(windows, {("Zone", "Lettuce"): {"min": 8, "max": 12}})
+        self.renderer = CalendarRenderer(planner, 2026, dtstamp='20260101T000000Z')
+
+    def test_garden_calendar(self):
+        f = io.StringIO()
+        garden = {"id": "plot 1", "name": "Plot; one", "zone": "Zone",
+                  "crops": ["Lettuce", "Lettuce", "Unknown"]}
+        events, skipped = self.renderer.write_garden(garden, f)
+        text = f.getvalue()
+        self.assertEqual(skipped, ["Unknown"])
+        self.assertEqual(events, 2 * 13)
+        self.assertTrue(text.startswith("BEGIN:VCALENDAR\r\n") and text.endswith("END:VCALENDAR\r\n"))
+        self.assertIn("X-WR-CALNAME:Plot\\; one\r\n", text)
+        uids = [line for line in unfold(text).split('\r\n') if line.startswith('UID:')]
+        self.assertEqual(len(uids), len(set(uids)))
+        self.assertTrue(all(uid.startswith(f"UID:{garden_key('plot 1')}-") for uid in uids))
+        self.assertIn("DTSTART;VALUE=DATE:20260101\r\n", text)
+
+    def test_garden_keys_differ_for_ids_that_slug_alike(self):
+        self.assertNotEqual(garden_key("Plot 1"), garden_key("plot-1"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from integrate_detailed_data import (
+    add_numeric_growing_info, parse_harvest_range, parse_soil_temperature_range, parse_spacing_range,
+)
+
+
+class ParseRangeTest(unittest.TestCase):
+    def test_soil_temperature(self):
+        self.assertEqual(parse_soil_temperature_range("16°C-35°C"), {"min": 16, "max": 35})
+        self.assertEqual(parse_soil_temperature_range("between 12°C and 21°C"), {"min": 12, "max": 21})
+        self.assertEqual(parse_soil_temperature_range("50°F and 95°F"), {"min": 10, "max": 35})
+        self.assertIsNone(parse_soil_temperature_range(""))
+        self.assertIsNone(parse_soil_temperature_range(None))
+
+    def test_spacing(self):
+        self.assertEqual(parse_spacing_range("Space plants:  40 - 60  cm apart"), {"min": 40, "max": 60})
+        self.assertEqual(parse_spacing_range("Thin to 5 cm"), {"min": 5, "max": 5})
+        self.assertEqual(parse_spacing_range("Rows 1 Metre apart"), {"min": 100, "max": 100})
+        self.assertEqual(parse_spacing_range("12-18 inches"), {"min": 30.5, "max": 45.7})
+        self.assertIsNone(parse_spacing_range("Space plants: close together"))
+
+    def test_harvest(self):
+        self.assertEqual(parse_harvest_range("8-17 weeks"), {"min": 8, "max": 17})
+        self.assertEqual(parse_harvest_range("Harvest in 8-10 days."), {"min": 1.1, "max": 1.4})
+        self.assertEqual(parse_harvest_range("Harvest in approximately 4 months"), {"min": 17.3, "max": 17.3})
+        self.assertIsNone(parse_harvest_range("when large enough"))
+
+    def test_reversed_range_is_sorted(self):
+        self.assertEqual(parse_spacing_range("60-40 cm"), {"min": 40, "max": 60})
+
+    def test_add_numeric_growing_info(self):
+        growing_info = add_numeric_growing_info({"soil_temperature": "", "spacing": "30 cm", "harvest_time": "10 weeks"})
+        self.assertIsNone(growing_info["soil_temperature_c"])
+        self.assertEqual(growing_info["spacing_cm"], {"min": 30, "max": 30})
+        self.assertEqual(growing_info["harvest_weeks"], {"min": 10, "max": 10})
+
+
+if __name__ == "__main__":
+    unittest.main()
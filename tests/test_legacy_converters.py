@@ -0,0 +1,66 @@
+import dataclasses
+import json
+import os
+import unittest
+
+from legacy_converters import CONVERTERS, convert, convert_legacy_data, detect_shape, merge_profiles
+from plant_model import GrowingInfo
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CATALOGUE_FILE = os.path.join(ROOT, 'garden_data', 'all_Carrot.json')
+PROCESSED_FILE = os.path.join(ROOT, 'gardenate_data', 'processed', 'Carrot_Australia___temperate.json')
+DETAILED_FILE = os.path.join(ROOT, 'gardenate_detailed_data', 'Carrot.json')
+
+
+def load(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+class ConverterRegistryTest(unittest.TestCase):
+    def test_detect_shape(self):
+        self.assertEqual(detect_shape(load(CATALOGUE_FILE)), "catalogue")
+        self.assertEqual(detect_shape([load(CATALOGUE_FILE)]), "catalogue")
+        self.assertEqual(detect_shape(load(PROCESSED_FILE)), "processed")
+        self.assertEqual(detect_shape(load(DETAILED_FILE)), "detailed")
+        self.assertIsNone(detect_shape({"plants": []}))
+        self.assertIsNone(detect_shape([]))
+
+    def test_every_shape_converts_to_plant_records(self):
+        for path in (CATALOGUE_FILE, PROCESSED_FILE, DETAILED_FILE):
+            shape, plants = convert(load(path))
+            self.assertIn(shape, CONVERTERS)
+            plants = list(plants)
+            self.assertEqual([plant.name for plant in plants], ["Carrot"])
+            self.assertTrue(plants[0].zones)
+
+    def test_unknown_shape_raises(self):
+        with self.assertRaises(ValueError):
+            convert({"plants": []})
+
+    def test_merge_fills_only_empty_fields(self):
+        _, plants = convert(load(PROCESSED_FILE))
+        base = dataclasses.replace(next(plants).zones[0], family="", scientific_name="Daucus carota",
+                                   growing_info=GrowingInfo('', '30 cm', '', ()))
+        extra = dataclasses.replace(base, family="Apiaceae", scientific_name="Other name",
+                                    growing_info=GrowingInfo('', '5 cm', '', (), spacing_cm=(5, 8)))
+        merged = merge_profiles(base, extra)
+        self.assertEqual(merged.family, "Apiaceae")
+        self.assertEqual(merged.scientific_name, "Daucus carota")
+        self.assertEqual(merged.growing_info.spacing, "30 cm")
+        self.assertEqual(merged.growing_info.spacing_cm, (5, 8))
+        self.assertIs(merge_profiles(base, base), base)
+
+    def test_sources_merge_into_one_plant(self):
+        plants, stats = convert_legacy_data([CATALOGUE_FILE, PROCESSED_FILE, DETAILED_FILE])
+        self.assertEqual(stats, {"catalogue": 1, "processed": 1, "detailed": 1, "unrecognised": []})
+        self.assertEqual([plant.name for plant in plants], ["Carrot"])
+        zone = plants[0].zone("Australia - temperate")
+        self.assertIsNotNone(zone)
+        self.assertTrue(zone.growing_info.has_numeric)
+        zone_names = [zone.zone_name for zone in plants[0].zones]
+        self.assertEqual(len(zone_names), len(set(zone_names)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+import unittest
+
+try:
+    import mongomock
+except ImportError:  # pymongo and mongomock are only needed for the exporter
+    mongomock = None
+
+from mongo_export import HASH_FIELD, export_plants
+
+
+def _plant(name, family='Fabaceae / the legume family', harvest='Harvest in 8-10 weeks'):
+    return {
+        "name": name,
+        "zones": [{
+            "zone_name": "Australia - temperate",
+            "zone_number": 3,
+            "data": {
+                "plant_name": name,
+                "alternative_names": [],
+                "scientific_name": "Phaseolus vulgaris",
+                "family": family,
+                "climate_zone": "Australia - temperate",
+                "monthly_calendar": {"jan": ["P"], "feb": [], "mar": [], "apr": [], "may": [], "jun": [],
+                                     "jul": [], "aug": [], "sep": ["S"], "oct": ["T"], "nov": [], "dec": []},
+                "growing_info": {"soil_temperature": "", "spacing": "10-15 cm", "harvest_time": harvest,
+                                 "additional_notes": []},
+                "companion_plants": [],
+                "avoid_plants": [],
+                "culinary_hints": [],
+            },
+        }],
+    }
+
+
+@unittest.skipIf(mongomock is None, "mongomock is not installed")
+class ExportPlantsTest(unittest.TestCase):
+    def setUp(self):
+        self.collection = mongomock.MongoClient().db.plants
+
+    def test_second_export_is_unchanged(self):
+        plants = [_plant("Beans - climbing"), _plant("Beans - dwarf"), _plant("Tomato", family="Solanaceae")]
+        self.assertEqual(export_plants(self.collection, plants)['created'], 3)
+        counts = export_plants(self.collection, plants)
+        self.assertEqual((counts['created'], counts['updated'], counts['unchanged']), (0, 0, 3))
+        self.assertEqual(self.collection.count_documents({}), 3)
+
+    def test_plants_sharing_a_first_word_do_not_share_a_document(self):
+        self.collection.insert_one({"name": "Beans", "description": "Added by hand"})
+        export_plants(self.collection, [_plant("Beans - climbing"), _plant("Beans - dwarf")])
+        self.assertEqual(sorted(document['name'] for document in self.collection.find()),
+                         ["Beans", "Beans - climbing", "Beans - dwarf"])
+        self.assertNotIn(HASH_FIELD, self.collection.find_one({"name": "Beans"}))
+
+        counts = export_plants(self.collection, [_plant("Beans - climbing"), _plant("Beans - dwarf")])
+        self.assertEqual(counts['unchanged'], 2)
+
+    def test_unique_first_word_updates_the_existing_document(self):
+        self.collection.insert_one({"name": "Beans", "description": "Added by hand"})
+        counts = export_plants(self.collection, [_plant("Beans - dwarf")])
+        self.assertEqual((counts['created'], counts['updated']), (0, 1))
+        document = self.collection.find_one({"name": "Beans"})
+        self.assertEqual(document['description'], "Added by hand")
+        self.assertIn("Australia - temperate", document['gardenate_data']['monthly_calendars'])
+
+    def test_changed_plant_is_updated(self):
+        export_plants(self.collection, [_plant("Beans - dwarf")])
+        before = self.collection.find_one({"name": "Beans - dwarf"})[HASH_FIELD]
+        counts = export_plants(self.collection, [_plant("Beans - dwarf", harvest="Harvest in 10-12 weeks")])
+        self.assertEqual(counts['updated'], 1)
+        self.assertNotEqual(self.collection.find_one({"name": "Beans - dwarf"})[HASH_FIELD], before)
+        self.assertEqual(self.collection.count_documents({}), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import unittest
+
+from plant_names import PlantNameResolver, name_key, resolve_references, split_references
+
+PLANTS = ["Beans - climbing", "Beans - dwarf", "Beetroot", "Brussels sprouts", "Cabbage", "Capsicum", "Carrot",
+          "Chilli peppers", "Chives", "Corn Salad", "Eggplant", "Garlic", "Leeks", "Onion", "Squash",
+          "Sunflower", "Sweet Potato", "Sweet corn", "Yam/Oca", "Zucchini"]
+
+
+class PlantNameResolverTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.resolver = PlantNameResolver({name: [] for name in PLANTS} | {"Eggplant": ["Aubergine"]})
+
+    def test_name_key(self):
+        self.assertEqual(name_key("Egg plants."), "eggplant")
+        self.assertEqual(name_key("Tomatoes"), "tomato")
+
+    def test_exact_and_alias_names(self):
+        self.assertEqual(self.resolver.resolve("leeks."), "Leeks")
+        self.assertEqual(self.resolver.resolve("Oca"), "Yam/Oca")
+        self.assertEqual(self.resolver.resolve("dwarf beans"), "Beans - dwarf")
+        self.assertEqual(self.resolver.resolve("Aubergine (Eggplant)"), "Eggplant")
+        self.assertEqual(self.resolver.resolve("Peppers (Capsicum)"), "Capsicum")
+
+    def test_parenthesised_list_names_every_plant(self):
+        names, unresolved = self.resolver.resolve_all(
+            "Avoid growing close to: Alliums (Chives, leek, garlic, onions) Sunflower")
+        self.assertEqual(names, ("Chives", "Leeks", "Garlic", "Onion", "Sunflower"))
+        self.assertEqual(unresolved, ())
+
+    def test_slash_names_every_plant(self):
+        self.assertEqual(self.resolver.resolve_all("zucchini/squash"), (("Zucchini", "Squash"), ()))
+        self.assertIsNone(self.resolver.resolve("zucchini/squash"))
+
+    def test_unknown_names_are_reported(self):
+        self.assertEqual(self.resolver.resolve_all("Chervil,Carrot"), (("Carrot",), ("Chervil",)))
+        self.assertIsNone(self.resolver.resolve("Chervil,Carrot"))
+
+    def test_fuzzy_match_needs_matching_words(self):
+        self.assertEqual(self.resolver.resolve("beets"), "Beetroot")
+        self.assertIsNone(self.resolver.resolve("sweet peas"))
+
+    def test_ambiguous_words_stay_unresolved(self):
+        self.assertEqual(self.resolver.resolve("sprouts"), "Brussels sprouts")
+        self.assertIsNone(self.resolver.resolve("corn"))
+        self.assertIsNone(self.resolver.resolve("Beans"))
+
+    def test_split_references(self):
+        self.assertEqual(split_references("Compatible with (can grow beside): Asparagus, Chervil,Carrot and Leeks."),
+                         ["Asparagus", "Chervil", "Carrot", "Leeks"])
+        self.assertEqual(split_references("Cabbage (garlic, onions) Sunflower"),
+                         ["Cabbage (garlic", "onions", "Sunflower"])
+        self.assertEqual(split_references("Climbing (pole) beans"), ["Climbing (pole) beans"])
+        self.assertEqual(split_references(["Not applicable"]), [])
+
+    def test_resolve_references_counts_leftover_fragments(self):
+        resolved, unresolved = resolve_references(self.resolver, ["Cabbage (garlic", "Chervil", "Chervil"])
+        self.assertEqual(resolved, {"Cabbage (garlic": ("Cabbage", "Garlic")})
+        self.assertEqual(unresolved, {"Chervil": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
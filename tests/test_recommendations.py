@@ -0,0 +1,65 @@
+import datetime
+import os
+import tempfile
+import unittest
+
+from recommendations import (
+    NEUTRAL_SCORE, RecommendationReader, export_recommendations, score_recommendation, soil_fit, week_of,
+)
+
+SOIL = {"min": 10, "max": 30}
+HARVEST = {"min": 12, "max": 16}
+
+
+class ScoringTest(unittest.TestCase):
+    def test_soil_fit(self):
+        self.assertEqual(soil_fit(20, SOIL), 1.0)
+        self.assertEqual(soil_fit(10, SOIL), 0.5)
+        self.assertEqual(soil_fit(25, SOIL), 0.75)
+        self.assertEqual(soil_fit(35, SOIL), 0.0)
+        self.assertEqual(soil_fit(20, {"min": 20, "max": 20}), 1.0)
+        self.assertEqual(soil_fit(20, None), NEUTRAL_SCORE)
+
+    def test_direct_sowing_ranks_above_trays(self):
+        self.assertGreater(score_recommendation(['P'], HARVEST, SOIL, 20),
+                           score_recommendation(['S'], HARVEST, SOIL, 20))
+        # The best method open that week is the one scored
+        self.assertEqual(score_recommendation(['S', 'P'], HARVEST, SOIL, 20),
+                         score_recommendation(['P'], HARVEST, SOIL, 20))
+
+    def test_faster_harvest_ranks_higher(self):
+        self.assertGreater(score_recommendation(['P'], {"min": 4, "max": 6}, SOIL, 20),
+                           score_recommendation(['P'], {"min": 20, "max": 30}, SOIL, 20))
+        self.assertEqual(score_recommendation(['P'], HARVEST, SOIL, 20), 0.5 * 1.0 + 0.25 * 0.5 + 0.25 * 1.0)
+
+    def test_soil_temperature_only_counts_for_direct_sowing(self):
+        self.assertEqual(score_recommendation(['T'], HARVEST, SOIL, 40),
+                         score_recommendation(['T'], HARVEST, SOIL, 20))
+        self.assertLess(score_recommendation(['P'], HARVEST, SOIL, 40),
+                        score_recommendation(['P'], HARVEST, SOIL, 20))
+
+    def test_week_of(self):
+        self.assertEqual(week_of(datetime.date(2026, 1, 7)), 0)
+        self.assertEqual(week_of(datetime.date(2026, 1, 8)), 1)
+        self.assertEqual(week_of(datetime.date(2024, 12, 31)), 51)
+
+
+class RecommendationTableTest(unittest.TestCase):
+    def test_round_trip(self):
+        weeks = [[] for _ in range(52)]
+        weeks[3] = [("Carrot", ['P'], 0.9), ("Leeks", ['S', 'T'], 0.4)]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'recommendations.grec')
+            export_recommendations({"Zone": weeks}, path)
+            with RecommendationReader(path) as reader:
+                ranked = reader.recommend("Zone", 3)
+                self.assertEqual([(plant, methods) for plant, methods, _ in ranked],
+                                 [("Carrot", ['P']), ("Leeks", ['S', 'T'])])
+                self.assertAlmostEqual(ranked[0][2], 0.9, delta=1 / 255)
+                self.assertEqual(reader.recommend("Zone", 3, limit=1)[0][0], "Carrot")
+                self.assertEqual(reader.recommend("Zone", 4), [])
+                self.assertEqual(reader.recommend("Nowhere", 3), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
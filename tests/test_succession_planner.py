@@ -0,0 +1,51 @@
+import unittest
+
+from succession_planner import SuccessionPlanner, season_start
+from sowing_windows import WEEKS
+
+
+def weeks_mask(weeks):
+    mask = 0
+    for week in weeks:
+        mask |= 1 << week % WEEKS
+    return mask
+
+
+class SuccessionPlannerTest(unittest.TestCase):
+    def setUp(self):
+        # Sown from week 40 to week 5 of the next year, as a southern-hemisphere summer crop
+        summer = weeks_mask(range(40, 58))
+        windows = {"Zone": {"Tomato": {'P': summer, 'T': 0, 'S': 0},
+                            "Lettuce": {'P': weeks_mask(range(WEEKS)), 'T': 0, 'S': 0}}}
+        harvest = {("Zone", "Tomato"): {"min": 8, "max": 12}, ("Zone", "Lettuce"): {"min": 8, "max": 12}}
+        self.planner = SuccessionPlanner(windows, harvest)
+
+    def test_season_start_after_the_longest_gap(self):
+        self.assertEqual(season_start(weeks_mask(range(40, 58))), 40)
+        self.assertEqual(season_start(weeks_mask(range(10, 20))), 10)
+        self.assertEqual(season_start(weeks_mask(range(WEEKS))), 0)
+
+    def test_plan_staggers_from_the_season_start(self):
+        plan = self.planner.plan("Zone", "Tomato")
+        self.assertEqual(plan['interval'], 4)
+        self.assertEqual(plan['season_start'], 40)
+        self.assertEqual([sowing['week'] for sowing in plan['sowings']], [0, 4, 40, 44, 48])
+
+    def test_dated_plan_rolls_into_the_next_year(self):
+        plan = self.planner.dated_plan("Zone", "Tomato", 2026)
+        dates = [sowing['date'] for sowing in plan['sowings']]
+        self.assertEqual(dates, ['2026-10-08', '2026-11-05', '2026-12-03', '2027-01-01', '2027-01-29'])
+        self.assertEqual(plan['sowings'][3]['harvest_from'], '2027-02-26')
+
+    def test_dated_plan_without_a_wrap_stays_in_the_year(self):
+        dates = [sowing['date'] for sowing in self.planner.dated_plan("Zone", "Lettuce", 2026)['sowings']]
+        self.assertEqual(dates, sorted(dates))
+        self.assertTrue(all(date.startswith('2026-') for date in dates))
+
+    def test_invalid_interval(self):
+        self.assertIn('error', self.planner.plan("Zone", "Tomato", 0))
+        self.assertIn('error', self.planner.plan("Zone", "Carrot"))
+
+
+if __name__ == "__main__":
+    unittest.main()
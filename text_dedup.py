@@ -0,0 +1,126 @@
+import hashlib
+import json
+import os
+import sys
+
+from atomic_io import DirectorySyncBatch, write_json
+from catalogue_io import directory_bytes, load_plants_from_dir, plant_files, retained_bytes
+
+# Directories
+INPUT_DIR = 'garden_data_enhanced'
+OUTPUT_DIR = 'garden_data_dedup'
+TEXTS_FILE = 'texts.json'
+
+# Paragraph lists that are replaced by references, as (container, field, reference field)
+TEXT_FIELDS = [
+    ("growing_info", "additional_notes", "additional_note_ids"),
+    (None, "culinary_hints", "culinary_hint_ids"),
+]
+
+
+def paragraph_id(text):
+    """Return a stable ID for a paragraph, derived from its exact text"""
+    return hashlib.sha1(text.encode('utf-8')).hexdigest()[:12]
+
+
+def _field_container(data, container):
+    return data if container is None else data.get(container, {})
+
+
+def _replace_key(target, old_key, new_key, value):
+    """Rename a key in place, keeping its position so files diff cleanly"""
+    items = [(new_key, value) if key == old_key else (key, item) for key, item in target.items()]
+    target.clear()
+    target.update(items)
+
+
+def dedup_plant(plant, texts, stats):
+    """Replace repeated paragraphs in a plant with IDs into the shared texts table"""
+    deduped = json.loads(json.dumps(plant))
+    for zone in deduped.get('zones', []):
+        data = zone.get('data', {})
+        for container, field, ref_field in TEXT_FIELDS:
+            target = _field_container(data, container)
+            if field not in target:
+                continue
+            ids = []
+            for text in target[field]:
+                text_id = paragraph_id(text)
+                if text_id not in texts:
+                    texts[text_id] = text
+                    stats["unique_paragraphs"] += 1
+                    stats["unique_bytes"] += len(text.encode('utf-8'))
+                stats["paragraphs"] += 1
+                stats["bytes"] += len(text.encode('utf-8'))
+                ids.append(text_id)
+            _replace_key(target, field, ref_field, ids)
+    return deduped
+
+
+def dedup_catalogue(plants):
+    """Deduplicate paragraphs across a list of plants, returning (texts, deduped plants, stats)"""
+    texts = {}
+    stats = {"paragraphs": 0, "unique_paragraphs": 0, "bytes": 0, "unique_bytes": 0}
+    deduped = [dedup_plant(plant, texts, stats) for plant in plants]
+    stats["paragraph_ratio"] = stats["paragraphs"] / stats["unique_paragraphs"] if stats["unique_paragraphs"] else 1.0
+    stats["byte_ratio"] = stats["bytes"] / stats["unique_bytes"] if stats["unique_bytes"] else 1.0
+    return texts, deduped, stats
+
+
+def expand_plant(plant, texts):
+    """Replace paragraph IDs in a deduplicated plant with the shared text objects"""
+    for zone in plant.get('zones', []):
+        data = zone.get('data', {})
+        for container, field, ref_field in TEXT_FIELDS:
+            target = _field_container(data, container)
+            if ref_field in target:
+                _replace_key(target, ref_field, field, [texts[text_id] for text_id in target[ref_field]])
+    return plant
+
+
+def load_texts(input_dir=OUTPUT_DIR):
+    """Load the shared texts table, interning every paragraph once"""
+    with open(os.path.join(input_dir, TEXTS_FILE), 'r') as f:
+        return {text_id: sys.intern(text) for text_id, text in json.load(f).items()}
+
+
+def load_deduped_catalogue(input_dir=OUTPUT_DIR):
+    """Load a deduplicated catalogue, expanding references to the shared texts"""
+    texts = load_texts(input_dir)
+    plants = []
+    for file_name in plant_files(input_dir):
+        with open(os.path.join(input_dir, file_name), 'r') as f:
+            plants.append(expand_plant(json.load(f), texts))
+    return plants
+
+
+def write_deduped_catalogue(input_dir=INPUT_DIR, output_dir=OUTPUT_DIR):
+    """Write a deduplicated copy of a catalogue directory and report the savings"""
+    os.makedirs(output_dir, exist_ok=True)
+    file_names = plant_files(input_dir)
+    plants = load_plants_from_dir(input_dir)
+
+    texts, deduped, stats = dedup_catalogue(plants)
+
+    with DirectorySyncBatch() as batch:
+        write_json(os.path.join(output_dir, TEXTS_FILE), texts, batch=batch, indent=2, sort_keys=True)
+        for file_name, plant in zip(file_names, deduped):
+            write_json(os.path.join(output_dir, file_name), plant, batch=batch, indent=2)
+
+    stats["disk_bytes"] = directory_bytes(input_dir, file_names)
+    stats["deduped_disk_bytes"] = directory_bytes(output_dir, file_names + [TEXTS_FILE])
+
+    _, stats["memory_bytes"] = retained_bytes(load_plants_from_dir, input_dir)
+    _, stats["deduped_memory_bytes"] = retained_bytes(load_deduped_catalogue, output_dir)
+    return stats
+
+
+if __name__ == "__main__":
+    input_dir = sys.argv[1] if len(sys.argv) > 1 else INPUT_DIR
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else OUTPUT_DIR
+    stats = write_deduped_catalogue(input_dir, output_dir)
+
+    print(f"Paragraphs: {stats['paragraphs']} total, {stats['unique_paragraphs']} unique "
+          f"({stats['paragraph_ratio']:.1f}x dedup, {stats['byte_ratio']:.1f}x by bytes)")
+    print(f"On disk: {stats['disk_bytes'] / 1024:.0f} KiB -> {stats['deduped_disk_bytes'] / 1024:.0f} KiB")
+    print(f"In memory: {stats['memory_bytes'] / 1024:.0f} KiB -> {stats['deduped_memory_bytes'] / 1024:.0f} KiB")
@@ -0,0 +1,99 @@
+import hashlib
+import json
+import os
+import re
+import sys
+
+from atomic_io import DirectorySyncBatch, atomic_open, write_json
+from catalogue_io import directory_bytes, load_plants_from_dir, plant_files
+from plant_names import PlantNameResolver
+
+# Directories; the client serves everything under client/public
+INPUT_DIR = 'garden_data_enhanced'
+OUTPUT_DIR = os.path.join('client', 'public', 'zone_bundles')
+MANIFEST_FILE = 'index.json'
+
+BUNDLE_VERSION = 1
+BUNDLE_FILE_PATTERN = re.compile(r'^[a-z0-9-]+\.[0-9a-f]{12}\.json$')
+
+
+def zone_slug(zone_name):
+    """'Australia - cool/mountain' -> 'australia-cool-mountain'"""
+    return re.sub(r'[^a-z0-9]+', '-', zone_name.lower()).strip('-')
+
+
+def build_zone_bundles(plants):
+    """Regroup plants (all_*.json shape) by zone: {zone name: bundle}.
+
+    A bundle maps each plant name to its zone_number and data for that zone, exactly as in the
+    per-plant files, so a client needs a single download for its zone.
+    """
+    bundles = {}
+    for plant in sorted(plants, key=lambda plant: plant['name']):
+        for zone in plant.get('zones', []):
+            bundle = bundles.setdefault(zone['zone_name'], {
+                "version": BUNDLE_VERSION,
+                "zone_name": zone['zone_name'],
+                "zone_number": zone.get('zone_number'),
+                "plants": {},
+            })
+            bundle["plants"][plant['name']] = {"zone_number": zone.get('zone_number'), "data": zone['data']}
+    return bundles
+
+
+def write_zone_bundles(input_dir=INPUT_DIR, output_dir=OUTPUT_DIR):
+    """Write one content-addressed bundle per zone plus an index.json manifest, and report sizes.
+
+    Bundle file names carry a hash of their content, so they can be cached indefinitely; only the
+    small manifest has to be revalidated. It is written last, so it never names a missing bundle.
+    The manifest also carries the name resolver's alias table, so the client can find "Tomatoes"
+    or "egg plant" without guessing at spellings.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    plants = load_plants_from_dir(input_dir)
+    bundles = build_zone_bundles(plants)
+
+    resolver = PlantNameResolver.from_plants(plants)
+    manifest = {"version": BUNDLE_VERSION, "zones": {}, "aliases": resolver.alias_table()}
+    with DirectorySyncBatch() as batch:
+        for zone_name, bundle in sorted(bundles.items()):
+            content = json.dumps(bundle, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+            file_name = f"{zone_slug(zone_name)}.{hashlib.sha256(content).hexdigest()[:12]}.json"
+            file_path = os.path.join(output_dir, file_name)
+            if not os.path.exists(file_path):
+                with atomic_open(file_path, 'wb', batch=batch) as f:
+                    f.write(content)
+            manifest["zones"][zone_name] = {
+                "file": file_name,
+                "zone_number": bundle["zone_number"],
+                "plants": len(bundle["plants"]),
+                "bytes": len(content),
+            }
+
+    write_json(os.path.join(output_dir, MANIFEST_FILE), manifest, indent=2)
+
+    # Bundles from earlier publishes are no longer referenced
+    current = {entry["file"] for entry in manifest["zones"].values()}
+    for file_name in os.listdir(output_dir):
+        if BUNDLE_FILE_PATTERN.match(file_name) and file_name not in current:
+            os.remove(os.path.join(output_dir, file_name))
+
+    plant_file_bytes = directory_bytes(input_dir, plant_files(input_dir))
+    bundle_bytes = [entry["bytes"] for entry in manifest["zones"].values()]
+    return {
+        "plants": len(plants),
+        "zones": len(bundles),
+        "plant_file_bytes": plant_file_bytes,
+        "bundle_bytes": sum(bundle_bytes),
+        "largest_bundle_bytes": max(bundle_bytes, default=0),
+    }
+
+
+if __name__ == "__main__":
+    input_dir = sys.argv[1] if len(sys.argv) > 1 else INPUT_DIR
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else OUTPUT_DIR
+    stats = write_zone_bundles(input_dir, output_dir)
+
+    print(f"{stats['zones']} zone bundles for {stats['plants']} plants in {output_dir}/")
+    print(f"One zone's whole catalogue: at most {stats['largest_bundle_bytes'] / 1024:.0f} KiB, "
+          f"versus {stats['plant_file_bytes'] / 1024:.0f} KiB for every all_<plant>.json")
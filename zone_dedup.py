@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import re
+import sys
+
+from atomic_io import DirectorySyncBatch, write_json
+from catalogue_io import directory_bytes, load_plants_from_dir, plant_files, retained_bytes
+
+# Directories
+INPUT_DIR = 'garden_data_enhanced'
+OUTPUT_DIR = 'garden_data_packed'
+
+CLASSES_VERSION = 1
+
+# "(Best months for growing Tomato in Australia - arid regions)" is the only zone-specific paragraph
+ZONE_NOTE_PATTERN = re.compile(r'^\(Best months for growing (.*?) in (.*) regions\)$')
+
+
+def zone_fingerprint(payload):
+    """Return a content hash of a zone payload, independent of key order"""
+    canonical = json.dumps(payload, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()[:16]
+
+
+def split_zone_labels(data):
+    """Split a zone's data into (payload, labels), blanking the zone label fields in the payload.
+
+    The blanked fields stay in place as None so that joining the labels back restores the
+    original key and paragraph order exactly.
+    """
+    payload = dict(data)
+    labels = {}
+    if 'climate_zone' in payload:
+        labels['climate_zone'] = payload['climate_zone']
+        payload['climate_zone'] = None
+
+    growing_info = payload.get('growing_info')
+    if isinstance(growing_info, dict) and growing_info.get('additional_notes'):
+        notes = list(growing_info['additional_notes'])
+        for index, note in enumerate(notes):
+            if isinstance(note, str) and ZONE_NOTE_PATTERN.match(note):
+                labels['zone_note'] = note
+                notes[index] = None
+                payload['growing_info'] = {**growing_info, 'additional_notes': notes}
+                break
+    return payload, labels
+
+
+def join_zone_labels(payload, labels):
+    """Rebuild a zone's data from a (possibly shared) payload and its own labels"""
+    data = dict(payload)
+    if 'climate_zone' in labels:
+        data['climate_zone'] = labels['climate_zone']
+    if 'zone_note' in labels:
+        growing_info = data['growing_info']
+        notes = [labels['zone_note'] if note is None else note for note in growing_info['additional_notes']]
+        data['growing_info'] = {**growing_info, 'additional_notes': notes}
+    return data
+
+
+def data_fingerprint(data):
+    """Fingerprint a zone's extracted data with the zone labels left out"""
+    return zone_fingerprint(split_zone_labels(data)[0])
+
+
+def relabel_zone(data, zone_name):
+    """Return a copy of another zone's data labelled for zone_name, sharing everything else"""
+    payload, labels = split_zone_labels(data)
+    labels['climate_zone'] = zone_name
+    if 'zone_note' in labels:
+        plant_name = ZONE_NOTE_PATTERN.match(labels['zone_note']).group(1)
+        labels['zone_note'] = f"(Best months for growing {plant_name} in {zone_name} regions)"
+    return join_zone_labels(payload, labels)
+
+
+def pack_plant(plant):
+    """Store each distinct zone payload once; zones refer to it by fingerprint"""
+    records = {}
+    zones = []
+    for zone in plant.get('zones', []):
+        payload, labels = split_zone_labels(zone.get('data', {}))
+        record_id = zone_fingerprint(payload)
+        records.setdefault(record_id, payload)
+        items = []
+        for key, value in zone.items():
+            if key == 'data':
+                items.extend([('record', record_id), ('labels', labels)])
+            else:
+                items.append((key, value))
+        zones.append(dict(items))
+
+    packed = {key: value for key, value in plant.items() if key != 'zones'}
+    packed['records'] = records
+    packed['zones'] = zones
+    return packed
+
+
+def unpack_plant(packed):
+    """Expand a packed plant; zones with the same record share its nested objects"""
+    records = packed['records']
+    zones = []
+    for zone in packed['zones']:
+        items = []
+        for key, value in zone.items():
+            if key == 'record':
+                items.append(('data', join_zone_labels(records[value], zone.get('labels', {}))))
+            elif key != 'labels':
+                items.append((key, value))
+        zones.append(dict(items))
+
+    plant = {key: value for key, value in packed.items() if key not in ('records', 'zones')}
+    plant['zones'] = zones
+    return plant
+
+
+def load_packed_catalogue(input_dir=OUTPUT_DIR):
+    """Load a packed catalogue directory back into the plain plant shape"""
+    plants = []
+    for file_name in plant_files(input_dir):
+        with open(os.path.join(input_dir, file_name), 'r') as f:
+            plants.append(unpack_plant(json.load(f)))
+    return plants
+
+
+def write_packed_catalogue(input_dir=INPUT_DIR, output_dir=OUTPUT_DIR):
+    """Write a packed copy of a catalogue directory and report the savings"""
+    os.makedirs(output_dir, exist_ok=True)
+    file_names = plant_files(input_dir)
+    plants = load_plants_from_dir(input_dir)
+
+    stats = {"zones": 0, "records": 0}
+    with DirectorySyncBatch() as batch:
+        for file_name, plant in zip(file_names, plants):
+            packed = pack_plant(plant)
+            stats["zones"] += len(packed['zones'])
+            stats["records"] += len(packed['records'])
+            write_json(os.path.join(output_dir, file_name), packed, batch=batch, indent=2)
+
+    stats["disk_bytes"] = directory_bytes(input_dir, file_names)
+    stats["packed_disk_bytes"] = directory_bytes(output_dir, file_names)
+
+    _, stats["memory_bytes"] = retained_bytes(load_plants_from_dir, input_dir)
+    _, stats["packed_memory_bytes"] = retained_bytes(load_packed_catalogue, output_dir)
+    return stats
+
+
+class ZoneClasses:
+    """Per-plant groups of zones whose pages had identical content on earlier crawls.
+
+    A refresh fetches one representative zone per group first. When its content has not
+    changed, the other zones in the group are assumed unchanged too and are built from it
+    instead of being fetched; otherwise they are fetched after all the representatives.
+    """
+
+    def __init__(self, fingerprints=None):
+        self.previous = fingerprints or {}
+        self.fingerprints = {plant: dict(zones) for plant, zones in self.previous.items()}
+        self.fresh = {}
+
+    @classmethod
+    def load(cls, path):
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r') as f:
+            state = json.load(f)
+        if state.get("version") != CLASSES_VERSION:
+            return cls()
+        return cls(state["plants"])
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        write_json(path, {"version": CLASSES_VERSION, "plants": self.fingerprints}, indent=2, sort_keys=True)
+
+    def groups(self, plant):
+        """Return the learned groups of equivalent zones for a plant, largest first"""
+        groups = {}
+        for zone_name, fingerprint in self.fingerprints.get(plant, {}).items():
+            groups.setdefault(fingerprint, []).append(zone_name)
+        return sorted(groups.values(), key=len, reverse=True)
+
+    def plan(self, plant, zones):
+        """Order a plant's zones as (zone_name, zone_code, source zone or None)
+
+        Zones without a source are fetched; the rest name the representative they may be
+        copied from and come last, after every representative has been fetched.
+        """
+        known = self.previous.get(plant, {})
+        representatives = {}
+        fetch_first = []
+        deferred = []
+        for zone_name, zone_code in zones.items():
+            fingerprint = known.get(zone_name)
+            if fingerprint is None:
+                fetch_first.append((zone_name, zone_code, None))
+            elif fingerprint not in representatives:
+                representatives[fingerprint] = zone_name
+                fetch_first.append((zone_name, zone_code, None))
+            else:
+                deferred.append((zone_name, zone_code, representatives[fingerprint]))
+        return fetch_first + deferred
+
+    def observe(self, plant, zone_name, fingerprint):
+        """Record the fingerprint of a zone fetched on this crawl"""
+        self.fresh[(plant, zone_name)] = fingerprint
+        self.fingerprints.setdefault(plant, {})[zone_name] = fingerprint
+
+    def can_reuse(self, plant, source):
+        """True if the source zone was fetched on this crawl and its content is unchanged"""
+        fingerprint = self.fresh.get((plant, source))
+        return fingerprint is not None and fingerprint == self.previous.get(plant, {}).get(source)
+
+
+if __name__ == "__main__":
+    input_dir = sys.argv[1] if len(sys.argv) > 1 else INPUT_DIR
+    output_dir = sys.argv[2] if len(sys.argv) > 2 else OUTPUT_DIR
+    stats = write_packed_catalogue(input_dir, output_dir)
+
+    print(f"Zones: {stats['zones']} total, {stats['records']} distinct records "
+          f"({stats['zones'] / stats['records'] if stats['records'] else 1.0:.2f}x dedup)")
+    print(f"On disk: {stats['disk_bytes'] / 1024:.0f} KiB -> {stats['packed_disk_bytes'] / 1024:.0f} KiB")
+    print(f"In memory: {stats['memory_bytes'] / 1024:.0f} KiB -> {stats['packed_memory_bytes'] / 1024:.0f} KiB")